@@ -8,52 +8,124 @@
 
 import os
 import sys
+import logging
+import functools
+import dataclasses
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QPushButton, QComboBox, 
-                             QLineEdit, QProgressBar, QTextEdit, QFileDialog,
-                             QFrame, QGridLayout, QMessageBox, QGroupBox, QScrollArea)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QLineEdit, QProgressBar, QFileDialog,
+                             QFrame, QGridLayout, QMessageBox, QGroupBox, QScrollArea,
+                             QCheckBox, QSpinBox, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QDragEnterEvent, QDropEvent
-from html_converter import convert_single_folder, batch_convert
+from html_converter import ConversionOptions, list_batch_items
+from job_queue import JobQueue, JOB_QUEUED, JOB_RUNNING, JOB_DONE
+from log_pane import LogPane
+from progress_tracker import ProgressTracker
+from conversion_pipeline import Pipeline
 
-class ConversionWorker(QThread):
-    """转换工作线程"""
-    progress_updated = pyqtSignal(int)
-    conversion_finished = pyqtSignal(bool, str, str)
-    
-    def __init__(self, folder_path, output_format, output_dir, is_batch=False):
-        super().__init__()
-        self.folder_path = folder_path
-        self.output_format = output_format
-        self.output_dir = output_dir
-        self.is_batch = is_batch
-        
-    def run(self):
-        try:
-            if self.is_batch:
-                # 批量转换
-                progress_results = []
-                def progress_callback(progress):
-                    progress_results.append(progress)
-                    self.progress_updated.emit(progress)
-                
-                batch_convert(self.folder_path, self.output_format, self.output_dir, progress_callback)
-                self.conversion_finished.emit(True, "批量转换完成", f"处理了 {len(progress_results)} 个项目")
-            else:
-                # 单个转换
-                self.progress_updated.emit(50)
-                result = convert_single_folder(self.folder_path, self.output_format, self.output_dir)
-                if result:
-                    self.progress_updated.emit(100)
-                    self.conversion_finished.emit(True, "转换成功", result)
-                else:
-                    self.conversion_finished.emit(False, "转换失败", "无法处理指定文件夹")
-        except Exception as e:
-            self.conversion_finished.emit(False, "转换出错", str(e))
+logger = logging.getLogger(__name__)
+
+# 任务表格的列
+JOB_COLUMN_FOLDER = 0
+JOB_COLUMN_STATUS = 1
+JOB_COLUMN_BYTES = 2
+JOB_COLUMN_ELAPSED = 3
+
+# 响应式字号档位：(窗口宽度上限, 字号px)，宽度上限为None表示不设上限
+FONT_SIZE_BUCKETS = [(900, 12), (1200, 13), (None, 14)]
+
+# 主窗口样式表模板，%(font_size)d为随窗口宽度变化的正文字号
+MAIN_STYLESHEET_TEMPLATE = """
+    QMainWindow {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+            stop:0 #f8f9fa, stop:1 #e9ecef);
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid #dee2e6;
+        border-radius: 12px;
+        margin-top: 15px;
+        padding-top: 15px;
+        background: white;
+        font-size: 14px;
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 15px;
+        padding: 0 8px 0 8px;
+        color: #495057;
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QLabel {
+        color: #495057;
+        font-size: %(font_size)dpx;
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QLineEdit, QComboBox {
+        padding: 12px 18px;
+        border: 2px solid #dee2e6;
+        border-radius: 8px;
+        font-size: %(font_size)dpx;
+        background: white;
+        min-height: 25px;
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QLineEdit:focus, QComboBox:focus {
+        border-color: #667eea;
+        background: #f8f9ff;
+    }
+    QPlainTextEdit {
+        border: 2px solid #dee2e6;
+        border-radius: 8px;
+        background: white;
+        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+        font-size: 12px;
+        padding: 12px;
+    }
+    QProgressBar {
+        border: 2px solid #dee2e6;
+        border-radius: 8px;
+        text-align: center;
+        background: #f8f9fa;
+        font-weight: bold;
+        min-height: 30px;
+        font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
+    }
+    QProgressBar::chunk {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+            stop:0 #667eea, stop:1 #764ba2);
+        border-radius: 6px;
+    }
+"""
+
+
+def font_bucket(width):
+    """返回窗口宽度对应的正文字号档位"""
+    for max_width, font_size in FONT_SIZE_BUCKETS:
+        if max_width is None or width < max_width:
+            return font_size
+
+
+@functools.lru_cache(maxsize=None)
+def main_stylesheet(font_size):
+    """返回指定字号档位的主窗口样式表，每个档位只生成一次"""
+    return MAIN_STYLESHEET_TEMPLATE % {'font_size': font_size}
+
+
+def format_bytes(size):
+    """把字节数格式化为易读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
 
 class DragDropWidget(QFrame):
     """支持拖拽的组件"""
-    file_dropped = pyqtSignal(str)
+    folders_dropped = pyqtSignal(list)
     
     def __init__(self):
         super().__init__()
@@ -108,11 +180,11 @@ class DragDropWidget(QFrame):
         """)
             
     def dropEvent(self, event: QDropEvent):
-        urls = event.mimeData().urls()
-        if urls:
-            path = urls[0].toLocalFile()
-            if os.path.isdir(path):
-                self.file_dropped.emit(path)
+        # 接受一次拖入的全部文件夹
+        folders = [url.toLocalFile() for url in event.mimeData().urls()]
+        folders = [path for path in folders if os.path.isdir(path)]
+        if folders:
+            self.folders_dropped.emit(folders)
         self.dragLeaveEvent(event)
 
 class ModernButton(QPushButton):
@@ -182,13 +254,31 @@ class ModernButton(QPushButton):
 
 class HTMLMergeTool(QMainWindow):
     """HTML合并工具主窗口"""
+    # 工作线程中的进度事件经信号投递回UI线程
+    progress_event = pyqtSignal(object)
     
     def __init__(self):
         super().__init__()
-        self.selected_folder = None
-        self.conversion_worker = None
+        self.selected_folders = []
+        self.job_rows = {}
+        self.job_progress = {}
+        self.progress_tracker = None
+        self.pipeline = None
+        self.remote_fetcher = None
+        self.module_cache = None
+        self.progress_event.connect(self.on_progress)
+        self.job_queue = JobQueue(max_workers=max(1, min(4, (os.cpu_count() or 2) // 2)), parent=self)
+        self.job_queue.job_added.connect(self.on_job_added)
+        self.job_queue.job_started.connect(self.on_job_started)
+        self.job_queue.job_finished.connect(self.on_job_finished)
+        self.job_queue.queue_finished.connect(self.on_queue_finished)
         self.init_ui()
         
+        # 定时刷新运行中任务的耗时
+        self.elapsed_timer = QTimer(self)
+        self.elapsed_timer.setInterval(500)
+        self.elapsed_timer.timeout.connect(self.refresh_running_jobs)
+        
     def init_ui(self):
         """初始化用户界面"""
         self.setWindowTitle("HTML合并工具")
@@ -199,71 +289,9 @@ class HTMLMergeTool(QMainWindow):
         if os.path.exists('app_icon.ico'):
             self.setWindowIcon(QIcon('app_icon.ico'))
         
-        # 设置现代化样式
-        self.setStyleSheet("""
-            QMainWindow {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                    stop:0 #f8f9fa, stop:1 #e9ecef);
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #dee2e6;
-                border-radius: 12px;
-                margin-top: 15px;
-                padding-top: 15px;
-                background: white;
-                font-size: 14px;
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 15px;
-                padding: 0 8px 0 8px;
-                color: #495057;
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QLabel {
-                color: #495057;
-                font-size: 13px;
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QLineEdit, QComboBox {
-                padding: 12px 18px;
-                border: 2px solid #dee2e6;
-                border-radius: 8px;
-                font-size: 13px;
-                background: white;
-                min-height: 25px;
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QLineEdit:focus, QComboBox:focus {
-                border-color: #667eea;
-                background: #f8f9ff;
-            }
-            QTextEdit {
-                border: 2px solid #dee2e6;
-                border-radius: 8px;
-                background: white;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-                font-size: 12px;
-                padding: 12px;
-            }
-            QProgressBar {
-                border: 2px solid #dee2e6;
-                border-radius: 8px;
-                text-align: center;
-                background: #f8f9fa;
-                font-weight: bold;
-                min-height: 30px;
-                font-family: 'Microsoft YaHei', 'Segoe UI', sans-serif;
-            }
-            QProgressBar::chunk {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #667eea, stop:1 #764ba2);
-                border-radius: 6px;
-            }
-        """)
+        # 设置现代化样式（按当前窗口宽度选择字号档位）
+        self.current_font_size = font_bucket(self.width())
+        self.setStyleSheet(main_stylesheet(self.current_font_size))
         
         # 创建中央组件
         central_widget = QWidget()
@@ -359,7 +387,7 @@ class HTMLMergeTool(QMainWindow):
         self.select_button.clicked.connect(self.select_folder)
         self.drag_drop_widget.layout.addWidget(self.select_button)
         
-        self.drag_drop_widget.file_dropped.connect(self.on_folder_dropped)
+        self.drag_drop_widget.folders_dropped.connect(self.on_folders_dropped)
         folder_layout.addWidget(self.drag_drop_widget)
         
         # 选中的文件夹显示
@@ -399,6 +427,22 @@ class HTMLMergeTool(QMainWindow):
         self.output_dir_button.clicked.connect(self.select_output_dir)
         settings_layout.addWidget(self.output_dir_button, 1, 2)
         
+        # 图片懒加载
+        self.lazy_images_check = QCheckBox("图片懒加载（大量图片时加快打开速度）")
+        settings_layout.addWidget(self.lazy_images_check, 2, 0, 1, 3)
+        
+        # 远程资源
+        self.fetch_remote_check = QCheckBox("下载并内联远程资源（CDN上的CSS、字体、图片等）")
+        settings_layout.addWidget(self.fetch_remote_check, 3, 0, 1, 3)
+        
+        # 并行任务数
+        settings_layout.addWidget(QLabel("并行任务数:"), 4, 0)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spin.setValue(self.job_queue.pool.maxThreadCount())
+        self.workers_spin.valueChanged.connect(self.job_queue.set_max_workers)
+        settings_layout.addWidget(self.workers_spin, 4, 1)
+        
         main_layout.addWidget(settings_group)
         
         # 操作按钮
@@ -415,9 +459,19 @@ class HTMLMergeTool(QMainWindow):
         self.batch_button.clicked.connect(self.start_batch_conversion)
         self.batch_button.setEnabled(False)
         
+        self.pause_button = ModernButton("⏸ 暂停", "#ffc107", size="medium")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setEnabled(False)
+        
+        self.cancel_button = ModernButton("⏹ 取消", "#dc3545", size="medium")
+        self.cancel_button.clicked.connect(self.cancel_conversion)
+        self.cancel_button.setEnabled(False)
+        
         button_layout.addWidget(self.convert_button)
         button_layout.addWidget(self.batch_button)
         button_layout.addStretch()
+        button_layout.addWidget(self.pause_button)
+        button_layout.addWidget(self.cancel_button)
         
         main_layout.addWidget(button_frame)
         
@@ -426,14 +480,30 @@ class HTMLMergeTool(QMainWindow):
         self.progress_bar.setVisible(False)
         main_layout.addWidget(self.progress_bar)
         
+        # 任务队列
+        jobs_group = QGroupBox("任务队列")
+        jobs_layout = QVBoxLayout(jobs_group)
+        
+        self.job_table = QTableWidget(0, 4)
+        self.job_table.setHorizontalHeaderLabels(["文件夹", "状态", "输入 / 输出", "耗时"])
+        self.job_table.horizontalHeader().setSectionResizeMode(JOB_COLUMN_FOLDER, QHeaderView.Stretch)
+        for column in (JOB_COLUMN_STATUS, JOB_COLUMN_BYTES, JOB_COLUMN_ELAPSED):
+            self.job_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.job_table.verticalHeader().setVisible(False)
+        self.job_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.job_table.setMinimumHeight(180)
+        jobs_layout.addWidget(self.job_table)
+        
+        main_layout.addWidget(jobs_group)
+        
         # 日志区域
         log_group = QGroupBox("转换日志")
         log_layout = QVBoxLayout(log_group)
         
-        self.log_text = QTextEdit()
-        self.log_text.setMaximumHeight(220)
-        self.log_text.setReadOnly(True)
-        log_layout.addWidget(self.log_text)
+        self.log_pane = LogPane()
+        self.log_pane.text.setMaximumHeight(220)
+        log_layout.addWidget(self.log_pane)
         
         main_layout.addWidget(log_group)
         
@@ -456,14 +526,21 @@ class HTMLMergeTool(QMainWindow):
         if folder:
             self.output_dir_edit.setText(folder)
             
-    def on_folder_dropped(self, folder_path):
+    def on_folders_dropped(self, folders):
         """处理文件夹拖拽"""
-        self.set_selected_folder(folder_path)
+        self.set_selected_folders(folders)
         
     def set_selected_folder(self, folder_path):
         """设置选中的文件夹"""
-        self.selected_folder = folder_path
-        self.folder_label.setText(f"✅ 已选择: {os.path.basename(folder_path)}")
+        self.set_selected_folders([folder_path])
+        
+    def set_selected_folders(self, folders):
+        """设置选中的文件夹列表"""
+        self.selected_folders = list(folders)
+        if len(folders) == 1:
+            self.folder_label.setText(f"✅ 已选择: {os.path.basename(folders[0])}")
+        else:
+            self.folder_label.setText(f"✅ 已选择 {len(folders)} 个文件夹")
         self.folder_label.setStyleSheet("""
             padding: 18px;
             background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
@@ -476,96 +553,194 @@ class HTMLMergeTool(QMainWindow):
         """)
         self.convert_button.setEnabled(True)
         self.batch_button.setEnabled(True)
-        self.log_message(f"已选择文件夹: {folder_path}")
+        for folder_path in folders:
+            self.log_message(f"已选择文件夹: {folder_path}")
         
     def start_conversion(self):
-        """开始转换"""
-        if not self.selected_folder:
+        """开始转换：每个选中的文件夹作为一个任务"""
+        if not self.selected_folders:
             QMessageBox.warning(self, "警告", "请先选择文件夹")
             return
             
-        self.start_conversion_worker(False)
+        self.enqueue_folders(self.selected_folders, "转换")
         
     def start_batch_conversion(self):
-        """开始批量转换"""
-        if not self.selected_folder:
+        """开始批量转换：展开每个选中文件夹的子文件夹，每个子文件夹作为一个任务"""
+        if not self.selected_folders:
             QMessageBox.warning(self, "警告", "请先选择文件夹")
-        return
+            return
             
-        self.start_conversion_worker(True)
+        folders = []
+        for folder_path in self.selected_folders:
+            folders.extend(list_batch_items(folder_path))
+        self.enqueue_folders(folders, "批量转换")
         
-    def start_conversion_worker(self, is_batch):
-        """启动转换工作线程"""
+    def enqueue_folders(self, folders, operation):
+        """把文件夹加入转换队列"""
         output_format = 'html' if self.format_combo.currentText().startswith('HTML') else 'mhtml'
         output_dir = self.output_dir_edit.text() if self.output_dir_edit.text() else None
         
-        self.conversion_worker = ConversionWorker(
-            self.selected_folder, output_format, output_dir, is_batch
-        )
-        self.conversion_worker.progress_updated.connect(self.update_progress)
-        self.conversion_worker.conversion_finished.connect(self.conversion_finished)
-        
-        # 禁用按钮
-        self.convert_button.setEnabled(False)
-        self.batch_button.setEnabled(False)
-        self.select_button.setEnabled(False)
-        
-        # 显示进度条
+        # 新一轮转换开始时清空已结束的任务
+        if not self.job_queue.is_active:
+            self.job_queue.clear_finished()
+            self.job_table.setRowCount(0)
+            self.job_rows.clear()
+            self.job_progress.clear()
+            # 本轮所有任务共享同一条流水线，结束时输出各阶段的统计
+            self.pipeline = Pipeline()
+            # 进度按估算的输入字节加权，进度条以千分比显示
+            self.progress_tracker = ProgressTracker(
+                lambda percent, event: self.progress_event.emit(event))
+            self.progress_bar.setMaximum(1000)
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("%p%")
+        
+        options = ConversionOptions(lazy_images=self.lazy_images_check.isChecked(),
+                                    fetch_remote=self.fetch_remote_check.isChecked(),
+                                    remote_fetcher=self.shared_remote_fetcher(),
+                                    module_cache=self.shared_module_cache(),
+                                    inline_modules=True,
+                                    inline_embeds=True,
+                                    responsive_images=True,
+                                    splice_output=True,
+                                    pipeline=self.pipeline)
+        
+        self.log_message(f"开始{operation}，共 {len(folders)} 个任务...")
+        from batch_scheduler import estimate_folder_cost
+        estimates = {folder: estimate_folder_cost(folder) for folder in folders}
+        # 按估算大小从大到小入队，避免大文件夹排在最后拖长总耗时
+        folders = sorted(folders, key=lambda folder: estimates[folder].estimated_memory, reverse=True)
+        for folder_path in folders:
+            handle = self.progress_tracker.add_item(folder_path, estimates[folder_path].input_bytes)
+            job_id = self.job_queue.add(folder_path, output_format, output_dir,
+                                        dataclasses.replace(options, progress=handle))
+            self.job_progress[job_id] = handle
+        
+        # 更新按钮状态
+        self.pause_button.setEnabled(True)
+        self.cancel_button.setEnabled(True)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        
-        # 记录日志
-        operation = "批量转换" if is_batch else "转换"
-        self.log_message(f"开始{operation}...")
-        
-        # 启动线程
-        self.conversion_worker.start()
-        
-    def update_progress(self, value):
-        """更新进度条"""
-        self.progress_bar.setValue(value)
-        
-    def conversion_finished(self, success, title, message):
-        """转换完成处理"""
-        # 恢复按钮状态
-        self.convert_button.setEnabled(True)
-        self.batch_button.setEnabled(True)
-        self.select_button.setEnabled(True)
-        
-        # 隐藏进度条
+        self.elapsed_timer.start()
+        
+    def shared_module_cache(self):
+        """返回所有任务共享的JS模块缓存，相同内容的模块只解析和编码一次"""
+        if self.module_cache is None:
+            from module_graph import ModuleCache
+            self.module_cache = ModuleCache()
+        return self.module_cache
+        
+    def shared_remote_fetcher(self):
+        """返回所有任务共享的远程资源下载器，未启用远程资源时返回None"""
+        if not self.fetch_remote_check.isChecked():
+            return None
+        if self.remote_fetcher is None:
+            from remote_fetcher import RemoteFetcher, default_cache_dir
+            self.remote_fetcher = RemoteFetcher(cache_dir=default_cache_dir())
+        return self.remote_fetcher
+        
+    def toggle_pause(self):
+        """暂停或继续队列"""
+        if self.job_queue.paused:
+            self.job_queue.resume()
+            self.pause_button.setText("⏸ 暂停")
+            self.log_message("已继续转换")
+        else:
+            self.job_queue.pause()
+            self.pause_button.setText("▶ 继续")
+            self.log_message("已暂停转换，运行中的任务将在当前资源处理完后暂停")
+        
+    def cancel_conversion(self):
+        """取消全部未完成的任务"""
+        self.job_queue.cancel_all()
+        self.pause_button.setText("⏸ 暂停")
+        self.cancel_button.setEnabled(False)
+        self.log_message("正在取消全部任务...")
+        
+    def on_job_added(self, job_id, folder_path):
+        """任务加入队列时添加表格行"""
+        row = self.job_table.rowCount()
+        self.job_table.insertRow(row)
+        self.job_rows[job_id] = row
+        self.job_table.setItem(row, JOB_COLUMN_FOLDER, QTableWidgetItem(folder_path))
+        self.job_table.setItem(row, JOB_COLUMN_STATUS, QTableWidgetItem(JOB_QUEUED))
+        self.job_table.setItem(row, JOB_COLUMN_BYTES, QTableWidgetItem("-"))
+        self.job_table.setItem(row, JOB_COLUMN_ELAPSED, QTableWidgetItem("-"))
+        
+    def on_job_started(self, job_id):
+        """任务开始时更新状态"""
+        self.job_table.item(self.job_rows[job_id], JOB_COLUMN_STATUS).setText(JOB_RUNNING)
+        
+    def on_job_finished(self, job_id, result):
+        """任务结束时更新表格行、进度条和日志"""
+        job = self.job_queue.jobs[job_id]
+        row = self.job_rows[job_id]
+        self.job_table.item(row, JOB_COLUMN_STATUS).setText(job.status)
+        self.job_table.item(row, JOB_COLUMN_ELAPSED).setText(f"{job.elapsed:.1f} 秒")
+        if result.success:
+            self.job_table.item(row, JOB_COLUMN_BYTES).setText(
+                f"{format_bytes(result.bytes_in)} / {format_bytes(result.output_size)}")
+            self.log_message(f"✅ {result.output_file}")
+        elif not result.cancelled:
+            self.log_message(f"❌ {result.folder_path}: {result.error}")
+        handle = self.job_progress.pop(job_id, None)
+        if handle is not None:
+            handle.finish()
+        
+    def on_progress(self, event):
+        """按字节计算的进度事件：刷新进度条和吞吐量、预计剩余时间"""
+        self.progress_bar.setValue(int(event.fraction * 1000))
+        self.progress_bar.setFormat(event.describe())
+        
+    def refresh_running_jobs(self):
+        """刷新运行中任务的耗时"""
+        for job_id, job in self.job_queue.jobs.items():
+            if job.status == JOB_RUNNING:
+                self.job_table.item(self.job_rows[job_id], JOB_COLUMN_ELAPSED).setText(
+                    f"{job.elapsed:.1f} 秒")
+        
+    def on_queue_finished(self):
+        """队列全部完成处理"""
+        self.elapsed_timer.stop()
+        self.pause_button.setEnabled(False)
+        self.pause_button.setText("⏸ 暂停")
+        self.cancel_button.setEnabled(False)
         self.progress_bar.setVisible(False)
         
-        # 记录日志
-        if success:
-            self.log_message(f"✅ {title}: {message}")
-            QMessageBox.information(self, "成功", f"{title}\n{message}")
+        jobs = list(self.job_queue.jobs.values())
+        done = sum(1 for job in jobs if job.status == JOB_DONE)
+        failed = len(jobs) - done
+        summary = f"成功 {done} 个，未完成 {failed} 个"
+        self.log_message(f"转换队列已结束: {summary}")
+        stages = self.pipeline.metrics.describe() if self.pipeline is not None else ''
+        if stages:
+            self.log_message(f"各阶段耗时: {stages}")
+        if failed:
+            QMessageBox.warning(self, "转换结束", summary)
         else:
-            self.log_message(f"❌ {title}: {message}")
-            QMessageBox.critical(self, "错误", f"{title}\n{message}")
+            QMessageBox.information(self, "成功", f"转换完成\n{summary}")
             
+    def closeEvent(self, event):
+        """关闭窗口时取消未完成的任务"""
+        if self.job_queue.is_active:
+            self.job_queue.cancel_all()
+            self.job_queue.pool.waitForDone(5000)
+        if self.remote_fetcher is not None:
+            self.remote_fetcher.close()
+        self.log_pane.close_handlers()
+        super().closeEvent(event)
+        
     def log_message(self, message):
-        """添加日志消息"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {message}")
-        self.log_text.ensureCursorVisible()
+        """添加日志消息（与转换器日志一起经日志面板批量显示）"""
+        logger.info(message)
         
     def resizeEvent(self, event):
         """窗口大小改变事件"""
         super().resizeEvent(event)
-        # 根据窗口大小调整字体
-        width = self.width()
-        if width < 900:
-            font_size = "12px"
-        elif width < 1200:
-            font_size = "13px"
-        else:
-            font_size = "14px"
-        
-        # 更新样式
-        self.setStyleSheet(self.styleSheet().replace(
-            "font-size: 13px;", f"font-size: {font_size};"
-        ))
+        # 根据窗口大小调整字体，只有字号档位变化时才重新应用样式表
+        bucket = font_bucket(self.width())
+        if bucket != self.current_font_size:
+            self.current_font_size = bucket
+            self.setStyleSheet(main_stylesheet(bucket))
 
 def main():
     """主函数"""
@@ -29,6 +29,19 @@ a = Analysis(
         'PyQt5.QtWidgets',
         'PyQt5.sip',
         'pkg_resources',
+        'remote_fetcher',
+        'batch_scheduler',
+        'output_dedup',
+        'module_graph',
+        'output_analyzer',
+        'embedded_documents',
+        'font_subsetter',
+        'css_pruner',
+        'progress_tracker',
+        'responsive_images',
+        'output_splicer',
+        'conversion_pipeline',
+        'output_container',
     ],
     # 自定义钩子文件的路径列表
     hookspath=[],
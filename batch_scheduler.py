@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 批量转换调度模块
+
+此模块为并行批量转换提供按大小调度和内存准入控制：
+- 通过扫描主HTML文件中引用的本地资源大小，低成本地估算每个任务的输出大小和峰值内存
+- 按估算成本从大到小启动任务（最长处理时间优先），避免大任务排在最后拖长总耗时
+- 只有在进行中任务的估算内存总和不超过预算时才启动新任务；
+  排在前面的大任务放不下时，允许后面能放下的小任务先行填补空闲线程，
+  但被越过的次数达到上限后不再填补，等进行中的任务结束后优先启动该任务，避免大任务一直等待
+- 记录每次调度决策以及每个任务的估算值与实际值，便于调整内存预算
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from html_converter import IMG_PATTERN, CSS_PATTERN, JS_PATTERN, find_main_html
+from conversion_result import ConversionResult
+
+logger = logging.getLogger(__name__)
+
+# 峰值内存相对输出大小的系数：转换过程中同时存在原始文档字符串、替换后的新字符串
+# 以及正在编码的资源字节
+MEMORY_FACTOR = 3
+
+# 暂缓的任务最多被后面的任务越过的次数，达到后停止填补，等待内存释放后启动它
+MAX_BYPASS = 4
+
+# 暂停期间收集已完成任务的轮询间隔（秒）
+PAUSE_POLL_INTERVAL = 0.2
+
+
+@dataclass
+class JobEstimate:
+    """
+    单个文件夹的转换成本估算
+
+    Attributes:
+        folder_path (str): 文件夹路径
+        html_bytes (int): 主HTML文件大小
+        asset_bytes (dict): 按资源类型统计的引用资源字节数（重复引用按次数累计）
+        asset_count (int): 引用的本地资源数量
+        estimated_output (int): 估算的输出文件大小
+        estimated_memory (int): 估算的峰值内存
+    """
+    folder_path: str
+    html_bytes: int = 0
+    asset_bytes: Dict[str, int] = field(default_factory=dict)
+    asset_count: int = 0
+    estimated_output: int = 0
+    estimated_memory: int = 0
+
+    @property
+    def input_bytes(self):
+        """主HTML文件和引用资源的原始字节数之和，用于按字节计算批量进度"""
+        return self.html_bytes + sum(self.asset_bytes.values())
+
+
+def estimate_folder_cost(folder_path):
+    """
+    估算转换一个文件夹的成本
+
+    只读取主HTML文件并对引用的本地资源执行stat，不读取资源内容。
+    图片按base64编码后的大小计算，CSS和JS按原始大小计算。
+
+    Args:
+        folder_path (str): 文件夹路径
+
+    Returns:
+        JobEstimate: 成本估算
+    """
+    estimate = JobEstimate(folder_path)
+    main_html = find_main_html(folder_path)
+    if not main_html:
+        return estimate
+    try:
+        estimate.html_bytes = os.path.getsize(main_html)
+        with open(main_html, 'r', encoding='utf-8', errors='ignore') as f:
+            html_content = f.read()
+    except OSError:
+        return estimate
+
+    sizes = {}
+    for kind, pattern in (('image', IMG_PATTERN), ('css', CSS_PATTERN), ('js', JS_PATTERN)):
+        total = 0
+        for match in pattern.finditer(html_content):
+            ref = match.group(1)
+            if ref.startswith(('http://', 'https://', 'data:')):
+                continue
+            path = os.path.normpath(os.path.join(folder_path, ref))
+            if path not in sizes:
+                try:
+                    sizes[path] = os.path.getsize(path)
+                except OSError:
+                    sizes[path] = 0
+            total += sizes[path]
+            estimate.asset_count += 1
+        estimate.asset_bytes[kind] = total
+
+    image_bytes = estimate.asset_bytes['image']
+    estimate.estimated_output = (estimate.html_bytes + (image_bytes + 2) // 3 * 4
+                                 + estimate.asset_bytes['css'] + estimate.asset_bytes['js'])
+    estimate.estimated_memory = estimate.estimated_output * MEMORY_FACTOR
+    return estimate
+
+
+@dataclass
+class ScheduleDecision:
+    """
+    一次调度决策
+
+    Attributes:
+        elapsed (float): 相对调度开始的时间（秒）
+        action (str): start（启动）、defer（内存预算不足，暂缓）、reserve（暂缓的任务被越过的次数
+            达到上限，停止启动其他任务）、finish（完成）或cancel（取消）
+        folder_path (str): 任务文件夹
+        estimated_memory (int): 任务的估算内存
+        in_flight_memory (int): 决策后进行中任务的估算内存总和
+        running (int): 决策后进行中的任务数
+    """
+    elapsed: float
+    action: str
+    folder_path: str
+    estimated_memory: int
+    in_flight_memory: int
+    running: int
+
+
+@dataclass
+class JobReport:
+    """
+    单个任务的估算值与实际值
+
+    Attributes:
+        folder_path (str): 任务文件夹
+        estimated_output (int): 估算的输出大小
+        estimated_memory (int): 估算的峰值内存
+        actual_output (int): 实际输出大小
+        started_at (float): 启动时间（相对调度开始，秒）
+        elapsed (float): 实际耗时（秒）
+        success (bool): 是否转换成功
+    """
+    folder_path: str
+    estimated_output: int
+    estimated_memory: int
+    actual_output: int = 0
+    started_at: float = 0.0
+    elapsed: float = 0.0
+    success: bool = False
+
+    @property
+    def output_ratio(self):
+        """实际输出与估算输出之比，估算为0时返回None"""
+        if not self.estimated_output:
+            return None
+        return self.actual_output / self.estimated_output
+
+
+@dataclass
+class ScheduleReport:
+    """
+    批量调度报告
+
+    Attributes:
+        max_workers (int): 最大并行任务数
+        memory_budget (int or None): 内存预算（字节）
+        decisions (list): 按时间顺序排列的ScheduleDecision
+        jobs (list): 每个任务的JobReport
+        peak_in_flight_memory (int): 进行中任务估算内存总和的峰值
+        makespan (float): 从第一个任务启动到最后一个任务结束的总耗时（秒）
+    """
+    max_workers: int
+    memory_budget: Optional[int]
+    decisions: List[ScheduleDecision] = field(default_factory=list)
+    jobs: List[JobReport] = field(default_factory=list)
+    peak_in_flight_memory: int = 0
+    makespan: float = 0.0
+
+    def to_dict(self):
+        """转换为可序列化为JSON的字典"""
+        data = asdict(self)
+        for job, job_data in zip(self.jobs, data['jobs']):
+            job_data['output_ratio'] = job.output_ratio
+        return data
+
+    def write_json(self, path):
+        """把报告写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+class BatchScheduler:
+    """
+    按大小排序并带内存准入控制的批量调度器
+
+    Args:
+        max_workers (int, optional): 最大并行任务数，默认为2
+        memory_budget (int, optional): 进行中任务估算内存总和的上限（字节），默认为None（不限制）。
+            单个任务的估算超过预算时，只在没有其他任务运行时启动
+        max_bypass (int, optional): 暂缓的任务最多被后面的任务越过的次数，默认为MAX_BYPASS
+    """
+
+    def __init__(self, max_workers=2, memory_budget=None, max_bypass=MAX_BYPASS):
+        self.max_workers = max(1, max_workers)
+        self.memory_budget = memory_budget
+        self.max_bypass = max(0, max_bypass)
+
+    def plan(self, folders):
+        """
+        估算每个文件夹的成本，并按估算成本从大到小排序
+
+        Args:
+            folders (list): 文件夹路径列表
+
+        Returns:
+            list: 排序后的JobEstimate列表
+        """
+        estimates = [estimate_folder_cost(folder) for folder in folders]
+        estimates.sort(key=lambda e: e.estimated_memory, reverse=True)
+        return estimates
+
+    def run(self, estimates, convert, on_done=None, control=None):
+        """
+        按计划执行任务
+
+        Args:
+            estimates (list): plan()返回的JobEstimate列表
+            convert (callable): 转换函数，接受文件夹路径，返回ConversionResult
+            on_done (callable, optional): 每个任务结束时在调度线程中调用，参数为ConversionResult
+            control (JobControl, optional): 任务控制对象；暂停时不再启动新任务，
+                但继续收集已完成的任务，取消时未启动的任务记为已取消
+
+        Returns:
+            ScheduleReport: 调度报告
+        """
+        report = ScheduleReport(self.max_workers, self.memory_budget)
+        started = time.perf_counter()
+        pending = list(estimates)
+        deferred = set()
+        bypassed = {}
+        reserved = set()
+        in_flight = {}
+        in_flight_memory = 0
+
+        def decide(action, estimate):
+            report.decisions.append(ScheduleDecision(
+                time.perf_counter() - started, action, estimate.folder_path,
+                estimate.estimated_memory, in_flight_memory, len(in_flight)))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='batch') as executor:
+            while pending or in_flight:
+                if control is not None and pending and control.cancelled:
+                    for estimate in pending:
+                        decide('cancel', estimate)
+                        if on_done:
+                            on_done(ConversionResult(folder_path=estimate.folder_path,
+                                                     error="转换已取消", cancelled=True))
+                    pending = []
+                # 暂停只阻止启动新任务，已完成的任务照常收集
+                paused = control is not None and bool(pending) and control.paused
+
+                # 按顺序启动放得下的任务
+                index = 0
+                while (not paused and pending and len(in_flight) < self.max_workers
+                       and index < len(pending)):
+                    estimate = pending[index]
+                    fits = (self.memory_budget is None or not in_flight
+                            or in_flight_memory + estimate.estimated_memory <= self.memory_budget)
+                    if not fits:
+                        if estimate.folder_path not in deferred:
+                            deferred.add(estimate.folder_path)
+                            decide('defer', estimate)
+                        if bypassed.get(estimate.folder_path, 0) >= self.max_bypass:
+                            # 不再让后面的任务越过它，等进行中的任务释放内存
+                            if estimate.folder_path not in reserved:
+                                reserved.add(estimate.folder_path)
+                                decide('reserve', estimate)
+                            break
+                        index += 1
+                        continue
+                    pending.pop(index)
+                    for waiting in pending[:index]:
+                        bypassed[waiting.folder_path] = bypassed.get(waiting.folder_path, 0) + 1
+                    job = JobReport(estimate.folder_path, estimate.estimated_output,
+                                    estimate.estimated_memory,
+                                    started_at=time.perf_counter() - started)
+                    future = executor.submit(self._timed, convert, estimate.folder_path)
+                    in_flight[future] = (estimate, job)
+                    in_flight_memory += estimate.estimated_memory
+                    report.peak_in_flight_memory = max(report.peak_in_flight_memory,
+                                                       in_flight_memory)
+                    decide('start', estimate)
+
+                if not in_flight:
+                    if paused:
+                        time.sleep(PAUSE_POLL_INTERVAL)
+                    continue
+                # 暂停时分段等待，以便继续或取消后及时恢复调度
+                done, _ = wait(list(in_flight), timeout=PAUSE_POLL_INTERVAL if paused else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    estimate, job = in_flight.pop(future)
+                    in_flight_memory -= estimate.estimated_memory
+                    result, job.elapsed = future.result()
+                    job.actual_output = result.output_size
+                    job.success = result.success
+                    report.jobs.append(job)
+                    decide('finish', estimate)
+                    if on_done:
+                        on_done(result)
+
+        report.makespan = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _timed(convert, folder_path):
+        started = time.perf_counter()
+        try:
+            result = convert(folder_path)
+        except Exception as e:
+            result = ConversionResult(folder_path=folder_path, error=str(e))
+        return result, time.perf_counter() - started
+
+
+def log_schedule_report(report):
+    """把调度报告的摘要写入日志"""
+    budget = f"{report.memory_budget / 1024 / 1024:.0f} MB" if report.memory_budget else "不限"
+    logger.info(f"调度摘要: 并行 {report.max_workers}，内存预算 {budget}，"
+                f"估算内存峰值 {report.peak_in_flight_memory / 1024 / 1024:.1f} MB，"
+                f"总耗时 {report.makespan:.1f} 秒，"
+                f"暂缓 {sum(1 for d in report.decisions if d.action == 'defer')} 次")
+    for job in report.jobs:
+        ratio = f"{job.output_ratio:.2f}" if job.output_ratio is not None else "-"
+        logger.debug(f"任务 {job.folder_path}: 估算输出 {job.estimated_output} 字节，"
+                     f"实际输出 {job.actual_output} 字节（比值 {ratio}），耗时 {job.elapsed:.2f} 秒")
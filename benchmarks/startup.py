@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 启动时间基准测试
+
+在独立的子进程中测量以下场景的耗时（取多次运行的中位数）：
+- cli_help: 命令行入口解析参数后退出
+- cli_import: 导入转换器模块
+- cli_first_conversion: 命令行入口完成第一次转换
+- gui_import: 导入GUI模块（需要安装PyQt5）
+也可以通过--exe测量打包后的可执行文件。
+
+用法:
+    python benchmarks/startup.py [--runs 5] [--exe dist/html_merge_cli/html_merge_cli]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_site(root):
+    """生成一个小型测试文件夹"""
+    site = os.path.join(root, 'startup_site')
+    os.makedirs(site, exist_ok=True)
+    with open(os.path.join(site, 'style.css'), 'w', encoding='utf-8') as f:
+        f.write('body { color: #333; }')
+    with open(os.path.join(site, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<html><head><link rel="stylesheet" href="style.css"></head>'
+                '<body><p>startup</p></body></html>')
+    return site
+
+
+def time_command(command, runs):
+    """运行命令若干次，返回耗时中位数（毫秒）；命令失败时返回None"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        if completed.returncode != 0:
+            return None
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量命令行和GUI的启动时间')
+    parser.add_argument('--runs', type=int, default=5, help='每个场景的运行次数，默认为5')
+    parser.add_argument('--exe', help='额外测量的命令行可执行文件路径')
+    args = parser.parse_args()
+
+    python = sys.executable
+    with tempfile.TemporaryDirectory() as root:
+        site = make_site(root)
+        out = os.path.join(root, 'out')
+        scenarios = [
+            ('python_baseline', [python, '-c', 'pass']),
+            ('cli_help', [python, 'cli.py', '--help']),
+            ('cli_import', [python, '-c', 'import html_converter']),
+            ('cli_first_conversion', [python, 'cli.py', site, '-o', out, '-q']),
+            ('gui_import', [python, '-c', 'import app']),
+        ]
+        if args.exe:
+            scenarios.append(('exe_help', [args.exe, '--help']))
+            scenarios.append(('exe_first_conversion', [args.exe, site, '-o', out, '-q']))
+
+        for name, command in scenarios:
+            elapsed = time_command(command, args.runs)
+            if elapsed is None:
+                print(f"{name}: 跳过（命令执行失败）")
+            else:
+                print(f"{name}: {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
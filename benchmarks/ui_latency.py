@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 界面响应性基准测试
+
+测量主窗口在两种场景下的事件循环延迟：
+- 连续调整窗口大小（覆盖所有字号档位）
+- 后台转换任务运行期间
+
+事件循环延迟通过一个高频QTimer测量：定时器实际触发间隔超出预期间隔的部分即为延迟。
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/ui_latency.py [--max-latency-ms 50]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import QTimer, QEventLoop
+
+import app as gui
+
+
+class LatencyProbe:
+    """
+    事件循环延迟探针
+
+    Args:
+        interval (int, optional): 定时器间隔（毫秒），默认为5
+    """
+
+    def __init__(self, interval=5):
+        self.interval = interval
+        self.samples = []
+        self._last = None
+        self.timer = QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.samples.append(max(0.0, (now - self._last) * 1000 - self.interval))
+        self._last = now
+
+    def start(self):
+        self.samples = []
+        self._last = None
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        return summarize(self.samples)
+
+
+def summarize(samples):
+    """返回延迟样本（毫秒）的统计信息"""
+    if not samples:
+        return {'count': 0, 'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+def make_site(root, images=300, image_size=64 * 1024):
+    """生成一个包含大量图片的测试文件夹"""
+    site = os.path.join(root, 'bench_site')
+    os.makedirs(os.path.join(site, 'img'), exist_ok=True)
+    tags = []
+    for i in range(images):
+        with open(os.path.join(site, 'img', f'{i}.png'), 'wb') as f:
+            f.write(os.urandom(image_size))
+        tags.append(f'<img src="img/{i}.png">')
+    with open(os.path.join(site, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f"<html><body>{''.join(tags)}</body></html>")
+    return site
+
+
+def measure_resize(app, window, rounds=5):
+    """在字号档位之间来回调整窗口大小，返回探针统计和单次调整耗时"""
+    probe = LatencyProbe()
+    probe.start()
+    step_times = []
+    for _ in range(rounds):
+        for width in list(range(860, 1400, 10)) + list(range(1400, 860, -10)):
+            started = time.perf_counter()
+            window.resize(width, 750)
+            app.processEvents()
+            step_times.append((time.perf_counter() - started) * 1000)
+    stats = probe.stop()
+    stats['resize_mean'] = statistics.fmean(step_times)
+    stats['resize_max'] = max(step_times)
+    return stats
+
+
+def measure_conversion(app, window, folder):
+    """在后台转换任务运行期间测量事件循环延迟"""
+    loop = QEventLoop()
+    window.job_queue.queue_finished.connect(loop.quit)
+    probe = LatencyProbe()
+    probe.start()
+    started = time.perf_counter()
+    window.set_selected_folders([folder])
+    window.start_conversion()
+    loop.exec_()
+    stats = probe.stop()
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def print_stats(name, stats):
+    extra = ' '.join(f"{key}={value:.2f}" for key, value in stats.items()
+                     if key not in ('count', 'mean', 'p95', 'max'))
+    print(f"{name}: samples={stats['count']} mean={stats['mean']:.2f}ms "
+          f"p95={stats['p95']:.2f}ms max={stats['max']:.2f}ms {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量GUI事件循环延迟')
+    parser.add_argument('--images', type=int, default=300, help='转换场景的图片数量，默认为300')
+    parser.add_argument('--max-latency-ms', type=float, default=None,
+                        help='p95延迟上限（毫秒），超过时以非零状态退出')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    # 基准测试中不弹出模态对话框
+    QMessageBox.information = lambda *a, **k: None
+    QMessageBox.warning = lambda *a, **k: None
+    window = gui.HTMLMergeTool()
+    window.show()
+    app.processEvents()
+
+    with tempfile.TemporaryDirectory() as root:
+        resize = measure_resize(app, window)
+        print_stats('resize', resize)
+        site = make_site(root, images=args.images)
+        window.output_dir_edit.setText(os.path.join(root, 'out'))
+        conversion = measure_conversion(app, window, site)
+        print_stats('conversion', conversion)
+
+    window.close()
+    if args.max_latency_ms is not None:
+        worst = max(resize['p95'], conversion['p95'])
+        if worst > args.max_latency_ms:
+            print(f"p95延迟 {worst:.2f}ms 超过上限 {args.max_latency_ms}ms")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 命令行入口
+
+无界面的命令行入口，供脚本和批处理调用。
+此模块启动时只导入argparse等少量标准库模块，转换器在解析完参数后才导入，
+不会加载PyQt5、Pillow等GUI相关依赖。
+
+用法:
+    python cli.py FOLDER [-f html|mhtml] [-o OUTPUT_DIR] [-j N] [--lazy-images] [--fetch-remote] [-v]
+    python cli.py FOLDER --container OUTPUT.db
+    python cli.py list CONTAINER [--prefix PREFIX]
+    python cli.py extract CONTAINER [NAME ...] -o OUTPUT_DIR
+    python cli.py serve CONTAINER [--host HOST] [--port PORT]
+"""
+
+import os
+import sys
+import argparse
+
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='html_merge_cli',
+                                     description='将带资源的HTML文件夹转换为单个HTML或MHTML文件',
+                                     epilog='输出容器子命令: list、extract、serve（例如 python cli.py extract -h）')
+    parser.add_argument('folder', help='包含HTML文件的目录路径')
+    parser.add_argument('-f', '--format', choices=['html', 'mhtml'], default='html',
+                        help='输出文件格式，默认为html')
+    parser.add_argument('-o', '--output-dir', help='输出文件目录，默认为输入文件夹的同级目录')
+    parser.add_argument('--lazy-images', action='store_true',
+                        help='启用图片懒加载，首屏以外的图片在滚动到可视区域时才解码')
+    parser.add_argument('--lazy-eager', type=int, default=4,
+                        help='懒加载模式下直接内联的首屏图片数量，默认为4')
+    parser.add_argument('--lazy-store', choices=['template', 'script'], default='template',
+                        help='懒加载图片数据的存放方式，默认为template')
+    batch = parser.add_argument_group('批量调度')
+    batch.add_argument('-j', '--workers', type=int, default=1,
+                       help='并行转换的文件夹数量，默认为1（依次转换）；大于1时按估算大小从大到小调度')
+    batch.add_argument('--memory-budget', type=float, metavar='MB',
+                       help='并行任务的估算内存总和上限（MB），超出时暂缓启动新任务')
+    batch.add_argument('--schedule-report', metavar='FILE',
+                       help='把调度决策和每个任务的估算值与实际值写入JSON文件')
+    batch.add_argument('--dedupe', action='store_true',
+                       help='输入完全相同的文件夹只转换一次，其余输出通过reflink、硬链接或复制共享')
+    output = parser.add_argument_group('可复现输出')
+    output.add_argument('--reproducible', action='store_true',
+                        help='相同输入生成逐字节相同的输出（MHTML边界由内容生成，日期固定）')
+    output.add_argument('--source-date-epoch', type=int, metavar='SECONDS',
+                        help='可复现模式下MHTML使用的日期（Unix时间戳），'
+                             '默认取环境变量SOURCE_DATE_EPOCH或源文件的最新修改时间')
+    output.add_argument('--no-splice', action='store_true',
+                        help='不使用临时载荷文件拼接输出，所有资源的base64数据都保存在内存中')
+    container = parser.add_argument_group('容器输出')
+    container.add_argument('--container', metavar='FILE',
+                           help='把所有输出写入单个SQLite容器（按文件夹名索引，zlib压缩，相同内容只保存一份），'
+                                '不再为每个文件夹写一个文件；指定时忽略 -o')
+    container.add_argument('--container-batch', type=int, default=256, metavar='N',
+                           help='每个写入事务提交的文档数量，默认为256')
+    parser.add_argument('--no-module-graph', action='store_true',
+                        help='不内联<script type="module">引用的ES模块图')
+    analysis = parser.add_argument_group('输出分析')
+    analysis.add_argument('--report', action='store_true',
+                          help='在每个输出文件旁写入组成分析报告（.report.json）和矩形树图（.treemap.html）')
+    analysis.add_argument('--max-output', type=float, metavar='MB', help='单个输出文件的大小预算（MB）')
+    analysis.add_argument('--max-asset', type=float, metavar='MB', help='单个资源在输出中的大小预算（MB）')
+    analysis.add_argument('--max-images', type=float, metavar='MB', help='单个输出中全部图片的大小预算（MB）')
+    analysis.add_argument('--budget-action', choices=['warn', 'fail'], default='warn',
+                          help='超出预算时记录警告（warn）或将该页面记为失败（fail），默认为warn')
+    parser.add_argument('--no-embeds', action='store_true',
+                        help='不内联iframe、object和embed引用的子文档')
+    parser.add_argument('--embed-depth', type=int, default=3,
+                        help='子文档的最大嵌套层数，默认为3')
+    responsive = parser.add_argument_group('响应式图片')
+    responsive.add_argument('--no-responsive', action='store_true',
+                            help='不处理srcset和<picture>（默认只内联按目标视口选中的候选图片）')
+    responsive.add_argument('--viewport-width', type=int, default=1280, metavar='PX',
+                            help='选择候选图片时假定的视口宽度，默认为1280')
+    responsive.add_argument('--dpr', type=float, default=1.0,
+                            help='选择候选图片时假定的设备像素比，默认为1')
+    responsive.add_argument('--responsive-candidates', type=int, default=1, metavar='N',
+                            help='每张响应式图片保留的候选数量，默认为1')
+    fonts = parser.add_argument_group('字体子集化')
+    fonts.add_argument('--subset-fonts', action='store_true',
+                       help='把@font-face引用的字体裁剪为页面用到的字符后内联（需要安装fonttools和brotli）')
+    fonts.add_argument('--font-extra-chars', default='', metavar='TEXT',
+                       help='字体子集中额外保留的字符，例如脚本动态插入的文本')
+    fonts.add_argument('--font-cache', metavar='DIR', help='字体子集的磁盘缓存目录')
+    pruning = parser.add_argument_group('CSS裁剪')
+    pruning.add_argument('--prune-css', action='store_true',
+                         help='删除内联样式表中不可能匹配页面的规则、@keyframes和@font-face')
+    pruning.add_argument('--css-safelist', action='append', default=[], metavar='PATTERN',
+                         help='视为存在于页面中的class、id或标签名（支持*通配符，逗号分隔，可重复指定），'
+                              '例如脚本动态添加的class')
+    remote = parser.add_argument_group('远程资源')
+    remote.add_argument('--fetch-remote', action='store_true',
+                        help='下载并内联http://和https://引用的远程资源')
+    remote.add_argument('--http-cache', metavar='DIR',
+                        help='远程资源的磁盘HTTP缓存目录，默认为用户缓存目录下的html_merge_tool/http')
+    remote.add_argument('--no-http-cache', action='store_true', help='不使用磁盘HTTP缓存')
+    remote.add_argument('--http-connections', type=int, default=6,
+                        help='每个主机的最大并发连接数，默认为6')
+    remote.add_argument('--http-timeout', type=float, default=15,
+                        help='远程请求超时时间（秒），默认为15')
+    stages = parser.add_argument_group('处理阶段')
+    stages.add_argument('--skip-stage', action='append', default=[], metavar='NAME',
+                        help='跳过指定的处理阶段（fetch、images、css、modules、js、embeds，逗号分隔，可重复指定）')
+    stages.add_argument('--stage-metrics', metavar='FILE',
+                        help='把各处理阶段的调用次数、耗时、CPU时间和文档长度变化写入JSON文件')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-v', '--verbose', action='store_true',
+                           help='输出每个资源的处理日志')
+    verbosity.add_argument('-q', '--quiet', action='store_true',
+                           help='只输出警告和错误')
+    parser.add_argument('--progress', action='store_true',
+                        help='在标准错误输出中显示按字节计算的进度、吞吐量和预计剩余时间（建议与 -q 一起使用）')
+    return parser
+
+
+# 操作输出容器的子命令；同名的输入文件夹可以写成 ./list 等形式
+CONTAINER_COMMANDS = ('list', 'extract', 'serve')
+
+
+def build_container_parser():
+    """创建输出容器子命令的参数解析器"""
+    parser = argparse.ArgumentParser(prog='html_merge_cli', description='查看、解包或浏览输出容器')
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_parser = commands.add_parser('list', help='列出容器中的文档')
+    list_parser.add_argument('container', help='输出容器文件')
+    list_parser.add_argument('--prefix', default='', help='只列出以此开头的文档名')
+    extract = commands.add_parser('extract', help='把容器中的文档解包为文件')
+    extract.add_argument('container', help='输出容器文件')
+    extract.add_argument('names', nargs='*', metavar='NAME', help='要解包的文档名（文件夹名），默认为全部')
+    extract.add_argument('-o', '--output-dir', default='.', help='解包目录，默认为当前目录')
+    serve = commands.add_parser('serve', help='通过HTTP浏览容器中的文档')
+    serve.add_argument('container', help='输出容器文件')
+    serve.add_argument('--host', default='127.0.0.1', help='监听地址，默认为127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000, help='监听端口，默认为8000')
+    return parser
+
+
+# 本项目各模块的日志记录器名称；-v/-q只调整这些记录器，第三方库（如fontTools）保持WARNING级别
+PROJECT_LOGGERS = ('html_converter', 'conversion_pipeline', 'batch_scheduler', 'remote_fetcher', 'css_pruner',
+                   'font_subsetter', 'module_graph', 'responsive_images', 'embedded_documents', 'output_analyzer',
+                   'output_dedup', 'output_splicer', 'output_container')
+
+
+def configure_logging(level):
+    """
+    配置日志输出
+
+    根日志记录器保持WARNING级别，只把本项目的记录器设置为指定级别，
+    避免调试模式下第三方库的DEBUG日志淹没转换日志。
+
+    Args:
+        level (int): 本项目日志记录器的级别
+    """
+    import logging
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    for name in PROJECT_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+
+
+def container_main(argv):
+    """
+    输出容器子命令的主函数
+
+    Args:
+        argv (list): 以子命令开头的命令行参数列表
+
+    Returns:
+        int: 进程退出码
+    """
+    args = build_container_parser().parse_args(argv)
+    if not os.path.isfile(args.container):
+        print(f"错误：{args.container} 不是有效的文件", file=sys.stderr)
+        return 2
+
+    import logging
+    configure_logging(logging.INFO)
+    from output_container import ContainerError, OutputContainer, serve_container
+
+    try:
+        if args.command == 'serve':
+            serve_container(args.container, args.host, args.port)
+            return 0
+        with OutputContainer(args.container, readonly=True) as container:
+            if args.command == 'list':
+                for name in container.names(args.prefix):
+                    print(name)
+            else:
+                count = container.extract(args.output_dir, args.names)
+                print(f"已解包 {count} 个文档到 {args.output_dir}")
+    except ContainerError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    except KeyError as e:
+        print(f"错误：容器中没有文档 {e.args[0]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _megabytes(value):
+    """把以MB为单位的参数转换为字节数，未指定时返回None"""
+    return int(value * 1024 * 1024) if value is not None else None
+
+
+def _progress_printer(stream=sys.stderr):
+    """
+    返回在终端中刷新进度行的进度回调
+
+    输出到终端时在同一行刷新；重定向到文件时只在百分比变化时输出一行。
+    """
+    interactive = stream.isatty()
+    last_percent = None
+
+    def print_progress(percent, event):
+        nonlocal last_percent
+        line = event.describe()
+        if event.current_item:
+            line += f"，当前: {os.path.basename(os.path.normpath(event.current_item))}"
+        if interactive:
+            end = '\n' if event.done_items == event.total_items else ''
+            print(f"\r{line}\033[K", end=end, file=stream, flush=True)
+        elif percent != last_percent:
+            print(line, file=stream, flush=True)
+        last_percent = percent
+
+    return print_progress
+
+
+def main(argv=None):
+    """
+    命令行主函数
+
+    Args:
+        argv (list, optional): 命令行参数列表，默认为None（使用sys.argv）
+
+    Returns:
+        int: 进程退出码，全部转换成功时为0
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in CONTAINER_COMMANDS:
+        return container_main(argv)
+    args = build_parser().parse_args(argv)
+
+    # 验证输入目录是否有效
+    if not os.path.isdir(args.folder):
+        print(f"错误：{args.folder} 不是有效的目录", file=sys.stderr)
+        return 2
+    if args.workers < 1 or (args.memory_budget is not None and args.memory_budget <= 0):
+        print("错误：--workers 和 --memory-budget 必须为正数", file=sys.stderr)
+        return 2
+    if args.container_batch < 1:
+        print("错误：--container-batch 必须为正数", file=sys.stderr)
+        return 2
+    if args.viewport_width <= 0 or args.dpr <= 0 or args.responsive_candidates < 1:
+        print("错误：--viewport-width、--dpr 和 --responsive-candidates 必须为正数", file=sys.stderr)
+        return 2
+
+    import logging
+    if args.verbose:
+        level = logging.DEBUG
+    elif args.quiet:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    configure_logging(level)
+
+    # 参数校验通过后才导入转换器
+    from html_converter import ConversionOptions, batch_convert
+    from conversion_pipeline import Pipeline
+
+    pipeline = Pipeline()
+    for name in (n.strip() for value in args.skip_stage for n in value.split(',') if n.strip()):
+        if name not in pipeline.stage_names():
+            print(f"错误：未知的处理阶段 {name}，可选: {', '.join(pipeline.stage_names())}", file=sys.stderr)
+            return 2
+        pipeline.unregister(name)
+
+    http_cache_dir = None
+    if args.fetch_remote and not args.no_http_cache:
+        from remote_fetcher import default_cache_dir
+        http_cache_dir = args.http_cache or default_cache_dir()
+
+    options = ConversionOptions(lazy_images=args.lazy_images,
+                                lazy_eager_count=args.lazy_eager,
+                                lazy_store=args.lazy_store,
+                                fetch_remote=args.fetch_remote,
+                                http_cache_dir=http_cache_dir,
+                                http_max_per_host=args.http_connections,
+                                http_timeout=args.http_timeout,
+                                reproducible=args.reproducible or args.source_date_epoch is not None,
+                                source_date_epoch=args.source_date_epoch,
+                                dedupe_outputs=args.dedupe,
+                                splice_output=not args.no_splice,
+                                inline_modules=not args.no_module_graph,
+                                inline_embeds=not args.no_embeds,
+                                max_embed_depth=args.embed_depth,
+                                subset_fonts=args.subset_fonts,
+                                font_extra_chars=args.font_extra_chars,
+                                font_cache_dir=args.font_cache,
+                                responsive_images=not args.no_responsive,
+                                viewport_width=args.viewport_width,
+                                device_pixel_ratio=args.dpr,
+                                responsive_candidates=args.responsive_candidates,
+                                prune_css=args.prune_css,
+                                css_safelist=tuple(p.strip() for value in args.css_safelist
+                                                   for p in value.split(',') if p.strip()),
+                                pipeline=pipeline)
+    if any(v is not None for v in (args.max_output, args.max_asset, args.max_images)):
+        from output_analyzer import SizeBudget
+        options.size_budget = SizeBudget(_megabytes(args.max_output), _megabytes(args.max_asset),
+                                         _megabytes(args.max_images), args.budget_action)
+
+    if args.container:
+        from output_container import ContainerError, OutputContainer
+        try:
+            options.output_container = OutputContainer(args.container, batch_size=args.container_batch)
+        except ContainerError as e:
+            print(f"错误：{e}", file=sys.stderr)
+            return 2
+
+    memory_budget = _megabytes(args.memory_budget)
+    try:
+        batch = batch_convert(args.folder, args.format, args.output_dir,
+                              progress_callback=_progress_printer() if args.progress else None,
+                              options=options, workers=args.workers, memory_budget=memory_budget)
+    finally:
+        if options.output_container is not None:
+            options.output_container.close()
+    if args.schedule_report:
+        if batch.schedule is not None:
+            batch.schedule.write_json(args.schedule_report)
+        else:
+            print("警告：依次转换时不生成调度报告，请同时指定 --workers 或 --memory-budget",
+                  file=sys.stderr)
+    if args.stage_metrics:
+        pipeline.metrics.write_json(args.stage_metrics)
+    if args.report and args.container:
+        print("警告：容器输出不生成组成分析报告", file=sys.stderr)
+    elif args.report:
+        from output_analyzer import write_reports
+        for result in batch.results:
+            if result.output_file and result.linked_from is None:
+                write_reports(result)
+    if not args.quiet:
+        print("转换完成！")
+    return 1 if batch.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- mode: python ; coding: utf-8 -*-
+
+"""PyInstaller 配置文件 - 命令行版本
+
+此文件用于打包无界面的命令行可执行文件 html_merge_cli。
+与 app.spec 不同：
+- 入口为 cli.py，不包含 PyQt5、Pillow 等GUI依赖
+- 不使用运行时钩子，启动时直接进入命令行主函数
+- 模块打包进 PYZ 归档（noarchive=False），减少启动时的文件系统查找
+"""
+
+a = Analysis(
+    # 需要打包的主 Python 文件列表
+    ['cli.py'],
+    # 额外的搜索路径列表，用于查找模块和依赖
+    pathex=['.'],
+    binaries=[],
+    datas=[],
+    # 转换器在解析参数后才导入，需要显式声明
+    hiddenimports=[
+        'html_converter',
+        'conversion_result',
+        'remote_fetcher',
+        'batch_scheduler',
+        'output_dedup',
+        'module_graph',
+        'output_analyzer',
+        'embedded_documents',
+        'font_subsetter',
+        'css_pruner',
+        'progress_tracker',
+        'responsive_images',
+        'output_splicer',
+        'conversion_pipeline',
+        'output_container',
+    ],
+    hookspath=[],
+    # 命令行版本不需要运行时钩子
+    runtime_hooks=[],
+    hooksconfig={},
+    # 排除GUI和其他用不到的大型模块
+    excludes=[
+        'PyQt5',
+        'PIL',
+        'tkinter',
+        'matplotlib',
+        'numpy',
+        'pandas',
+        'scipy',
+        'eel',
+        'bottle',
+        'gevent',
+        'clr_loader',
+        'cffi',
+        'pythonnet',
+    ],
+    # 使用归档模式，启动时从单个PYZ文件加载模块
+    noarchive=False,
+    optimize=1,
+)
+
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='html_merge_cli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,  # 禁用UPX压缩以减少误报，同时避免启动时解压
+    console=True,  # 命令行程序需要控制台
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+# 创建目录模式的可执行文件（目录模式无需在每次启动时解压到临时目录）
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='html_merge_cli',
+)
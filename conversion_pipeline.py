@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 可插拔的转换流水线模块
+
+此模块把文档处理流程组织为按顺序执行的阶段：
+- 每个阶段是一个函数 func(html_content, context) -> str，按名称注册到Pipeline中，
+  可以在内置阶段之前或之后插入自定义阶段，也可以移除内置阶段
+- 阶段声明自身是CPU密集型（'cpu'）还是I/O密集型（'io'）：I/O阶段在批量转换的工作线程中
+  直接执行；CPU阶段需要先取得处理器数量个名额之一，并行转换时同时运行的CPU阶段不超过处理器数量
+- 每个阶段的调用次数、耗时、线程CPU时间和文档长度变化汇总到StageMetrics，
+  批量转换时所有文件夹共享同一个Pipeline，命令行和GUI都在转换结束后输出各阶段的统计
+- 子文档（见embedded_documents模块）使用同一条流水线，其耗时计入上级文档的embeds阶段，
+  不单独统计，避免重复计算
+"""
+
+import os
+import json
+import time
+import threading
+import dataclasses
+from dataclasses import dataclass
+from typing import Callable
+
+from html_converter import (_checkpoint, prefetch_assets, replace_css, replace_embeds, replace_images, replace_js,
+                            replace_modules, replace_responsive_images)
+
+# 阶段类型
+STAGE_CPU = 'cpu'
+STAGE_IO = 'io'
+STAGE_KINDS = (STAGE_CPU, STAGE_IO)
+
+
+@dataclass
+class Stage:
+    """
+    流水线中的一个阶段
+
+    Attributes:
+        name (str): 阶段名称，同时作为ConversionResult.timings中的键
+        func (callable): 处理函数 func(html_content, context) -> str
+        kind (str): 'cpu'或'io'
+        description (str): 阶段说明
+    """
+    name: str
+    func: Callable
+    kind: str = STAGE_CPU
+    description: str = ''
+
+
+@dataclass
+class StageContext:
+    """
+    传给阶段函数的文档上下文
+
+    Attributes:
+        document (str): 当前HTML文件路径
+        base_folder (str): 资源相对路径的基础文件夹
+        options (ConversionOptions or None): 转换选项
+        result (ConversionResult): 当前文档的转换结果
+        embed_stack (tuple): 上级文档的绝对路径，主文档为空
+    """
+    document: str
+    base_folder: str
+    options: object
+    result: object
+    embed_stack: tuple = ()
+
+    @property
+    def top_level(self):
+        """是否为主文档（不是嵌入的子文档）"""
+        return not self.embed_stack
+
+
+@dataclass
+class StageStats:
+    """
+    单个阶段的累计统计
+
+    Attributes:
+        name (str): 阶段名称
+        kind (str): 'cpu'或'io'
+        calls (int): 调用次数
+        seconds (float): 累计耗时（秒）
+        cpu_seconds (float): 累计线程CPU时间（秒）；明显小于耗时说明阶段主要在等待I/O
+        chars_in (int): 输入文档的累计长度（字符）
+        chars_out (int): 输出文档的累计长度（字符）
+    """
+    name: str
+    kind: str
+    calls: int = 0
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    chars_in: int = 0
+    chars_out: int = 0
+
+    def to_dict(self):
+        """返回可序列化为JSON的字典"""
+        return {'name': self.name, 'kind': self.kind, 'calls': self.calls,
+                'seconds': round(self.seconds, 6), 'cpu_seconds': round(self.cpu_seconds, 6),
+                'chars_in': self.chars_in, 'chars_out': self.chars_out}
+
+
+class StageMetrics:
+    """线程安全的各阶段统计，按阶段首次出现的顺序排列"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, kind, seconds, cpu_seconds=0.0, chars_in=0, chars_out=0):
+        """记录一次阶段执行"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StageStats(name, kind)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.cpu_seconds += cpu_seconds
+            stats.chars_in += chars_in
+            stats.chars_out += chars_out
+
+    def stats(self):
+        """返回各阶段统计的副本列表"""
+        with self._lock:
+            return [dataclasses.replace(stats) for stats in self._stats.values()]
+
+    def describe(self):
+        """返回各阶段耗时的单行说明，没有统计时返回空字符串"""
+        parts = [f"{s.name}({s.kind}) {s.seconds:.2f}秒/{s.calls}次" for s in self.stats() if s.calls]
+        return '，'.join(parts)
+
+    def write_json(self, path):
+        """把各阶段统计写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': [s.to_dict() for s in self.stats()]}, f, ensure_ascii=False, indent=2)
+
+
+def _fetch_stage(html_content, context):
+    prefetch_assets(html_content, context.base_folder, context.options)
+    return html_content
+
+
+def _images_stage(html_content, context):
+    html_content = replace_responsive_images(html_content, context.base_folder, context.options, context.result)
+    return replace_images(html_content, context.base_folder, context.options, context.result)
+
+
+def _css_stage(html_content, context):
+    return replace_css(html_content, context.base_folder, context.options, context.result)
+
+
+def _modules_stage(html_content, context):
+    return replace_modules(html_content, context.base_folder, context.options, context.result)
+
+
+def _js_stage(html_content, context):
+    return replace_js(html_content, context.base_folder, context.options, context.result)
+
+
+def _embeds_stage(html_content, context):
+    return replace_embeds(html_content, context.base_folder, context.options, context.result,
+                          context.embed_stack + (os.path.abspath(context.document),))
+
+
+def default_stages():
+    """
+    返回内置阶段列表
+
+    fetch阶段读取img、样式表和脚本引用的本地文件并等待远程资源下载完成，结果放入资源缓存；
+    之后的images、css和js阶段从缓存取得内容，主要是base64编码、样式表裁剪、字体子集化和
+    改写文档，声明为CPU阶段。modules和embeds在处理过程中才发现要读取的模块和子文档，声明为I/O阶段。
+    embeds必须是最后一个阶段，子文档内容转义后不会再被前面的替换处理。
+    """
+    return [
+        Stage('fetch', _fetch_stage, STAGE_IO, '预先读取和下载img、样式表和脚本引用的资源'),
+        Stage('images', _images_stage, STAGE_CPU, '响应式图片候选选择和<img>图片编码内联'),
+        Stage('css', _css_stage, STAGE_CPU, '样式表内联（裁剪、字体子集化和url()资源）'),
+        Stage('modules', _modules_stage, STAGE_IO, 'ES模块图内联'),
+        Stage('js', _js_stage, STAGE_CPU, '外部脚本内联'),
+        Stage('embeds', _embeds_stage, STAGE_IO, 'iframe、object和embed子文档内联'),
+    ]
+
+
+BUILTIN_STAGES = tuple(stage.name for stage in default_stages())
+
+
+class Pipeline:
+    """
+    按顺序执行的文档处理阶段
+
+    Args:
+        stages (list, optional): 阶段列表，默认为None（使用default_stages()）
+        cpu_workers (int, optional): 可同时运行的CPU阶段数量，默认为None（处理器数量）
+    """
+
+    def __init__(self, stages=None, cpu_workers=None):
+        self._lock = threading.Lock()
+        self._stages = list(stages) if stages is not None else default_stages()
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self._cpu_slots = threading.BoundedSemaphore(self.cpu_workers)
+        self._cpu_active = 0
+        self.metrics = StageMetrics()
+
+    @property
+    def cpu_active(self):
+        """当前占用CPU名额的阶段数量"""
+        with self._lock:
+            return self._cpu_active
+
+    @property
+    def stages(self):
+        """当前的阶段列表（副本）"""
+        with self._lock:
+            return list(self._stages)
+
+    def stage_names(self):
+        """返回按执行顺序排列的阶段名称"""
+        return [stage.name for stage in self.stages]
+
+    def register(self, name, func, kind=STAGE_CPU, before=None, after=None, description=''):
+        """
+        注册一个阶段；同名阶段已存在时替换它并保持原位置
+
+        Args:
+            name (str): 阶段名称
+            func (callable): 处理函数 func(html_content, context) -> str
+            kind (str, optional): 'cpu'或'io'，默认为'cpu'
+            before (str, optional): 插入到此阶段之前
+            after (str, optional): 插入到此阶段之后；before和after都未指定时追加到embeds之前
+            description (str, optional): 阶段说明
+
+        Returns:
+            Stage: 注册的阶段
+
+        Raises:
+            ValueError: kind无效、同时指定了before和after或指定的阶段不存在
+        """
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"阶段类型必须是 {STAGE_KINDS} 之一: {kind}")
+        if before is not None and after is not None:
+            raise ValueError("before和after不能同时指定")
+        stage = Stage(name, func, kind, description)
+        with self._lock:
+            names = [s.name for s in self._stages]
+            if name in names and before is None and after is None:
+                self._stages[names.index(name)] = stage
+                return stage
+            anchor = before if before is not None else after
+            if anchor is not None and (anchor not in names or anchor == name):
+                raise ValueError(f"阶段不存在: {anchor}")
+            if name in names:
+                del self._stages[names.index(name)]
+                names.remove(name)
+            if before is not None:
+                index = names.index(before)
+            elif after is not None:
+                index = names.index(after) + 1
+            else:
+                # 默认放在embeds之前，使自定义阶段的结果也进入子文档处理之前的文档
+                index = names.index('embeds') if 'embeds' in names else len(names)
+            self._stages.insert(index, stage)
+        return stage
+
+    def unregister(self, name):
+        """
+        移除一个阶段
+
+        Raises:
+            KeyError: 阶段不存在
+        """
+        with self._lock:
+            for index, stage in enumerate(self._stages):
+                if stage.name == name:
+                    del self._stages[index]
+                    return
+        raise KeyError(name)
+
+    def run(self, html_content, context):
+        """
+        依次执行各阶段
+
+        每个阶段开始前执行任务检查点；阶段耗时写入context.result.timings，
+        主文档的阶段统计同时计入metrics。
+
+        Args:
+            html_content (str): HTML内容
+            context (StageContext): 文档上下文
+
+        Returns:
+            str: 处理后的HTML内容
+
+        Raises:
+            ConversionCancelled: 转换过程中任务被取消
+        """
+        for stage in self.stages:
+            _checkpoint(context.options)
+            chars_in = len(html_content)
+            if stage.kind == STAGE_CPU:
+                # 名额只限制同时运行的CPU阶段数量，等待名额的时间不计入阶段耗时
+                with self._cpu_slots:
+                    with self._lock:
+                        self._cpu_active += 1
+                    try:
+                        html_content, seconds, cpu_seconds = self._call(stage, html_content, context)
+                    finally:
+                        with self._lock:
+                            self._cpu_active -= 1
+            else:
+                html_content, seconds, cpu_seconds = self._call(stage, html_content, context)
+            context.result.timings[stage.name] = seconds
+            if context.top_level:
+                self.metrics.record(stage.name, stage.kind, seconds, cpu_seconds,
+                                    chars_in, len(html_content))
+        return html_content
+
+    @staticmethod
+    def _call(stage, html_content, context):
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        html_content = stage.func(html_content, context)
+        return html_content, time.perf_counter() - started, time.thread_time() - cpu_started
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 转换结果模块
+
+此模块定义转换函数返回的结构化结果对象，供GUI、命令行和其他调用方直接读取，
+无需解析日志文本。
+- AssetRecord: 单个资源（图片、CSS、JS）的处理记录
+- ConversionResult: 单个文件夹的转换结果
+- BatchResult: 批量转换的汇总结果
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# 资源处理状态
+STATUS_INLINED = 'inlined'
+STATUS_MISSING = 'missing'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+
+@dataclass
+class AssetRecord:
+    """
+    单个资源的处理记录
+
+    Attributes:
+        kind (str): 资源类型，如'image'、'css'、'js'
+        reference (str): HTML中原始的引用地址
+        path (str): 解析后的本地文件路径
+        status (str): 处理状态，取值为inlined、missing、skipped或failed
+        bytes_in (int): 读取的原始字节数
+        bytes_out (int): 写入输出文档的字节数
+        encoding (str): 内联时使用的编码方式，如'base64'或'utf-8'
+        mime_type (str): 资源的MIME类型
+        error (str): 处理失败时的错误信息
+        parent (str): 包含此资源的上级资源解析后的路径或URL（例如样式表中url()引用的字体
+            对应样式表的path），顶层资源为空字符串；上级资源的bytes_out已包含此资源的bytes_out
+    """
+    kind: str
+    reference: str
+    path: str
+    status: str
+    bytes_in: int = 0
+    bytes_out: int = 0
+    encoding: str = ''
+    mime_type: str = ''
+    error: str = ''
+    parent: str = ''
+
+
+@dataclass
+class ConversionResult:
+    """
+    单个文件夹的转换结果
+
+    Attributes:
+        folder_path (str): 输入文件夹路径
+        output_format (str): 输出格式，'html'或'mhtml'
+        output_file (str or None): 输出文件路径，转换失败时为None
+        main_html (str or None): 主HTML文件路径
+        assets (list): 按处理顺序排列的AssetRecord列表
+        warnings (list): 转换过程中产生的警告信息
+        timings (dict): 各阶段耗时（秒），键为阶段名称
+        output_size (int): 输出文件大小（字节）
+        error (str or None): 导致转换失败的错误信息
+        cancelled (bool): 转换是否被取消
+        linked_from (str or None): 批量去重时共享的输出文件；不为None时本文件夹未实际转换
+        link_method (str): 共享输出的方式，'reflink'、'hardlink'、'copy'或'container'（输出容器中的索引项）
+        budget_violations (list): 超出大小预算的说明（见output_analyzer模块）
+    """
+    folder_path: str
+    output_format: str = 'html'
+    output_file: Optional[str] = None
+    main_html: Optional[str] = None
+    assets: List[AssetRecord] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    output_size: int = 0
+    error: Optional[str] = None
+    cancelled: bool = False
+    linked_from: Optional[str] = None
+    link_method: str = ''
+    budget_violations: List[str] = field(default_factory=list)
+
+    @property
+    def success(self):
+        """转换是否成功"""
+        return self.output_file is not None and self.error is None
+
+    @property
+    def elapsed(self):
+        """各阶段总耗时（秒）"""
+        return sum(self.timings.values())
+
+    @property
+    def bytes_in(self):
+        """已内联资源的原始字节总数"""
+        return sum(a.bytes_in for a in self.assets if a.status == STATUS_INLINED)
+
+    @property
+    def bytes_out(self):
+        """已内联资源写入输出文档的字节总数"""
+        return sum(a.bytes_out for a in self.assets if a.status == STATUS_INLINED)
+
+    def count(self, kind=None, status=STATUS_INLINED):
+        """
+        统计指定类型和状态的资源数量
+
+        Args:
+            kind (str, optional): 资源类型，默认为None（所有类型）
+            status (str, optional): 处理状态，默认为inlined
+
+        Returns:
+            int: 符合条件的资源数量
+        """
+        return sum(1 for a in self.assets
+                   if (kind is None or a.kind == kind) and a.status == status)
+
+    def missing_assets(self):
+        """返回所有缺失资源的记录列表"""
+        return [a for a in self.assets if a.status == STATUS_MISSING]
+
+
+@dataclass
+class BatchResult:
+    """
+    批量转换的汇总结果
+
+    Attributes:
+        folder_path (str): 批量转换的根文件夹路径
+        results (list): 每个文件夹的ConversionResult列表
+        elapsed (float): 批量转换总耗时（秒）
+        schedule (ScheduleReport or None): 并行调度时的调度报告，依次转换时为None
+    """
+    folder_path: str
+    results: List[ConversionResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    schedule: Optional[object] = None
+
+    @property
+    def succeeded(self):
+        """转换成功的结果列表"""
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed(self):
+        """转换失败的结果列表"""
+        return [r for r in self.results if not r.success]
+
+    @property
+    def cancelled(self):
+        """是否有任务被取消"""
+        return any(r.cancelled for r in self.results)
+
+    @property
+    def deduplicated(self):
+        """共享了其他文件夹输出的结果列表"""
+        return [r for r in self.results if r.linked_from is not None]
+
+    @property
+    def output_size(self):
+        """所有输出文件的总大小（字节）"""
+        return sum(r.output_size for r in self.results)
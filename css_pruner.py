@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 未使用CSS裁剪模块
+
+此模块删除内联样式表中不可能匹配页面的规则：
+- 从页面中收集出现过的标签名、class、id和属性名，选择器要求的任何一项在页面中不存在时，
+  该选择器不可能匹配；选择器列表中全部选择器都不可能匹配时删除整条规则
+- 伪类和伪元素不参与判断（:not()、:is()、:has()等函数式伪类的参数也按可能匹配处理），
+  无法识别的选择器一律保留
+- @media、@supports、@layer等分组规则递归处理，内部规则全部删除后删除整个分组
+- 保留的规则中没有引用的@keyframes和@font-face被删除，引用关系跨页面内的全部样式表计算
+- 白名单（支持*和?通配符）匹配的class、id、标签名、动画名和字体名视为存在于页面中，
+  用于脚本动态添加的class等情况
+- 样式表的解析结果和每个选择器的要求集合按内容哈希缓存，批量转换时同一个框架样式表只解析一次
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 页面中原有的<style>块
+STYLE_BLOCK_PATTERN = re.compile(r'(<style\b[^>]*>)(.*?)(</style\s*>)', re.IGNORECASE | re.DOTALL)
+
+# 页面中的开始标签及其属性
+TAG_PATTERN = re.compile(r'<([a-zA-Z][\w:-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+ATTR_PATTERN = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?''')
+
+# 引用@keyframes和@font-face名称的声明
+REFERENCE_PATTERN = re.compile(r'(?:^|[;{\s])(animation(?:-name)?|font(?:-family)?|--[\w-]+)\s*:\s*([^;{}]+)',
+                               re.IGNORECASE)
+
+# 没有出现在页面源码中也始终存在的标签
+IMPLICIT_TAGS = frozenset(('html', 'head', 'body'))
+
+# 默认白名单：常见的由脚本切换的状态class
+DEFAULT_SAFELIST = ('active', 'show', 'showing', 'open', 'in', 'fade', 'collapsing', 'hidden',
+                    'disabled', 'selected', 'is-*', 'has-*', 'js-*')
+
+# 内容保持原样的分组规则，其内部规则递归裁剪
+GROUP_AT_RULES = ('media', 'supports', 'layer', 'container', 'document', '-moz-document', 'scope')
+
+
+@dataclass
+class CssNode:
+    """
+    样式表中的一条顶层规则
+
+    Attributes:
+        kind (str): 'rule'（普通规则）、'group'（分组规则）、'keyframes'、'font-face'或'other'
+        text (str): 规则的源文本；分组规则只保存开头部分（到左花括号之前）
+        selectors (list or None): 普通规则中每个选择器要求的标记集合；无法解析时为None（始终保留）
+        references (frozenset): 规则中引用的动画名和字体名（小写）
+        name (str): @keyframes的名称或@font-face的font-family（小写）
+        children (list): 分组规则内部的规则
+    """
+    kind: str
+    text: str
+    selectors: Optional[list] = None
+    references: frozenset = frozenset()
+    name: str = ''
+    children: List['CssNode'] = field(default_factory=list)
+
+
+def _skip_comment(text, i):
+    """返回注释结束后的位置"""
+    end = text.find('*/', i + 2)
+    return len(text) if end < 0 else end + 2
+
+
+def _skip_string(text, i):
+    """返回字符串结束后的位置"""
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        if text[i] == '\\':
+            i += 2
+            continue
+        if text[i] == quote or text[i] == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _matching_brace(text, i):
+    """返回与text[i]处左花括号匹配的右花括号位置，不完整时返回文本长度"""
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c == '/' and text.startswith('/*', i):
+            i = _skip_comment(text, i)
+            continue
+        if c in '"\'':
+            i = _skip_string(text, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text)
+
+
+def _split_top_level(text, separator=','):
+    """按不在括号、方括号和字符串内的分隔符拆分"""
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c in '"\'':
+            i = _skip_string(text, i)
+            continue
+        if c == '\\':
+            i += 2
+            continue
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _read_ident(text, i):
+    """从位置i读取CSS标识符（处理转义），返回(标识符, 结束位置)"""
+    chars = []
+    while i < len(text):
+        c = text[i]
+        if c == '\\' and i + 1 < len(text):
+            hex_match = re.match(r'[0-9a-fA-F]{1,6}\s?', text[i + 1:])
+            if hex_match:
+                chars.append(chr(min(int(hex_match.group(0).strip(), 16), 0x10FFFF) or 0xFFFD))
+                i += 1 + len(hex_match.group(0))
+            else:
+                chars.append(text[i + 1])
+                i += 2
+            continue
+        if c.isalnum() or c in '-_' or ord(c) > 0x7f:
+            chars.append(c)
+            i += 1
+            continue
+        break
+    return ''.join(chars), i
+
+
+def _skip_parens(text, i):
+    """返回与text[i]处左括号匹配的右括号之后的位置"""
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c in '"\'':
+            i = _skip_string(text, i)
+            continue
+        if c == '\\':
+            i += 2
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def selector_requirements(selector):
+    """
+    返回选择器要求页面中存在的标记集合
+
+    标记形如'div'（标签名）、'.name'（class）、'#name'（id）和'[name'（属性名）。
+
+    Args:
+        selector (str): 单个选择器（不含逗号）
+
+    Returns:
+        frozenset or None: 标记集合；选择器无法识别时返回None（按可能匹配处理）
+    """
+    requirements = set()
+    i = 0
+    n = len(selector)
+    while i < n:
+        c = selector[i]
+        if c in ' \t\r\n\f>+~|*':
+            i += 1
+        elif c == '.' or c == '#':
+            name, i = _read_ident(selector, i + 1)
+            if not name:
+                return None
+            requirements.add(c + name)
+        elif c == '[':
+            end = i + 1
+            while end < n and selector[end] != ']':
+                end = _skip_string(selector, end) if selector[end] in '"\'' else end + 1
+            attr = re.match(r'\s*(?:[\w-]*\|)?([\w-]+)', selector[i + 1:end])
+            if attr is None:
+                return None
+            requirements.add('[' + attr.group(1).lower())
+            i = end + 1
+        elif c == ':':
+            while i < n and selector[i] == ':':
+                i += 1
+            _, i = _read_ident(selector, i)
+            if i < n and selector[i] == '(':
+                i = _skip_parens(selector, i)
+        elif c.isalpha() or c in '_-\\' or ord(c) > 0x7f:
+            name, i = _read_ident(selector, i)
+            if not name:
+                return None
+            if i < n and selector[i] == '|' and not selector.startswith('||', i):
+                # 命名空间前缀
+                i += 1
+                continue
+            requirements.add(name.lower())
+        else:
+            # 嵌套选择器&、百分比关键帧等无法识别的内容
+            return None
+    return frozenset(requirements)
+
+
+def _declared_references(block):
+    """返回声明块中引用的动画名和字体名（小写），用于判断@keyframes和@font-face是否仍被使用"""
+    references = set()
+    for match in REFERENCE_PATTERN.finditer(block):
+        value = match.group(2).strip()
+        for piece in value.split(','):
+            words = piece.replace('"', ' ').replace("'", ' ').lower().split()
+            # font简写中字体名位于字号之后，收集所有后缀组合
+            for k in range(len(words)):
+                references.add(' '.join(words[k:]))
+            references.update(words)
+    return frozenset(references)
+
+
+def _font_face_family(block):
+    """返回@font-face声明的font-family（小写）"""
+    match = re.search(r'font-family\s*:\s*([^;}]+)', block, re.IGNORECASE)
+    if match is None:
+        return ''
+    return match.group(1).strip().strip('"\'').strip().lower()
+
+
+def parse_stylesheet(css_content):
+    """
+    把样式表解析为顶层规则列表
+
+    Args:
+        css_content (str): 样式表内容
+
+    Returns:
+        list: CssNode列表
+    """
+    nodes = []
+    i = 0
+    n = len(css_content)
+    start = 0
+    while i < n:
+        c = css_content[i]
+        if c == '/' and css_content.startswith('/*', i):
+            end = _skip_comment(css_content, i)
+            if css_content.startswith('/*!', i):
+                # 许可证注释保留
+                nodes.append(CssNode('other', css_content[i:end]))
+            if not css_content[start:i].strip():
+                start = end
+            i = end
+            continue
+        if c in '"\'':
+            i = _skip_string(css_content, i)
+            continue
+        if c == ';':
+            statement = css_content[start:i + 1].strip()
+            if statement:
+                nodes.append(CssNode('other', statement))
+            i = start = i + 1
+            continue
+        if c == '}':
+            # 多余的右花括号
+            i = start = i + 1
+            continue
+        if c != '{':
+            i += 1
+            continue
+
+        end = _matching_brace(css_content, i)
+        prelude = css_content[start:i].strip()
+        block = css_content[i + 1:end]
+        text = css_content[start:end + 1].strip()
+        if prelude.startswith('@'):
+            at_name = re.match(r'@([\w-]+)', prelude)
+            at_name = at_name.group(1).lower() if at_name else ''
+            if at_name in GROUP_AT_RULES:
+                nodes.append(CssNode('group', css_content[start:i].strip(), children=parse_stylesheet(block)))
+            elif at_name.endswith('keyframes'):
+                nodes.append(CssNode('keyframes', text, name=prelude.split(None, 1)[-1].strip('"\' ').lower()))
+            elif at_name == 'font-face':
+                nodes.append(CssNode('font-face', text, name=_font_face_family(block)))
+            else:
+                nodes.append(CssNode('other', text, references=_declared_references(block)))
+        else:
+            selectors = [selector_requirements(s.strip()) for s in _split_top_level(prelude)]
+            if any(s is None for s in selectors):
+                selectors = None
+            nodes.append(CssNode('rule', text, selectors, _declared_references(block)))
+        i = start = end + 1
+    return nodes
+
+
+class StylesheetCache:
+    """
+    按内容哈希缓存的样式表解析结果
+
+    缓存是线程安全的，可以在批量转换的所有页面之间共享。
+
+    Args:
+        max_entries (int, optional): 最多缓存的样式表数量，默认为256
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sheets = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, css_content):
+        """返回样式表的解析结果，未缓存时解析并缓存"""
+        key = hashlib.sha256(css_content.encode('utf-8', 'surrogatepass')).hexdigest()
+        with self._lock:
+            nodes = self._sheets.get(key)
+            if nodes is not None:
+                self._sheets.move_to_end(key)
+                self.hits += 1
+                return nodes
+            self.misses += 1
+        nodes = parse_stylesheet(css_content)
+        with self._lock:
+            self._sheets[key] = nodes
+            while len(self._sheets) > self.max_entries:
+                self._sheets.popitem(last=False)
+        return nodes
+
+
+class PageIndex:
+    """
+    页面中出现过的标签名、class、id和属性名
+
+    Args:
+        html_content (str): HTML内容字符串
+        safelist (iterable, optional): 白名单通配符模式，匹配的名称视为存在
+    """
+
+    def __init__(self, html_content, safelist=()):
+        self.tokens = set(IMPLICIT_TAGS)
+        self.references = set()
+        self.safelist = tuple(DEFAULT_SAFELIST) + tuple(s for s in safelist if s)
+        self._checked = {}
+        for match in TAG_PATTERN.finditer(html_content):
+            self.tokens.add(match.group(1).lower())
+            for attr in ATTR_PATTERN.finditer(match.group(2)):
+                name = attr.group(1).lower()
+                value = (attr.group(2) or '').strip('"\'')
+                self.tokens.add('[' + name)
+                if name == 'class':
+                    self.tokens.update('.' + c for c in value.split())
+                elif name == 'id':
+                    self.tokens.add('#' + value)
+                elif name == 'style':
+                    self.references.update(_declared_references(value))
+                elif name == 'font-family':
+                    self.references.update(_declared_references('font-family:' + value))
+
+    def _safelisted(self, name):
+        return any(fnmatchcase(name, pattern) for pattern in self.safelist)
+
+    def has(self, token):
+        """页面中存在该标记或标记被白名单匹配时返回True"""
+        present = self._checked.get(token)
+        if present is None:
+            name = token.lstrip('.#[')
+            present = token in self.tokens or self._safelisted(name)
+            self._checked[token] = present
+        return present
+
+    def matches(self, selectors):
+        """选择器列表中任何一个选择器可能匹配页面时返回True"""
+        if selectors is None:
+            return True
+        return any(all(self.has(token) for token in requirements) for requirements in selectors)
+
+    def referenced(self, name, references):
+        """@keyframes或@font-face的名称被引用或被白名单匹配时返回True"""
+        return not name or name in references or name in self.references or self._safelisted(name)
+
+
+def _prune_nodes(nodes, index, references, stats):
+    """删除不可能匹配的规则，返回保留的节点，并收集保留规则中的引用"""
+    kept = []
+    for node in nodes:
+        if node.kind == 'rule':
+            if not index.matches(node.selectors):
+                stats['rules'] += 1
+                continue
+            references.update(node.references)
+        elif node.kind == 'group':
+            children = _prune_nodes(node.children, index, references, stats)
+            # 空的@layer块仍然决定层的顺序，保留
+            if not children and not node.text.lower().startswith('@layer'):
+                continue
+            node = CssNode('group', node.text, children=children)
+        else:
+            references.update(node.references)
+        kept.append(node)
+    return kept
+
+
+def _serialize(nodes, index, references, stats):
+    """把保留的节点序列化为样式表文本，同时删除没有被引用的@keyframes和@font-face"""
+    parts = []
+    for node in nodes:
+        if node.kind in ('keyframes', 'font-face') and not index.referenced(node.name, references):
+            stats[node.kind] += 1
+            continue
+        if node.kind == 'group':
+            parts.append(node.text + ' {\n' + _serialize(node.children, index, references, stats) + '\n}')
+        else:
+            parts.append(node.text)
+    return '\n'.join(parts)
+
+
+def prune_stylesheets(html_content, stylesheets, options=None):
+    """
+    裁剪页面原有<style>块和即将内联的样式表中不可能匹配页面的规则
+
+    @keyframes和@font-face可能在另一个样式表中被引用，因此页面的全部样式表一起处理。
+
+    Args:
+        html_content (str): HTML内容字符串
+        stylesheets (dict): 样式表引用地址到样式表内容的映射
+        options (ConversionOptions, optional): 转换选项，默认为None
+
+    Returns:
+        tuple: (裁剪了<style>块的HTML内容, 引用地址到裁剪后样式表内容的映射)
+    """
+    cache = options.css_cache if options is not None else None
+    if cache is None:
+        cache = StylesheetCache()
+    index = PageIndex(html_content, options.css_safelist if options is not None else ())
+
+    stats = {'rules': 0, 'keyframes': 0, 'font-face': 0}
+    references = set()
+    inline_blocks = list(STYLE_BLOCK_PATTERN.finditer(html_content))
+    pruned_inline = [_prune_nodes(cache.parse(m.group(2)), index, references, stats) for m in inline_blocks]
+    pruned_sheets = {href: _prune_nodes(cache.parse(css), index, references, stats)
+                     for href, css in stylesheets.items()}
+
+    size_before = sum(len(m.group(2)) for m in inline_blocks) + sum(len(c) for c in stylesheets.values())
+    result_sheets = {href: _serialize(nodes, index, references, stats) for href, nodes in pruned_sheets.items()}
+    new_blocks = [_serialize(nodes, index, references, stats) for nodes in pruned_inline]
+    size_after = sum(len(c) for c in new_blocks) + sum(len(c) for c in result_sheets.values())
+
+    parts = []
+    last = 0
+    for match, css in zip(inline_blocks, new_blocks):
+        parts.append(html_content[last:match.start(2)])
+        parts.append(css)
+        last = match.end(2)
+    parts.append(html_content[last:])
+
+    if stats['rules'] or stats['keyframes'] or stats['font-face']:
+        logger.info(f"已裁剪未使用的CSS: 删除规则 {stats['rules']} 条、@keyframes {stats['keyframes']} 个、"
+                    f"@font-face {stats['font-face']} 个，{size_before} -> {size_after} 字符")
+    return ''.join(parts), result_sheets
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 嵌入文档内联模块
+
+此模块递归内联页面中通过iframe、object和embed引用的本地子文档：
+- 子文档经过与主文档相同的处理流程，其中的资源相对子文档自身所在的文件夹解析
+- iframe改为srcdoc属性；object和embed没有srcdoc，改为data URI
+- SVG子文档按原样编码为data URI
+- 通过上级文档路径栈检测循环嵌入，并限制最大嵌套层数
+- 主文档和所有子文档共享同一个资源缓存（ConversionOptions.asset_cache），
+  同一张图片在多个子文档中出现时只读取和编码一次
+"""
+
+import os
+import re
+import html
+import base64
+import logging
+from urllib.parse import urlsplit
+
+from html_converter import (AssetRecord, ConversionResult, STATUS_INLINED, STATUS_SKIPPED,
+                            _data_uri_size, _encode_data_uri, _encoded_size, _is_remote, _load_asset, _process_document,
+                            _record, _warn)
+
+logger = logging.getLogger(__name__)
+
+# 匹配iframe、object和embed的开始标签
+EMBED_PATTERN = re.compile(r'<(iframe|object|embed)\b([^>]*)>', re.IGNORECASE)
+
+# 各标签引用子文档的属性
+EMBED_ATTRS = {
+    'iframe': 'src',
+    'object': 'data',
+    'embed': 'src',
+}
+
+# 按HTML处理的子文档扩展名
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+
+
+def _attr_pattern(name):
+    """返回匹配指定属性及其引号内取值的正则表达式"""
+    return re.compile(r'(\s)' + name + r'''\s*=\s*(["'])(.*?)\2''', re.IGNORECASE | re.DOTALL)
+
+
+ATTR_PATTERNS = {name: _attr_pattern(name) for name in ('src', 'data', 'srcdoc')}
+
+
+def inline_embedded_documents(html_content, base_folder, options=None, result=None, embed_stack=()):
+    """
+    内联HTML内容中iframe、object和embed引用的本地子文档
+
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+        embed_stack (tuple, optional): 当前文档及其上级文档的绝对路径，用于检测循环嵌入
+
+    Returns:
+        str: 处理后的HTML内容字符串
+    """
+    max_depth = options.max_embed_depth if options is not None else 3
+    processed_count = 0
+
+    def replace_func(match):
+        nonlocal processed_count
+        tag_name = match.group(1).lower()
+        attrs = match.group(2)
+        attr = ATTR_PATTERNS[EMBED_ATTRS[tag_name]].search(attrs)
+        if attr is None or (tag_name == 'iframe' and ATTR_PATTERNS['srcdoc'].search(attrs)):
+            return match.group(0)
+        reference = html.unescape(attr.group(3)).strip()
+        if not reference or _is_remote(reference) or \
+                reference.startswith(('data:', 'about:', 'javascript:', 'blob:', '#')):
+            return match.group(0)
+
+        path = urlsplit(reference).path
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in HTML_EXTENSIONS + ('.svg',):
+            return match.group(0)
+        child_path = os.path.normpath(os.path.join(base_folder, path))
+
+        if extension == '.svg':
+            value = _inline_svg(reference, child_path, options, result)
+        else:
+            value = _inline_html(reference, child_path, tag_name, options, result,
+                                 embed_stack, max_depth)
+        if value is None:
+            return match.group(0)
+        processed_count += 1
+
+        if tag_name == 'iframe' and extension != '.svg':
+            new_attr = f'{attr.group(1)}srcdoc="{value}"'
+        else:
+            new_attr = f'{attr.group(1)}{EMBED_ATTRS[tag_name]}="{value}"'
+        attrs = attrs[:attr.start()] + new_attr + attrs[attr.end():]
+        return f'<{match.group(1)}{attrs}>'
+
+    html_content = EMBED_PATTERN.sub(replace_func, html_content)
+    if processed_count:
+        logger.info(f"总计内联嵌入文档数量: {processed_count}（第 {len(embed_stack)} 层）")
+    return html_content
+
+
+def _inline_svg(reference, child_path, options, result):
+    """把SVG子文档编码为data URI"""
+    asset = _load_asset('frame', child_path, '', options, result)
+    if asset is None:
+        return None
+    path, raw, _ = asset
+    data_uri = _encode_data_uri(path, raw, 'image/svg+xml', options)
+    _record(result, AssetRecord('frame', reference, path, STATUS_INLINED, len(raw),
+                                _data_uri_size(data_uri, options), 'base64', 'image/svg+xml'))
+    logger.debug(f"已内联嵌入文档: {path}")
+    return data_uri
+
+
+def _inline_html(reference, child_path, tag_name, options, result, embed_stack, max_depth):
+    """
+    处理HTML子文档
+
+    Returns:
+        str or None: iframe返回转义后的srcdoc属性值，object和embed返回data URI；
+            无法内联时返回None
+    """
+    if os.path.abspath(child_path) in embed_stack:
+        _warn(result, f"检测到循环嵌入，保留原引用: {child_path}")
+        _record(result, AssetRecord('frame', reference, child_path, STATUS_SKIPPED, error='循环嵌入'))
+        return None
+    if len(embed_stack) > max_depth:
+        _warn(result, f"嵌入文档超过最大嵌套层数 {max_depth}，保留原引用: {child_path}")
+        _record(result, AssetRecord('frame', reference, child_path, STATUS_SKIPPED,
+                                    error='超过最大嵌套层数'))
+        return None
+    if not os.path.isfile(child_path):
+        # 借助_load_asset记录缺失资源的警告
+        _load_asset('frame', child_path, '', options, result)
+        return None
+
+    # 子文档使用独立的结果对象，避免覆盖主文档的阶段耗时；资源记录随后并入主结果
+    child_result = ConversionResult(folder_path=os.path.dirname(child_path), main_html=child_path)
+    child_html = _process_document(child_path, os.path.dirname(child_path), options, child_result,
+                                   embed_stack)
+    if child_html is None:
+        _warn(result, f"处理嵌入文档失败 {child_path}: {child_result.error}")
+        return None
+
+    if tag_name == 'iframe':
+        # 资源占位符经HTML转义后保持不变，写出时照常拼接
+        value = html.escape(child_html, quote=True)
+        encoding = 'srcdoc'
+    else:
+        if options is not None and options.splice_store is not None:
+            # 整个子文档要再做一次base64编码，先把占位符还原为资源内容
+            child_html = options.splice_store.materialize(child_html)
+        value = 'data:text/html;base64,' + base64.b64encode(child_html.encode('utf-8')).decode('ascii')
+        encoding = 'base64'
+
+    if result is not None:
+        # 子文档中的顶层资源归属于该子文档
+        for record in child_result.assets:
+            if not record.parent:
+                record.parent = child_path
+        result.assets.extend(child_result.assets)
+        result.warnings.extend(child_result.warnings)
+    _record(result, AssetRecord('frame', reference, child_path, STATUS_INLINED,
+                                os.path.getsize(child_path), _encoded_size(value, options), encoding,
+                                'text/html'))
+    logger.debug(f"已内联嵌入文档: {child_path}")
+    return value
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 网页字体子集化模块
+
+此模块把样式表中@font-face引用的字体裁剪为页面实际用到的字符后再内联：
+- 收集文档中会被渲染的字符（正文文本、alt/title等属性、CSS content字符串），
+  并始终保留可打印ASCII字符，以容纳脚本生成的数字和英文
+- 对每个@font-face选择第一个可以读取的字体源，使用fontTools裁剪并输出为WOFF2
+  （未安装brotli时输出为WOFF），替换为data URI
+- 只保留@font-face的unicode-range覆盖的字符；字体中不包含页面任何这些字符的@font-face规则（例如按unicode-range切分的CJK字体分片）直接删除
+- 子集结果按字体内容哈希和字符集合缓存在内存中，可选同时缓存到磁盘
+
+fontTools是可选依赖（pip install fonttools brotli），未安装时跳过子集化并记录警告。
+"""
+
+import io
+import os
+import re
+import html
+import base64
+import hashlib
+import logging
+import threading
+from urllib.parse import urljoin, urlsplit
+
+from html_converter import (AssetRecord, STATUS_INLINED, STATUS_SKIPPED, _is_remote, _load_asset,
+                            _record, _warn)
+
+logger = logging.getLogger(__name__)
+
+# 匹配@font-face规则
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}', re.IGNORECASE)
+
+# 匹配@font-face中的src描述符
+FONT_SRC_PATTERN = re.compile(r'(\bsrc\s*:\s*)([^;}]+)', re.IGNORECASE)
+
+# 匹配@font-face中的unicode-range描述符
+UNICODE_RANGE_PATTERN = re.compile(r'\bunicode-range\s*:\s*([^;}]+)', re.IGNORECASE)
+
+# 匹配src中的url()引用
+FONT_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+# 收集文本时移除的元素和标签
+SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style|template)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+# 会被渲染的属性
+TEXT_ATTR_PATTERN = re.compile(r'''\s(?:alt|title|placeholder|value|aria-label)\s*=\s*(["'])(.*?)\1''',
+                               re.IGNORECASE | re.DOTALL)
+
+# CSS content属性的值及其中的字符串
+CSS_CONTENT_PATTERN = re.compile(r'\bcontent\s*:\s*([^;}]*)', re.IGNORECASE)
+CSS_STRING_PATTERN = re.compile(r""""((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'""", re.DOTALL)
+STYLE_BLOCK_PATTERN = re.compile(r'<style\b[^>]*>(.*?)</style\s*>', re.IGNORECASE | re.DOTALL)
+
+# CSS转义：反斜杠加1到6位十六进制数（可跟一个空白字符），或反斜杠加任意其他字符
+CSS_ESCAPE_PATTERN = re.compile(r'\\(?:([0-9a-fA-F]{1,6})(?:\r\n|[ \t\r\n\f])?|(.))', re.DOTALL)
+
+# 始终保留的字符：可打印ASCII
+BASE_CHARACTERS = ''.join(chr(c) for c in range(0x20, 0x7f))
+
+# 可以子集化的字体扩展名
+FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf')
+
+# 字体不包含所需字符时缓存的结果，避免批量转换中每个页面重复解析同一个字体
+EMPTY_SUBSET = (b'', 'none')
+
+_missing_dependency_warned = False
+
+
+def decode_css_escapes(text):
+    """
+    解码CSS字符串中的转义，例如图标字体常用的"\\f00d"
+
+    Args:
+        text (str): CSS字符串的内容（不含引号）
+
+    Returns:
+        str: 解码后的字符串；码点为0、代理区或超出Unicode范围时替换为U+FFFD
+    """
+    def replace_func(match):
+        if match.group(1) is None:
+            # 反斜杠加换行是字符串续行，其他字符按原样保留
+            return '' if match.group(2) in '\r\n\f' else match.group(2)
+        codepoint = int(match.group(1), 16)
+        if codepoint == 0 or 0xD800 <= codepoint <= 0xDFFF or codepoint > 0x10FFFF:
+            return '\ufffd'
+        return chr(codepoint)
+
+    return CSS_ESCAPE_PATTERN.sub(replace_func, text)
+
+
+def collect_content_characters(css):
+    """返回样式表中content属性字符串用到的字符（已解码CSS转义）"""
+    characters = set()
+    for match in CSS_CONTENT_PATTERN.finditer(css):
+        for string in CSS_STRING_PATTERN.finditer(match.group(1)):
+            value = string.group(1) if string.group(1) is not None else string.group(2)
+            characters.update(decode_css_escapes(value))
+    return characters
+
+
+def collect_used_characters(html_content, extra='', stylesheets=()):
+    """
+    收集文档中会被渲染的字符
+
+    Args:
+        html_content (str): HTML内容字符串
+        extra (str, optional): 额外保留的字符（例如脚本动态插入的文本），默认为空
+        stylesheets (iterable, optional): 将要内联的外部样式表内容，收集其中content属性的字符，默认为空
+
+    Returns:
+        str: 排序后去重的字符
+    """
+    characters = set(BASE_CHARACTERS) | set(extra)
+    for block in STYLE_BLOCK_PATTERN.findall(html_content):
+        characters.update(collect_content_characters(block))
+    for css in stylesheets:
+        characters.update(collect_content_characters(css))
+    for match in TEXT_ATTR_PATTERN.finditer(html_content):
+        characters.update(html.unescape(match.group(2)))
+    text = SCRIPT_STYLE_PATTERN.sub(' ', COMMENT_PATTERN.sub(' ', html_content))
+    characters.update(html.unescape(TAG_PATTERN.sub(' ', text)))
+    # text-transform可能改变大小写
+    characters.update(''.join(characters).upper())
+    characters.update(''.join(characters).lower())
+    characters -= set('\r\n\t\f\v')
+    return ''.join(sorted(characters))
+
+
+class FontSubsetCache:
+    """
+    按字体内容哈希和字符集合缓存的字体子集
+
+    缓存是线程安全的，可以在批量转换的所有页面之间共享。
+
+    Args:
+        cache_dir (str, optional): 磁盘缓存目录，默认为None（只缓存在内存中）
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._subsets = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(raw, characters):
+        """缓存键：字体内容哈希加字符集合哈希"""
+        return (hashlib.sha256(raw).hexdigest()[:32] + '-'
+                + hashlib.sha256(characters.encode('utf-8', 'surrogatepass')).hexdigest()[:16])
+
+    def get(self, key):
+        """返回缓存的(字体字节, 格式)，未缓存时返回None；字体不包含所需字符时返回EMPTY_SUBSET"""
+        with self._lock:
+            subset = self._subsets.get(key)
+        if subset is None and self.cache_dir:
+            for flavor in ('woff2', 'woff', EMPTY_SUBSET[1]):
+                path = os.path.join(self.cache_dir, f'{key}.{flavor}')
+                try:
+                    with open(path, 'rb') as f:
+                        subset = (f.read(), flavor)
+                    break
+                except OSError:
+                    continue
+            if subset is not None:
+                with self._lock:
+                    self._subsets[key] = subset
+        with self._lock:
+            if subset is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return subset
+
+    def put(self, key, subset):
+        """缓存子集或EMPTY_SUBSET；启用磁盘缓存时先写临时文件再替换"""
+        with self._lock:
+            self._subsets[key] = subset
+        if self.cache_dir:
+            data, flavor = subset
+            path = os.path.join(self.cache_dir, f'{key}.{flavor}')
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+
+def subset_font(raw, characters):
+    """
+    把字体裁剪为指定字符
+
+    Args:
+        raw (bytes): TTF、OTF、WOFF或WOFF2字体内容
+        characters (str): 需要保留的字符
+
+    Returns:
+        tuple or None: (子集字体字节, 格式'woff2'或'woff')；字体不包含其中任何字符时返回None
+    """
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(io.BytesIO(raw), lazy=False)
+    codepoints = {ord(c) for c in characters}
+    cmap = font.getBestCmap() or {}
+    if not codepoints & set(cmap):
+        return None
+
+    try:
+        import brotli  # noqa: F401  WOFF2需要brotli
+        flavor = 'woff2'
+    except ImportError:
+        flavor = 'woff'
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.name_languages = ['*']
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    font.flavor = flavor
+    font.save(output)
+    return output.getvalue(), flavor
+
+
+def _filter_unicode_range(characters, rule):
+    """
+    只保留@font-face的unicode-range覆盖的字符；没有unicode-range时原样返回
+
+    Args:
+        characters (str): 页面用到的字符
+        rule (str): @font-face规则
+
+    Returns:
+        str: 浏览器会使用该字体渲染的字符
+    """
+    match = UNICODE_RANGE_PATTERN.search(rule)
+    if match is None:
+        return characters
+    ranges = []
+    for part in match.group(1).split(','):
+        part = part.strip().upper()
+        if part.startswith('U+'):
+            part = part[2:]
+        try:
+            if '?' in part:
+                ranges.append((int(part.replace('?', '0'), 16), int(part.replace('?', 'F'), 16)))
+            elif '-' in part:
+                start, end = part.split('-', 1)
+                ranges.append((int(start, 16), int(end, 16)))
+            else:
+                ranges.append((int(part, 16), int(part, 16)))
+        except ValueError:
+            # 无法解析时按浏览器的处理方式忽略整个描述符
+            return characters
+    return ''.join(c for c in characters if any(start <= ord(c) <= end for start, end in ranges))
+
+
+def _fonttools_available():
+    """检查fontTools是否可用，不可用时只警告一次"""
+    global _missing_dependency_warned
+    try:
+        import fontTools  # noqa: F401
+        return True
+    except ImportError:
+        if not _missing_dependency_warned:
+            _missing_dependency_warned = True
+            logger.warning("未安装fontTools，跳过字体子集化（pip install fonttools brotli）")
+        return False
+
+
+def _resolve(reference, base):
+    """按样式表所在位置解析字体地址；base为样式表URL或本地文件夹"""
+    if reference.startswith('data:') or _is_remote(reference):
+        return reference
+    if _is_remote(base):
+        return urljoin(base, reference)
+    return os.path.normpath(os.path.join(base, urlsplit(reference).path))
+
+
+def _decode_data_url(url):
+    """解码base64 data URL，不是base64编码时返回None"""
+    header, _, data = url.partition(',')
+    if not header.endswith(';base64'):
+        return None
+    try:
+        return base64.b64decode(data)
+    except ValueError:
+        return None
+
+
+def subset_stylesheet_fonts(css_content, base, characters, options=None, result=None, parent=''):
+    """
+    子集化样式表中@font-face引用的字体
+
+    Args:
+        css_content (str): 样式表内容
+        base (str): 解析相对地址的基准，样式表URL或本地文件夹
+        characters (str): 页面用到的字符
+        options (ConversionOptions, optional): 转换选项，默认为None
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+        parent (str, optional): 样式表解析后的路径或URL，用于资源记录，默认为空（内联样式）
+
+    Returns:
+        str: 处理后的样式表内容
+    """
+    if '@font-face' not in css_content.lower() or not _fonttools_available():
+        return css_content
+    cache = options.font_cache if options is not None else None
+    if cache is None:
+        cache = FontSubsetCache(options.font_cache_dir if options is not None else None)
+
+    def replace_face(face_match):
+        rule = face_match.group(0)
+        src_match = FONT_SRC_PATTERN.search(rule)
+        if src_match is None:
+            return rule
+        face_characters = _filter_unicode_range(characters, rule)
+        if not face_characters:
+            # 页面不使用unicode-range中的任何字符，浏览器不会下载这个字体，无需读取
+            logger.debug("页面未使用@font-face的unicode-range中的字符，已删除该规则")
+            return ''
+        for url_match in FONT_URL_PATTERN.finditer(src_match.group(2)):
+            reference = url_match.group(2).strip()
+            if reference.startswith('data:'):
+                raw = _decode_data_url(reference)
+                path = 'data:'
+                if raw is None:
+                    continue
+            else:
+                if os.path.splitext(urlsplit(reference).path)[1].lower() not in FONT_EXTENSIONS:
+                    continue
+                location = _resolve(reference, base)
+                asset = _load_asset('font', location, '', options, result)
+                if asset is None:
+                    continue
+                path, raw, _ = asset
+
+            key = cache.key(raw, face_characters)
+            subset = cache.get(key)
+            if subset is None:
+                try:
+                    subset = subset_font(raw, face_characters) or EMPTY_SUBSET
+                except Exception as e:
+                    _warn(result, f"字体子集化失败 {path}: {str(e)}")
+                    return rule
+                cache.put(key, subset)
+            if subset == EMPTY_SUBSET:
+                logger.debug(f"页面未使用字体中的字符，已删除@font-face: {path}")
+                _record(result, AssetRecord('font', reference, path, STATUS_SKIPPED, len(raw),
+                                            error='页面未使用该字体的字符', parent=parent))
+                return 
+            data, flavor = subset
+            data_uri = f"data:font/{flavor};base64,{base64.b64encode(data).decode('ascii')}"
+            logger.debug(f"已子集化字体: {path} {len(raw)} -> {len(data)} 字节")
+            _record(result, AssetRecord('font', reference, path, STATUS_INLINED, len(raw),
+                                        len(data_uri), 'base64', f'font/{flavor}', parent=parent))
+            new_src = f'{src_match.group(1)}url("{data_uri}") format("{flavor}")'
+            return rule[:src_match.start()] + new_src + rule[src_match.end():]
+        return rule
+
+    return FONT_FACE_PATTERN.sub(replace_face, css_content)
+
+
+def subset_inline_style_fonts(html_content, base_folder, characters, options=None, result=None):
+    """
+    子集化HTML中原有<style>块内@font-face引用的字体，相对地址按HTML所在文件夹解析
+
+    Returns:
+        str: 处理后的HTML内容字符串
+    """
+    def replace_block(match):
+        css = match.group(1)
+        new_css = subset_stylesheet_fonts(css, base_folder, characters, options, result)
+        if new_css is css:
+            return match.group(0)
+        return match.group(0)[:match.start(1) - match.start()] + new_css + \
+            match.group(0)[match.end(1) - match.start():]
+
+    return STYLE_BLOCK_PATTERN.sub(replace_block, html_content)
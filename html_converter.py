@@ -10,123 +10,1038 @@
 - 处理JavaScript资源，转换为内联脚本
 - 支持单文件夹转换和批量转换
 - 支持输出为HTML或MHTML格式
+- 支持图片懒加载输出，降低超大页面的首次解析和渲染开销
+- 返回结构化的转换结果（见conversion_result模块），日志通过logging模块输出
+- 支持通过JobControl暂停或取消正在进行的转换
+- 可选下载并内联远程资源（见remote_fetcher模块）
+- 递归内联iframe、object和embed引用的子文档，整个文档树共享同一个资源缓存（见embedded_documents模块）
+- 可复现输出模式：相同输入生成逐字节相同的文件；批量转换时可对输入相同的文件夹共享输出（见output_dedup模块）
+- 文档按可插拔的处理阶段依次处理，命令行和GUI共享同一套阶段和阶段统计（见conversion_pipeline模块）
+- 批量输出可以写入单个按文件夹名索引的SQLite容器，代替大量小文件（见output_container模块）
 """
 
 import os
 import re
+import sys
+import json
+import time
 import base64
-import mimetypes
+import struct
+import hashlib
+import logging
+import threading
+import dataclasses
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
 
+from conversion_result import (AssetRecord, ConversionResult, BatchResult, STATUS_INLINED,
+                               STATUS_MISSING, STATUS_SKIPPED, STATUS_FAILED)
 
-def convert_folder_to_single_html(folder_path, output_format='html'):
+logger = logging.getLogger(__name__)
+
+
+class ConversionCancelled(Exception):
+    """转换任务被取消时抛出的异常"""
+
+
+class JobControl:
     """
-    将包含资源的HTML文件夹转换为单个HTML或MHTML文件
+    转换任务的暂停与取消控制
+
+    转换函数在处理每个资源之前调用checkpoint()：任务暂停时在此阻塞，
+    任务取消时抛出ConversionCancelled。可以指定父控制对象，
+    此时父对象的暂停和取消同样作用于本任务（例如整个队列的暂停）。
+
+    Args:
+        parent (JobControl, optional): 父控制对象，默认为None
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        """任务（或其父任务）是否已取消"""
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def paused(self):
+        """任务（或其父任务）是否处于暂停状态"""
+        return not self._running.is_set() or (self.parent is not None and self.parent.paused)
+
+    def cancel(self):
+        """取消任务，同时唤醒处于暂停状态的任务以便其尽快退出"""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        """暂停任务，任务将在下一个检查点阻塞"""
+        self._running.clear()
+
+    def resume(self):
+        """继续已暂停的任务"""
+        self._running.set()
+
+    def checkpoint(self):
+        """
+        任务检查点：暂停时阻塞直到继续或取消，已取消时抛出异常
+
+        Raises:
+            ConversionCancelled: 任务已被取消
+        """
+        if self.parent is not None:
+            self.parent.checkpoint()
+        # 分段等待，使父对象的取消能够及时生效
+        while not self._running.wait(0.2):
+            if self.parent is not None and self.parent.cancelled:
+                break
+        if self.cancelled:
+            raise ConversionCancelled()
+
+
+def _checkpoint(options):
+    """在配置了任务控制对象时执行检查点"""
+    if options is not None and options.control is not None:
+        options.control.checkpoint()
+
+
+@dataclass
+class ConversionOptions:
+    """
+    转换选项
+
+    汇总影响输出内容的可选功能，在各个转换函数之间传递。
+
+    Attributes:
+        lazy_images (bool): 是否启用图片懒加载。启用后，超出首屏数量的图片只保留与图片同样尺寸的占位图，
+            其base64数据移入惰性存储区（同一张图片只保存一份），滚动到可视区域时再由引导脚本还原
+        lazy_eager_count (int): 懒加载模式下仍直接内联的前N张图片（首屏图片）
+        lazy_store (str): 懒加载图片数据的存放方式，'template'（每张图片一个template元素）
+            或'script'（单个JSON脚本块）
+        control (JobControl or None): 任务控制对象，用于暂停或取消转换，默认为None
+        fetch_remote (bool): 是否下载并内联http://和https://引用的远程资源，默认为False
+        http_cache_dir (str or None): 远程资源的磁盘HTTP缓存目录，默认为None（不使用磁盘缓存）
+        http_max_per_host (int): 每个主机的最大并发连接数
+        http_timeout (float): 远程请求的超时时间（秒）
+        remote_fetcher (RemoteFetcher or None): 共享的远程资源下载器；为None且启用了
+            fetch_remote时由转换函数自动创建
+        reproducible (bool): 是否生成可复现的输出。启用后MHTML的边界由内容哈希生成，
+            日期取source_date_epoch、环境变量SOURCE_DATE_EPOCH或源文件的最新修改时间，
+            标题取文档的title，文件统一使用\n换行
+        source_date_epoch (int or None): 可复现模式下写入MHTML的固定日期（Unix时间戳）
+        dedupe_outputs (bool): 批量转换时是否只转换输入相同的文件夹中的一个，
+            其余输出通过reflink、硬链接或复制共享
+        inline_modules (bool): 是否内联<script type="module">及其静态依赖的模块图（见module_graph模块）；
+            默认关闭，命令行和GUI开启
+        module_cache (ModuleCache or None): 共享的模块解析缓存；批量转换时由batch_convert创建
+        size_budget (SizeBudget or None): 输出大小预算（见output_analyzer模块）；超出时记录警告，
+            预算的action为'fail'时转换结果记为失败
+        inline_embeds (bool): 是否递归内联iframe、object和embed引用的本地子文档；默认关闭，命令行和GUI开启
+        max_embed_depth (int): 子文档的最大嵌套层数
+        asset_cache (AssetCache or None): 资源缓存；为None时convert_folder为每个文档树创建一个
+        subset_fonts (bool): 是否把@font-face引用的字体裁剪为页面用到的字符后内联（需要fontTools，
+            见font_subsetter模块）
+        font_extra_chars (str): 字体子集中额外保留的字符，例如脚本动态插入的文本
+        font_cache_dir (str or None): 字体子集的磁盘缓存目录，默认为None（只缓存在内存中）
+        font_cache (FontSubsetCache or None): 共享的字体子集缓存；批量转换时由batch_convert创建
+        prune_css (bool): 是否删除内联样式表中不可能匹配页面的规则（见css_pruner模块）
+        css_safelist (tuple): CSS裁剪的白名单通配符模式，匹配的class、id、标签名、动画名和字体名
+            视为存在于页面中，例如脚本动态添加的class
+        css_cache (StylesheetCache or None): 共享的样式表解析缓存；批量转换时由batch_convert创建
+        responsive_images (bool): 是否处理srcset和<picture>，只内联按目标视口选中的候选图片
+            （见responsive_images模块），未选中的候选不会被读取；默认关闭，命令行和GUI开启
+        viewport_width (int): 选择响应式图片候选时假定的视口宽度（CSS像素）
+        device_pixel_ratio (float): 选择响应式图片候选时假定的设备像素比
+        responsive_candidates (int): 每张响应式图片保留的候选数量，大于1时依次保留密度更高的候选
+        splice_output (bool): 是否把编码后的资源保存在临时文件中，文档中只放占位符，
+            写出时在内核中拼接到输出文件（见output_splicer模块）；默认关闭，命令行和GUI开启。
+            临时目录无法写入时回退为在内存中编码
+        splice_store (SpliceStore or None): 资源载荷存储；为None且启用了splice_output时，
+            convert_folder为每个文档树创建一个
+        progress (ItemProgress or None): 当前文件夹的进度句柄（见progress_tracker模块），
+            每读取一个资源推进一次；批量转换时由batch_convert为每个文件夹设置
+        output_container (OutputContainer or None): 输出容器（见output_container模块）；设置时输出写入容器，
+            按文件夹名索引，不再为每个文件夹写一个文件，output_dir被忽略
+        pipeline (Pipeline or None): 文档处理流水线（见conversion_pipeline模块），可注册自定义阶段；
+            为None时由convert_folder创建默认流水线，批量转换时由batch_convert创建并在所有文件夹间共享
+    """
+    lazy_images: bool = False
+    lazy_eager_count: int = 4
+    lazy_store: str = 'template'
+    control: Optional[JobControl] = None
+    fetch_remote: bool = False
+    http_cache_dir: Optional[str] = None
+    http_max_per_host: int = 6
+    http_timeout: float = 15
+    remote_fetcher: Optional[object] = None
+    reproducible: bool = False
+    source_date_epoch: Optional[int] = None
+    dedupe_outputs: bool = False
+    inline_modules: bool = False
+    module_cache: Optional[object] = None
+    size_budget: Optional[object] = None
+    inline_embeds: bool = False
+    max_embed_depth: int = 3
+    asset_cache: Optional[object] = None
+    subset_fonts: bool = False
+    font_extra_chars: str = ''
+    font_cache_dir: Optional[str] = None
+    font_cache: Optional[object] = None
+    prune_css: bool = False
+    css_safelist: tuple = ()
+    css_cache: Optional[object] = None
+    responsive_images: bool = False
+    viewport_width: int = 1280
+    device_pixel_ratio: float = 1.0
+    responsive_candidates: int = 1
+    splice_output: bool = False
+    splice_store: Optional[object] = None
+    progress: Optional[object] = None
+    output_container: Optional[object] = None
+    pipeline: Optional[object] = None
+
+
+class AssetCache:
+    """
+    文档树内共享的资源缓存
+
+    缓存资源的原始内容和base64编码后的data URI，同一个资源被主文档和多个子文档引用时
+    只读取和编码一次。缓存的总字节数超过上限后不再加入新内容（已缓存的内容仍然有效）。
+
+    Args:
+        max_bytes (int, optional): 缓存内容的总字节数上限，默认为256MB
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._assets = {}
+        self._data_uris = {}
+
+    def _admit(self, size):
+        """在上限以内时计入缓存大小并返回True"""
+        if self.size + size > self.max_bytes:
+            return False
+        self.size += size
+        return True
+
+    def get(self, key):
+        """返回缓存的(路径, 原始字节, MIME类型)，未缓存时返回None"""
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is not None:
+                self.hits += 1
+            return asset
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._assets
+
+    def put(self, key, asset):
+        """缓存_load_asset的返回值"""
+        with self._lock:
+            if key not in self._assets and self._admit(len(asset[1])):
+                self._assets[key] = asset
+
+    def data_uri(self, key, raw, mime_type):
+        """返回资源的base64 data URI，同一个资源只编码一次"""
+        with self._lock:
+            data_uri = self._data_uris.get((key, mime_type))
+        if data_uri is None:
+            data_uri = f"data:{mime_type};base64,{base64.b64encode(raw).decode('ascii')}"
+            with self._lock:
+                if self._admit(len(data_uri)):
+                    self._data_uris[(key, mime_type)] = data_uri
+        return data_uri
+
+
+def _prepare_asset_cache(options):
+    """没有指定资源缓存时为本次转换（整个文档树）创建一个"""
+    options = options or ConversionOptions()
+    if options.asset_cache is None:
+        options = dataclasses.replace(options, asset_cache=AssetCache())
+    return options
+
+
+def _prepare_pipeline(options):
+    """没有指定流水线时创建默认流水线"""
+    options = options or ConversionOptions()
+    if options.pipeline is None:
+        from conversion_pipeline import Pipeline
+        options = dataclasses.replace(options, pipeline=Pipeline())
+    return options
+
+
+def _prepare_splice_store(options):
+    """
+    启用了splice_output但没有载荷存储时，为本次转换（整个文档树）创建一个
+
+    Returns:
+        tuple: (转换选项, 新创建的载荷存储或None)；调用方负责关闭新创建的载荷存储
+    """
+    if options is None or not options.splice_output or options.splice_store is not None:
+        return options, None
+    from output_splicer import SpliceStore
+    store = SpliceStore()
+    return dataclasses.replace(options, splice_store=store), store
+
+
+def _encode_data_uri(path, raw, mime_type, options):
+    """
+    把资源编码为base64 data URI；配置了资源缓存时同一个资源只编码一次
+
+    配置了载荷存储时返回占位符，编码结果保存在载荷文件中，写出时拼接到输出文件，
+    data URI写入输出后的长度通过_data_uri_size获取。
+    """
+    store = options.splice_store if options is not None else None
+    if store is not None:
+        return store.data_uri(path, raw, mime_type)
+    cache = options.asset_cache if options is not None else None
+    if cache is None:
+        return f"data:{mime_type};base64,{base64.b64encode(raw).decode('ascii')}"
+    return cache.data_uri(path, raw, mime_type)
+
+
+def _data_uri_size(data_uri, options):
+    """返回_encode_data_uri的结果写入输出后的长度"""
+    store = options.splice_store if options is not None else None
+    return store.size(data_uri) if store is not None else len(data_uri)
+
+
+def _encoded_size(text, options):
+    """返回文本写入输出后的UTF-8字节数（包括其中资源占位符对应的载荷）"""
+    store = options.splice_store if options is not None else None
+    return store.encoded_size(text) if store is not None else len(text.encode('utf-8'))
+
+
+# 常见网页资源的MIME类型；命中时无需加载系统mimetypes数据库（Windows上需要读取注册表）
+COMMON_MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon',
+    '.bmp': 'image/bmp',
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.json': 'application/json',
+    '.html': 'text/html',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+    '.ttf': 'font/ttf',
+    '.otf': 'font/otf',
+}
+
+
+def guess_mime_type(path):
+    """
+    根据文件扩展名猜测MIME类型
 
-    此函数是HTML资源转换的主要入口，它会查找文件夹中的主HTML文件，
-    处理其中的图片、CSS和JavaScript资源，并将其合并为单个文件。
+    常见类型直接查表，其余类型才按需导入mimetypes模块。
+
+    Args:
+        path (str): 文件路径或URL
+
+    Returns:
+        str or None: MIME类型，无法识别时返回None
+    """
+    mime_type = COMMON_MIME_TYPES.get(os.path.splitext(path)[1].lower())
+    if mime_type is None:
+        import mimetypes
+        mime_type, _ = mimetypes.guess_type(path)
+    return mime_type
+
+
+# 资源类型在日志中的显示名称
+ASSET_LABELS = {
+    'image': '图片',
+    'css': 'CSS',
+    'js': 'JS',
+    'css-url': 'CSS引用资源',
+    'module': 'JS模块',
+    'frame': '嵌入文档',
+    'font': '字体',
+}
+
+# 匹配img标签、link标签(stylesheet)和script标签的正则表达式，分组1为引用地址
+IMG_PATTERN = re.compile(r'<img[^>]*src="([^"]+)"[^>]*>')
+CSS_PATTERN = re.compile(r'<link[^>]*rel="stylesheet"[^>]*href="([^"]+)"[^>]*>')
+JS_PATTERN = re.compile(r'<script[^>]*src="([^"]+)"[^>]*></script>')
+
+# 快速判断文档中是否有模块脚本或import map，没有时不加载module_graph模块
+MODULE_SCRIPT_PATTERN = re.compile(r'<script\b[^>]*\btype\s*=\s*["\']?(?:module|importmap)\b', re.IGNORECASE)
+
+# 快速判断文档中是否有iframe、object或embed标签，没有时不加载embedded_documents模块
+EMBED_TAG_PATTERN = re.compile(r'<(?:iframe|object|embed)\b', re.IGNORECASE)
+
+# 快速判断文档中是否包含响应式图片
+RESPONSIVE_IMAGE_PATTERN = re.compile(r'\ssrcset\s*=|<picture\b', re.IGNORECASE)
+
+# 匹配文档标题的正则表达式
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# 匹配样式表中url()引用的正则表达式
+CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+# 无法读取尺寸的懒加载图片使用的1x1透明GIF占位图
+LAZY_PLACEHOLDER = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+
+# 已知尺寸的懒加载图片使用同样尺寸的SVG占位图，图片加载前保持原有的布局大小，
+# 首屏以外的图片不会因为占位图塌缩而同时进入可视区域
+LAZY_SIZED_PLACEHOLDER = ("data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22"
+                          " width=%22{w}%22 height=%22{h}%22 viewBox=%220 0 {w} {h}%22/%3E")
+
+# 懒加载图片的标记属性与存储区ID前缀
+LAZY_ATTR = 'data-merge-lazy'
+LAZY_STORE_ID = 'html-merge-lazy'
+
+# 懒加载引导脚本：图片进入可视区域（或即将进入）时从惰性存储区取回数据并赋值给src
+LAZY_BOOTSTRAP = """<script>
+(function () {
+  var ATTR = '%(attr)s', PREFIX = '%(store)s-', store = null;
+  function payload(id) {
+    var tpl = document.getElementById(PREFIX + id);
+    if (tpl) { return tpl.content ? tpl.content.textContent : tpl.textContent; }
+    if (store === null) {
+      var s = document.getElementById('%(store)s-data');
+      store = s ? JSON.parse(s.textContent) : {};
+    }
+    return store[id];
+  }
+  function load(img) {
+    var id = img.getAttribute(ATTR);
+    if (id === null) { return; }
+    img.removeAttribute(ATTR);
+    var data = payload(id);
+    if (data) { img.src = data; }
+  }
+  var imgs = document.querySelectorAll('img[' + ATTR + ']');
+  if (!('IntersectionObserver' in window)) {
+    for (var i = 0; i < imgs.length; i++) { load(imgs[i]); }
+    return;
+  }
+  var io = new IntersectionObserver(function (entries) {
+    entries.forEach(function (e) {
+      if (e.isIntersecting) { io.unobserve(e.target); load(e.target); }
+    });
+  }, { rootMargin: '300px 0px' });
+  for (var j = 0; j < imgs.length; j++) { io.observe(imgs[j]); }
+})();
+</script>""" % {'attr': LAZY_ATTR, 'store': LAZY_STORE_ID}
+
+
+def convert_folder(folder_path, output_format='html', output_dir=None, options=None):
+    """
+    转换单个文件夹并返回结构化的转换结果
+
+    此函数是资源转换的核心实现：查找文件夹中的主HTML文件，依次内联图片、CSS和JS资源，
+    然后保存为HTML或MHTML文件。每个资源的处理情况、警告、各阶段耗时和输出大小
+    都记录在返回的ConversionResult中。
 
     Args:
         folder_path (str): 包含HTML文件和相关资源的文件夹路径
         output_format (str, optional): 输出文件格式，可选值为'html'或'mhtml'，默认为'html'
+        output_dir (str, optional): 输出目录路径，默认为None（保存在输入文件夹的同级目录）
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+
+    Returns:
+        ConversionResult: 转换结果，转换失败时output_file为None且error记录失败原因
     """
+    result = ConversionResult(folder_path=folder_path, output_format=output_format)
+
     # 获取文件夹名称作为输出文件名
-    folder_name = os.path.basename(folder_path)
-    output_file = os.path.join(os.path.dirname(folder_path), f"{folder_name}.{output_format}")
+    folder_name = os.path.basename(os.path.normpath(folder_path))
+    container = options.output_container if options is not None else None
+    if container is not None:
+        output_file = container.locator(folder_name)
+    else:
+        output_file = _output_file(folder_path, output_format, output_dir)
+    logger.info(f"准备转换文件夹: {folder_path} 到 {output_file}")
+
+    # 查找主HTML文件
+    main_html_path = find_main_html(folder_path)
+    if not main_html_path:
+        result.error = f"文件夹 {folder_path} 中未找到HTML文件"
+        _warn(result, result.error)
+        return result
+    result.main_html = main_html_path
+    logger.info(f"找到主HTML文件: {main_html_path}")
+
+    options, owned_fetcher = _prepare_remote_fetcher(_prepare_pipeline(_prepare_asset_cache(options)))
+    options, owned_store = _prepare_splice_store(options)
+    try:
+        html_content = _process_document(main_html_path, folder_path, options, result)
+        if html_content is None:
+            return result
+        _save_output(html_content, output_file, output_format, folder_name, options, result)
+    except ConversionCancelled:
+        result.cancelled = True
+        result.error = "转换已取消"
+        logger.info(f"转换已取消: {folder_path}")
+        return result
+    finally:
+        if owned_fetcher is not None:
+            owned_fetcher.close()
+        if owned_store is not None:
+            owned_store.close()
+    if result.output_file and options is not None and options.size_budget is not None:
+        _check_size_budget(result, options.size_budget)
+    return result
 
-    # 查找主HTML文件（通常是index.html）
-    html_files = [f for f in os.listdir(folder_path) if f.endswith('.html')]
-    if not html_files:
-        print(f"警告：文件夹 {folder_path} 中未找到HTML文件")
-        return
-        
-    # 优先选择index.html作为主文件，如果不存在则选择第一个找到的HTML文件
-    main_html = "index.html" if "index.html" in html_files else html_files[0]
-    main_html_path = os.path.join(folder_path, main_html)
-    print(f"找到主HTML文件: {main_html_path}")
+def _save_output(html_content, output_file, output_format, folder_name, options, result):
+    """保存为单个文件或写入输出容器，结果记录到result"""
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    reproducible = options is not None and options.reproducible
+    store = options.splice_store if options is not None else None
+    container = options.output_container if options is not None else None
+    try:
+        if container is not None:
+            _save_to_container(html_content, output_file, output_format, folder_name, options, result)
+            return
+        if output_format == 'mhtml':
+            if reproducible:
+                saved = save_as_mhtml(html_content, output_file,
+                                      document_title(html_content) or folder_name,
+                                      reproducible=True, date=_source_date(options, result),
+                                      splice_store=store)
+            else:
+                saved = save_as_mhtml(html_content, output_file, folder_name, splice_store=store)
+            if not saved:
+                result.error = f"保存MHTML文件失败: {output_file}"
+                return
+        elif store is not None:
+            store.write(html_content, output_file, newline='\n' if reproducible else None)
+        else:
+            with open(output_file, 'w', encoding='utf-8', newline='\n' if reproducible else None) as f:
+                f.write(html_content)
+        result.output_file = output_file
+        result.output_size = os.path.getsize(output_file)
+        logger.info(f"已成功转换并保存到: {output_file}")
+    except Exception as e:
+        result.error = f"保存文件失败: {str(e)}"
+        logger.error(result.error)
+    finally:
+        result.timings['write'] = time.perf_counter() - started
+        if options is not None and options.pipeline is not None:
+            from conversion_pipeline import STAGE_IO
+            options.pipeline.metrics.record('write', STAGE_IO, result.timings['write'],
+                                            time.thread_time() - cpu_started, chars_in=len(html_content))
+
+def _save_to_container(html_content, output_file, output_format, folder_name, options, result):
+    """把输出写入输出容器；内容统一使用\n换行，载荷按块拼接，不构造完整的文档字节串"""
+    store = options.splice_store
+    if output_format == 'mhtml':
+        reproducible = options.reproducible
+        title = (document_title(html_content) or folder_name) if reproducible else folder_name
+        html_content = build_mhtml(html_content, title, reproducible,
+                                   _source_date(options, result) if reproducible else None, store)
+    if store is not None:
+        chunks = store.iter_bytes(html_content)
+    else:
+        chunks = [html_content.encode('utf-8', 'surrogatepass')]
+    result.output_size = options.output_container.add(folder_name, output_format, chunks, result.folder_path)
+    result.output_file = output_file
+    logger.info(f"已成功转换并写入输出容器: {output_file}")
+
+def _check_size_budget(result, budget):
+    """按大小预算检查输出，超出时记录警告；预算要求失败时把转换结果记为失败（输出文件保留）"""
+    from output_analyzer import analyze_result
+
+    result.budget_violations = budget.check(analyze_result(result))
+    for violation in result.budget_violations:
+        _warn(result, f"超出大小预算 {result.output_file}: {violation}")
+    if result.budget_violations and budget.action == 'fail':
+        result.error = f"超出大小预算: {result.budget_violations[0]}"
+
+def _output_file(folder_path, output_format, output_dir):
+    """返回文件夹的输出文件路径：输出目录（默认为输入文件夹的同级目录）下的<文件夹名>.<格式>"""
+    folder_name = os.path.basename(os.path.normpath(folder_path))
+    if output_dir:
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = output_dir
+    else:
+        output_path = os.path.dirname(os.path.normpath(folder_path))
+    return os.path.join(output_path, f"{folder_name}.{output_format}")
+
+def document_title(html_content):
+    """
+    提取文档的title，多个空白字符合并为一个空格
+
+    Args:
+        html_content (str): HTML内容字符串
+
+    Returns:
+        str: 文档标题，没有title时返回空字符串
+    """
+    match = TITLE_PATTERN.search(html_content)
+    return ' '.join(match.group(1).split()) if match else ''
 
+def _source_date(options, result):
+    """
+    返回可复现模式下MHTML使用的日期（Unix时间戳）
+
+    依次取options.source_date_epoch、环境变量SOURCE_DATE_EPOCH、
+    主HTML文件和已内联的本地资源中最新的修改时间。
+    """
+    if options.source_date_epoch is not None:
+        return int(options.source_date_epoch)
+    env = os.environ.get('SOURCE_DATE_EPOCH')
+    if env and env.isdigit():
+        return int(env)
+    paths = [result.main_html] + [a.path for a in result.assets
+                                  if a.status == STATUS_INLINED and not _is_remote(a.path)]
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(int(os.path.getmtime(path)))
+        except (OSError, TypeError):
+            continue
+    return max(mtimes, default=0)
+
+def _process_document(main_html_path, folder_path, options, result, embed_stack=()):
+    """
+    读取主HTML文件并依次内联图片、CSS、JS资源和嵌入的子文档
+
+    Args:
+        main_html_path (str): 主HTML文件路径
+        folder_path (str): 资源相对路径的基础文件夹
+        options (ConversionOptions or None): 转换选项
+        result (ConversionResult): 用于收集资源记录和阶段耗时的转换结果
+        embed_stack (tuple, optional): 正在处理的上级文档路径，用于检测循环嵌入，默认为空
+
+    Returns:
+        str or None: 处理后的HTML内容，读取失败时返回None
+
+    Raises:
+        ConversionCancelled: 转换过程中任务被取消
+    """
     # 读取HTML内容
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
     try:
         with open(main_html_path, 'r', encoding='utf-8', errors='ignore') as f:
             html_content = f.read()
-        print(f"已读取HTML内容，长度: {len(html_content)} 字符")
+        logger.info(f"已读取HTML内容，长度: {len(html_content)} 字符")
     except Exception as e:
-        print(f"读取HTML文件失败: {str(e)}")
-        return
+        result.error = f"读取HTML文件失败: {str(e)}"
+        logger.error(result.error)
+        return None
+    result.timings['read'] = time.perf_counter() - started
+
+    # 依次执行图片、CSS、模块图、JS和子文档等处理阶段（见conversion_pipeline模块）
+    from conversion_pipeline import STAGE_IO, StageContext
+    options = _prepare_pipeline(options)
+    if not embed_stack:
+        options.pipeline.metrics.record('read', STAGE_IO, result.timings['read'],
+                                        time.thread_time() - cpu_started, chars_out=len(html_content))
+    context = StageContext(main_html_path, folder_path, options, result, embed_stack)
+    html_content = options.pipeline.run(html_content, context)
+    return html_content
+
+def convert_folder_to_single_html(folder_path, output_format='html', options=None):
+    """
+    将包含资源的HTML文件夹转换为单个HTML或MHTML文件
+
+    输出文件保存在输入文件夹的同级目录，文件名与文件夹同名。
+
+    Args:
+        folder_path (str): 包含HTML文件和相关资源的文件夹路径
+        output_format (str, optional): 输出文件格式，可选值为'html'或'mhtml'，默认为'html'
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+
+    Returns:
+        ConversionResult: 转换结果
+    """
+    return convert_folder(folder_path, output_format, None, options)
+
+def find_main_html(folder_path):
+    """
+    查找文件夹中的主HTML文件
+
+    优先选择index.html作为主文件，如果不存在则选择按文件名排序的第一个HTML文件。
+
+    Args:
+        folder_path (str): 要查找的文件夹路径
+
+    Returns:
+        str or None: 主HTML文件路径，未找到HTML文件时返回None
+    """
+    # 排序后选择，使结果不依赖文件系统的目录项顺序
+    html_files = sorted(f for f in os.listdir(folder_path) if f.endswith('.html'))
+    if not html_files:
+        return None
+    main_html = "index.html" if "index.html" in html_files else html_files[0]
+    return os.path.join(folder_path, main_html)
+
+def _warn(result, message):
+    """记录一条警告日志，并在提供了转换结果时追加到其警告列表"""
+    logger.warning(message)
+    if result is not None:
+        result.warnings.append(message)
+
+def _record(result, record):
+    """在提供了转换结果时追加一条资源处理记录"""
+    if result is not None:
+        result.assets.append(record)
+
+def _prepare_remote_fetcher(options):
+    """
+    在启用了远程资源下载但没有共享下载器时创建一个下载器
+
+    Args:
+        options (ConversionOptions or None): 转换选项
+
+    Returns:
+        tuple: (转换选项, 新创建的下载器或None)；调用方负责关闭新创建的下载器
+    """
+    if options is None or not options.fetch_remote or options.remote_fetcher is not None:
+        return options, None
+    from remote_fetcher import RemoteFetcher
+    fetcher = RemoteFetcher(cache_dir=options.http_cache_dir,
+                            max_per_host=options.http_max_per_host,
+                            timeout=options.http_timeout)
+    return dataclasses.replace(options, remote_fetcher=fetcher), fetcher
+
+def _remote_fetcher(options):
+    """返回可用的远程资源下载器，未启用远程资源下载时返回None"""
+    if options is not None and options.fetch_remote:
+        return options.remote_fetcher
+    return None
+
+def _is_remote(reference):
+    """判断引用地址是否为远程URL"""
+    return reference.startswith(('http://', 'https://'))
+
+def _prefetch_remote(pattern, html_content, options):
+    """启用远程资源下载时，在逐个替换之前并发预取文档中的全部远程引用"""
+    fetcher = _remote_fetcher(options)
+    if fetcher is not None:
+        fetcher.prefetch(m.group(1) for m in pattern.finditer(html_content)
+                         if _is_remote(m.group(1)))
+
+def prefetch_assets(html_content, base_folder, options=None):
+    """
+    预先读取文档中img、样式表和脚本引用的资源，放入资源缓存
 
-    # 处理图片资源
-    html_content = replace_images(html_content, folder_path)
+    只读取存在的本地文件和已下载完成的远程资源，不写入处理记录；缺失或失败的资源
+    在后续替换时按原来的方式记录。之后的替换阶段从缓存取得内容，主要是编码和改写文档的CPU工作。
 
-    # 处理CSS资源
-    html_content = replace_css(html_content, folder_path)
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项；没有资源缓存时只预取远程资源
+    """
+    cache = options.asset_cache if options is not None else None
+    fetcher = _remote_fetcher(options)
+    remote = []
+    for pattern in (IMG_PATTERN, CSS_PATTERN, JS_PATTERN):
+        for match in pattern.finditer(html_content):
+            reference = match.group(1)
+            if reference.startswith('data:'):
+                continue
+            if _is_remote(reference):
+                remote.append(reference)
+                continue
+            if cache is None:
+                continue
+            path = os.path.normpath(os.path.join(base_folder, reference))
+            key = os.path.abspath(path)
+            if key in cache or not os.path.isfile(path):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    cache.put(key, (path, f.read(), guess_mime_type(path)))
+            except OSError:
+                continue
+    if fetcher is not None and remote:
+        fetcher.prefetch(remote)
+        for url in remote:
+            _checkpoint(options)
+            try:
+                fetcher.fetch(url)
+            except Exception:
+                # 失败在替换阶段重新获取结果时记录
+                pass
+
+def _load_asset(kind, reference, base_folder, options, result):
+    """
+    读取资源的原始内容
+
+    本地资源相对base_folder解析；远程资源在启用下载时通过共享的下载器获取，否则跳过。
+    无法获取的资源会写入相应的处理记录和警告。配置了资源缓存时，同一个资源只读取一次。
 
-    # 处理JS资源
-    html_content = replace_js(html_content, folder_path)
+    Args:
+        kind (str): 资源类型，'image'、'css'或'js'
+        reference (str): HTML中的引用地址
+        base_folder (str): 解析相对路径的基础文件夹
+        options (ConversionOptions or None): 转换选项
+        result (ConversionResult or None): 用于收集资源处理记录的转换结果
 
-    # 保存为单个文件
+    Returns:
+        tuple or None: (解析后的路径或URL, 原始字节, MIME类型或None)，无法获取时返回None
+    """
+    cache = options.asset_cache if options is not None else None
+    key = reference if _is_remote(reference) else os.path.abspath(os.path.join(base_folder, reference))
+    asset = cache.get(key) if cache is not None else None
+    if asset is None:
+        asset = _read_asset(kind, reference, base_folder, options, result)
+        if asset is not None and cache is not None:
+            cache.put(key, asset)
+    if asset is not None and options is not None and options.progress is not None:
+        options.progress.advance(len(asset[1]), asset[0])
+    return asset
+
+def _read_asset(kind, reference, base_folder, options, result):
+    """读取资源，参数和返回值同_load_asset"""
+    if _is_remote(reference):
+        fetcher = _remote_fetcher(options)
+        if fetcher is None:
+            _record(result, AssetRecord(kind, reference, reference, STATUS_SKIPPED))
+            return None
+        try:
+            fetched = fetcher.fetch(reference)
+        except Exception as e:
+            _warn(result, f"下载远程资源失败 {reference}: {str(e)}")
+            _record(result, AssetRecord(kind, reference, reference, STATUS_FAILED, error=str(e)))
+            return None
+        return reference, fetched.body, fetched.content_type or guess_mime_type(urlsplit(reference).path)
+
+    # 构建完整路径
+    path = os.path.normpath(os.path.join(base_folder, reference))
+    if not os.path.exists(path):
+        _warn(result, f"警告：{ASSET_LABELS[kind]}文件不存在 {path}")
+        _record(result, AssetRecord(kind, reference, path, STATUS_MISSING))
+        return None
     try:
-        if output_format == 'mhtml':
-            save_as_mhtml(html_content, output_file, folder_name)
-        else:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-        print(f"已成功转换并保存到: {output_file}")
+        with open(path, 'rb') as f:
+            raw = f.read()
     except Exception as e:
-        print(f"保存文件失败: {str(e)}")
+        _warn(result, f"处理{ASSET_LABELS[kind]}文件失败 {path}: {str(e)}")
+        _record(result, AssetRecord(kind, reference, path, STATUS_FAILED, error=str(e)))
+        return None
+    return path, raw, guess_mime_type(path)
 
-def replace_images(html_content, base_folder):
+def replace_images(html_content, base_folder, options=None, result=None):
     """
     将HTML内容中的img标签的src属性替换为base64编码
 
     此函数会查找HTML中所有的img标签，将本地图片文件转换为base64编码并嵌入到HTML中，
-    从而实现图片资源的内联。
+    从而实现图片资源的内联。启用懒加载选项时，首屏以外的图片数据会被移入惰性存储区。
 
     Args:
         html_content (str): HTML内容字符串
         base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
 
     Returns:
         str: 处理后的HTML内容字符串
     """
-    # 匹配img标签的正则表达式
-    img_pattern = re.compile(r'<img[^>]*src="([^"]+)"[^>]*>')
+    options = options or ConversionOptions()
+    img_pattern = IMG_PATTERN
     processed_count = 0
+    lazy_payloads = []
+    # 同一张图片多次使用时共用一份懒加载数据
+    lazy_index = {}
+    _prefetch_remote(img_pattern, html_content, options)
 
     def replace_func(match):
         nonlocal processed_count
+        _checkpoint(options)
         src = match.group(1)
-        # 跳过绝对路径和已处理的base64图片
-        if src.startswith(('http://', 'https://', 'data:')):
+        # 跳过已处理的base64图片
+        if src.startswith('data:'):
             return match.group(0)
-            
-        # 构建完整路径
-        img_path = os.path.join(base_folder, src)
-        img_path = os.path.normpath(img_path)
 
-        if not os.path.exists(img_path):
-            print(f"警告：图片文件不存在 {img_path}")
+        asset = _load_asset('image', src, base_folder, options, result)
+        if asset is None:
             return match.group(0)
-            
+        img_path, raw, mime_type = asset
+
         # 转换为base64
-        mime_type, _ = mimetypes.guess_type(img_path)
-        if not mime_type:
-            mime_type = 'image/unknown'
-            
-        try:
-            with open(img_path, 'rb') as f:
-                base64_data = base64.b64encode(f.read()).decode('utf-8')
-            processed_count += 1
-            print(f"已处理图片: {img_path}")
-            return f'<img{match.group(0)[4:-1].replace(src, f"data:{mime_type};base64,{base64_data}")}>'
-        except Exception as e:
-            print(f"处理图片失败 {img_path}: {str(e)}")
-            return match.group(0)
+        processed_count += 1
+        logger.debug(f"已处理图片: {img_path}")
+        data_uri = _encode_data_uri(img_path, raw, mime_type or 'image/unknown', options)
+        _record(result, AssetRecord('image', src, img_path, STATUS_INLINED, len(raw),
+                                    _data_uri_size(data_uri, options), 'base64',
+                                    mime_type or 'image/unknown'))
+        if not options.lazy_images:
+            return f'<img{match.group(0)[4:-1].replace(src, data_uri)}>'
+
+        # 懒加载模式：首屏图片直接内联，其余图片替换为占位图并把数据移入存储区
+        if processed_count <= options.lazy_eager_count:
+            return _add_img_attributes(match.group(0).replace(src, data_uri),
+                                       {'decoding': 'async'})
+        index = lazy_index.get(img_path)
+        if index is None:
+            index = lazy_index[img_path] = len(lazy_payloads)
+            lazy_payloads.append(data_uri)
+        size = image_size(raw)
+        placeholder = LAZY_SIZED_PLACEHOLDER.format(w=size[0], h=size[1]) if size else LAZY_PLACEHOLDER
+        return _add_img_attributes(match.group(0).replace(src, placeholder), {
+            'decoding': 'async',
+            LAZY_ATTR: str(index),
+        })
+
+    html_content = img_pattern.sub(replace_func, html_content)
+    logger.info(f"总计处理图片数量: {processed_count}")
+    if lazy_payloads:
+        html_content = inject_lazy_loader(html_content, lazy_payloads, options.lazy_store)
+        logger.info(f"懒加载图片数量: {len(lazy_payloads)}")
+    return html_content
+
+def image_size(raw):
+    """
+    从图片文件头读取固有尺寸
 
-    result = img_pattern.sub(replace_func, html_content)
-    print(f"总计处理图片数量: {processed_count}")
-    return result
+    支持PNG、GIF、JPEG（按EXIF方向交换宽高）、WebP和带width/height或viewBox的SVG。
+
+    Args:
+        raw (bytes): 图片内容
+
+    Returns:
+        tuple or None: (宽, 高)，无法识别时返回None
+    """
+    try:
+        if raw[:8] == b'\x89PNG\r\n\x1a\n':
+            size = struct.unpack('>II', raw[16:24])
+        elif raw[:6] in (b'GIF87a', b'GIF89a'):
+            size = struct.unpack('<HH', raw[6:10])
+        elif raw[:2] == b'\xff\xd8':
+            size = _jpeg_size(raw)
+        elif raw[:4] == b'RIFF' and raw[8:12] == b'WEBP':
+            size = _webp_size(raw)
+        else:
+            size = _svg_size(raw)
+    except (struct.error, IndexError, ValueError):
+        return None
+    if not size or size[0] <= 0 or size[1] <= 0:
+        return None
+    return size
+
+def _jpeg_size(raw):
+    """读取JPEG的SOF尺寸，EXIF方向为5-8（旋转90度）时交换宽高"""
+    position = 2
+    rotated = False
+    while position + 4 <= len(raw):
+        if raw[position] != 0xFF:
+            return None
+        marker = raw[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        length = struct.unpack('>H', raw[position + 2:position + 4])[0]
+        if marker == 0xE1 and raw[position + 4:position + 10] == b'Exif\x00\x00':
+            rotated = _exif_orientation(raw[position + 10:position + 2 + length]) in (5, 6, 7, 8)
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', raw[position + 5:position + 9])
+            return (height, width) if rotated else (width, height)
+        position += 2 + length
+    return None
+
+def _exif_orientation(tiff):
+    """读取EXIF（TIFF结构）IFD0中的方向标签，不存在时返回1"""
+    endian = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if endian is None:
+        return 1
+    offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+    count = struct.unpack(endian + 'H', tiff[offset:offset + 2])[0]
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        if struct.unpack(endian + 'H', tiff[entry:entry + 2])[0] == 0x0112:
+            return struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+    return 1
+
+def _webp_size(raw):
+    """读取WebP（VP8、VP8L或VP8X）的画布尺寸"""
+    chunk = raw[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', raw[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = int.from_bytes(raw[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return int.from_bytes(raw[24:27], 'little') + 1, int.from_bytes(raw[27:30], 'little') + 1
+    return None
+
+SVG_TAG_PATTERN = re.compile(rb'<svg\b[^>]*>', re.IGNORECASE)
+SVG_LENGTH_PATTERN = re.compile(rb'\s(width|height)\s*=\s*["\']\s*([\d.]+)\s*(?:px)?\s*["\']')
+SVG_VIEWBOX_PATTERN = re.compile(rb'\sviewBox\s*=\s*["\']\s*[-\d.]+[\s,]+[-\d.]+[\s,]+([\d.]+)[\s,]+([\d.]+)')
+
+def _svg_size(raw):
+    """读取SVG根元素的像素宽高，没有时使用viewBox的宽高"""
+    tag = SVG_TAG_PATTERN.search(raw[:4096])
+    if tag is None:
+        return None
+    lengths = {m.group(1): float(m.group(2)) for m in SVG_LENGTH_PATTERN.finditer(tag.group(0))}
+    if b'width' in lengths and b'height' in lengths:
+        return round(lengths[b'width']), round(lengths[b'height'])
+    viewbox = SVG_VIEWBOX_PATTERN.search(tag.group(0))
+    if viewbox is None:
+        return None
+    return round(float(viewbox.group(1))), round(float(viewbox.group(2)))
+
+def _add_img_attributes(tag, attributes):
+    """
+    向img标签添加属性，已存在的同名属性保持不变
+
+    Args:
+        tag (str): 完整的img标签字符串
+        attributes (dict): 要添加的属性名到属性值的映射
+
+    Returns:
+        str: 添加属性后的img标签字符串
+    """
+    extra = ''.join(f' {name}="{value}"' for name, value in attributes.items()
+                    if not re.search(rf'\s{re.escape(name)}\s*=', tag))
+    if tag.endswith('/>'):
+        return f'{tag[:-2].rstrip()}{extra} />'
+    return f'{tag[:-1]}{extra}>'
+
+def inject_lazy_loader(html_content, payloads, store='template'):
+    """
+    将懒加载图片数据存储区和引导脚本注入HTML
+
+    存储区和引导脚本放在</body>之前；如果文档没有</body>则追加到末尾。
+    template元素和JSON脚本块中的内容都是惰性的，浏览器不会在加载时解码其中的图片数据。
 
-def replace_css(html_content, base_folder):
+    Args:
+        html_content (str): HTML内容字符串
+        payloads (list): 按懒加载编号排列的图片data URI列表
+        store (str, optional): 存储方式，'template'或'script'，默认为'template'
+
+    Returns:
+        str: 注入后的HTML内容字符串
+    """
+    if store == 'script':
+        # JSON中转义'<'，防止数据提前结束script块
+        data = json.dumps({str(i): uri for i, uri in enumerate(payloads)}).replace('<', '\\u003c')
+        store_html = f'<script type="application/json" id="{LAZY_STORE_ID}-data">{data}</script>\n'
+    else:
+        store_html = ''.join(f'<template id="{LAZY_STORE_ID}-{i}">{uri}</template>\n'
+                             for i, uri in enumerate(payloads))
+    injection = store_html + LAZY_BOOTSTRAP + '\n'
+
+    body_end = html_content.lower().rfind('</body>')
+    if body_end == -1:
+        return html_content + '\n' + injection
+    return html_content[:body_end] + injection + html_content[body_end:]
+
+def replace_css(html_content, base_folder, options=None, result=None):
     """
     将HTML内容中的link标签引用的CSS文件替换为内联style标签
 
@@ -136,44 +1051,122 @@ def replace_css(html_content, base_folder):
     Args:
         html_content (str): HTML内容字符串
         base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
 
     Returns:
         str: 处理后的HTML内容字符串
     """
-    # 匹配link标签(stylesheet)的正则表达式
-    css_pattern = re.compile(r'<link[^>]*rel="stylesheet"[^>]*href="([^"]+)"[^>]*>')
+    css_pattern = CSS_PATTERN
     processed_count = 0
+    _prefetch_remote(css_pattern, html_content, options)
+
+    # 启用CSS裁剪或字体子集化时先读取全部样式表：@keyframes和@font-face可能在另一个样式表中被引用，
+    # 图标字体用到的字符只出现在样式表的content属性中
+    loaded = {}
+    pruned = {}
+    stylesheets = {}
+    prune = options is not None and options.prune_css
+    subset = options is not None and options.subset_fonts
+    if prune or subset:
+        for match in css_pattern.finditer(html_content):
+            href = match.group(1)
+            if href.startswith('data:') or href in loaded:
+                continue
+            loaded[href] = _load_asset('css', href, base_folder, options, result)
+            if loaded[href] is not None:
+                stylesheets[href] = loaded[href][1].decode('utf-8', errors='ignore')
+    if prune:
+        from css_pruner import prune_stylesheets
+        html_content, pruned = prune_stylesheets(html_content, stylesheets, options)
+
+    # 启用字体子集化时，先收集页面和样式表用到的字符，再处理文档中原有<style>块里的@font-face
+    characters = None
+    if subset:
+        from font_subsetter import collect_used_characters, subset_inline_style_fonts
+        characters = collect_used_characters(html_content, options.font_extra_chars,
+                                             [pruned.get(href, css) for href, css in stylesheets.items()])
+        html_content = subset_inline_style_fonts(html_content, base_folder, characters, options, result)
 
     def replace_func(match):
         nonlocal processed_count
+        _checkpoint(options)
         href = match.group(1)
-        # 跳过绝对路径和数据URL
-        if href.startswith(('http://', 'https://', 'data:')):
+        # 跳过数据URL
+        if href.startswith('data:'):
             return match.group(0)
-            
-        # 构建完整路径
-        css_path = os.path.join(base_folder, href)
-        css_path = os.path.normpath(css_path)
 
-        if not os.path.exists(css_path):
-            print(f"警告：CSS文件不存在 {css_path}")
-            return match.group(0)
-            
-        try:
-            with open(css_path, 'r', encoding='utf-8', errors='ignore') as f:
-                css_content = f.read()
-            processed_count += 1
-            print(f"已处理CSS文件: {css_path}")
-            return f'<style>\n{css_content}\n</style>'
-        except Exception as e:
-            print(f"处理CSS文件失败 {css_path}: {str(e)}")
+        if href in loaded:
+            asset = loaded[href]
+        else:
+            asset = _load_asset('css', href, base_folder, options, result)
+        if asset is None:
             return match.group(0)
+        css_path, raw, _ = asset
+
+        css_content = pruned[href] if href in pruned else raw.decode('utf-8', errors='ignore')
+        if characters is not None:
+            from font_subsetter import subset_stylesheet_fonts
+            css_content = subset_stylesheet_fonts(
+                css_content, href if _is_remote(href) else os.path.dirname(css_path),
+                characters, options, result, parent=css_path)
+        if _is_remote(href):
+            css_content = inline_remote_css_urls(css_content, href, options, result)
+        processed_count += 1
+        logger.debug(f"已处理CSS文件: {css_path}")
+        replacement = f'<style>\n{css_content}\n</style>'
+        _record(result, AssetRecord('css', href, css_path, STATUS_INLINED, len(raw),
+                                    _encoded_size(replacement, options), 'utf-8', 'text/css'))
+        return replacement
+
+    html_content = css_pattern.sub(replace_func, html_content)
+    logger.info(f"总计处理CSS文件数量: {processed_count}")
+    return html_content
+
+def inline_remote_css_urls(css_content, css_url, options, result=None):
+    """
+    内联远程样式表中url()引用的资源（字体、背景图等）
 
-    result = css_pattern.sub(replace_func, html_content)
-    print(f"总计处理CSS文件数量: {processed_count}")
-    return result
+    样式表内联到页面后，其中的相对地址会失去原来的基准URL，因此先按样式表的URL
+    解析为绝对地址；启用远程资源下载时再下载并替换为data URI，下载失败的保留绝对地址。
+
+    Args:
+        css_content (str): 样式表内容
+        css_url (str): 样式表的URL
+        options (ConversionOptions or None): 转换选项
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+
+    Returns:
+        str: 处理后的样式表内容
+    """
+    fetcher = _remote_fetcher(options)
+    references = {}
+    for m in CSS_URL_PATTERN.finditer(css_content):
+        ref = m.group(2).strip()
+        if ref and not ref.startswith(('data:', '#')):
+            references[ref] = urljoin(css_url, ref)
+    if fetcher is not None:
+        fetcher.prefetch(url for url in references.values() if _is_remote(url))
 
-def replace_js(html_content, base_folder):
+    def replace_func(match):
+        ref = match.group(2).strip()
+        absolute = references.get(ref)
+        if absolute is None:
+            return match.group(0)
+        asset = _load_asset('css-url', absolute, '', options, result) if _is_remote(absolute) else None
+        if asset is None:
+            return f'url("{absolute}")'
+        url, raw, mime_type = asset
+        mime_type = mime_type or 'application/octet-stream'
+        data_uri = _encode_data_uri(url, raw, mime_type, options)
+        _record(result, AssetRecord('css-url', absolute, url, STATUS_INLINED, len(raw),
+                                    _data_uri_size(data_uri, options), 'base64', mime_type,
+                                    parent=css_url))
+        return f'url("{data_uri}")'
+
+    return CSS_URL_PATTERN.sub(replace_func, css_content)
+
+def replace_js(html_content, base_folder, options=None, result=None):
     """
     将HTML内容中的script标签引用的JS文件替换为内联脚本
 
@@ -183,61 +1176,123 @@ def replace_js(html_content, base_folder):
     Args:
         html_content (str): HTML内容字符串
         base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
 
     Returns:
         str: 处理后的HTML内容字符串
     """
-    # 匹配script标签的正则表达式
-    js_pattern = re.compile(r'<script[^>]*src="([^"]+)"[^>]*></script>')
+    js_pattern = JS_PATTERN
     processed_count = 0
+    _prefetch_remote(js_pattern, html_content, options)
 
     def replace_func(match):
         nonlocal processed_count
+        _checkpoint(options)
         src = match.group(1)
-        # 跳过绝对路径和数据URL
-        if src.startswith(('http://', 'https://', 'data:')):
+        # 跳过数据URL；模块脚本由replace_modules处理，内联为普通脚本会破坏import语句
+        if src.startswith('data:') or MODULE_SCRIPT_PATTERN.match(match.group(0)):
             return match.group(0)
-            
-        # 构建完整路径
-        js_path = os.path.join(base_folder, src)
-        js_path = os.path.normpath(js_path)
 
-        if not os.path.exists(js_path):
-            print(f"警告：JS文件不存在 {js_path}")
-            return match.group(0)
-            
-        try:
-            with open(js_path, 'r', encoding='utf-8', errors='ignore') as f:
-                js_content = f.read()
-            processed_count += 1
-            print(f"已处理JS文件: {js_path}")
-            return f'<script>\n{js_content}\n</script>'
-        except Exception as e:
-            print(f"处理JS文件失败 {js_path}: {str(e)}")
+        asset = _load_asset('js', src, base_folder, options, result)
+        if asset is None:
             return match.group(0)
+        js_path, raw, _ = asset
+
+        js_content = raw.decode('utf-8', errors='ignore')
+        processed_count += 1
+        logger.debug(f"已处理JS文件: {js_path}")
+        replacement = f'<script>\n{js_content}\n</script>'
+        _record(result, AssetRecord('js', src, js_path, STATUS_INLINED, len(raw),
+                                    len(replacement.encode('utf-8')), 'utf-8',
+                                    'text/javascript'))
+        return replacement
+
+    html_content = js_pattern.sub(replace_func, html_content)
+    logger.info(f"总计处理JS文件数量: {processed_count}")
+    return html_content
+
+def replace_responsive_images(html_content, base_folder, options=None, result=None):
+    """
+    按目标视口从srcset和<picture>中选出候选图片，改写为只引用选中的候选
 
-    result = js_pattern.sub(replace_func, html_content)
-    print(f"总计处理JS文件数量: {processed_count}")
-    return result
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
 
-def save_as_mhtml(html_content, output_file, title):
+    Returns:
+        str: 处理后的HTML内容字符串
     """
-    将HTML内容保存为MHTML格式
+    if (options is None or not options.responsive_images) \
+            or not RESPONSIVE_IMAGE_PATTERN.search(html_content):
+        return html_content
+    from responsive_images import inline_responsive_images
+    return inline_responsive_images(html_content, base_folder, options, result)
 
-    MHTML(MIME HTML)是一种将HTML文档及其所有资源(图片、CSS、JS等)
-    打包成单个文件的格式。此函数将处理后的HTML内容保存为MHTML格式。
+def replace_modules(html_content, base_folder, options=None, result=None):
+    """
+    将HTML内容中的ES模块脚本及其依赖的模块图内联到import map中
 
     Args:
-        html_content (str): 处理后的HTML内容字符串
-        output_file (str): 输出文件路径
-        title (str): MHTML文件的标题
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+
+    Returns:
+        str: 处理后的HTML内容字符串
     """
-    import time
-    # 生成唯一的边界标识符
-    boundary = "----=MHTMLBoundary" + base64.b64encode(os.urandom(16)).decode('utf-8')
+    if (options is None or not options.inline_modules) \
+            or not MODULE_SCRIPT_PATTERN.search(html_content):
+        return html_content
+    from module_graph import inline_module_graph
+    return inline_module_graph(html_content, base_folder, options, result)
 
-    # 生成符合RFC 822格式的日期字符串
-    date_str = time.strftime('%a, %d %b %Y %H:%M:%S %z', time.localtime())
+def replace_embeds(html_content, base_folder, options=None, result=None, embed_stack=()):
+    """
+    递归内联HTML内容中iframe、object和embed引用的本地子文档
+
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+        embed_stack (tuple, optional): 当前文档及其上级文档的绝对路径，默认为空
+
+    Returns:
+        str: 处理后的HTML内容字符串
+    """
+    if (options is None or not options.inline_embeds) \
+            or not EMBED_TAG_PATTERN.search(html_content):
+        return html_content
+    from embedded_documents import inline_embedded_documents
+    return inline_embedded_documents(html_content, base_folder, options, result, embed_stack)
+
+def build_mhtml(html_content, title, reproducible=False, date=None, splice_store=None):
+    """
+    构建MHTML文档内容，参数含义与save_as_mhtml相同
+
+    Returns:
+        str: MHTML文档内容（使用\n换行）
+    """
+    if reproducible:
+        # 边界标识符由内容决定，日期固定，相同输入生成相同的字节
+        digest = hashlib.sha256()
+        if splice_store is not None:
+            # 按拼接载荷后的内容计算，与不使用载荷存储时的边界相同
+            splice_store.update_hash(digest, f"{title}\n{html_content}")
+        else:
+            digest.update(f"{title}\n{html_content}".encode('utf-8', 'surrogatepass'))
+        boundary = "----=MHTMLBoundary" + digest.hexdigest()[:32]
+        date_str = time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(date or 0))
+    else:
+        # 生成唯一的边界标识符
+        boundary = "----=MHTMLBoundary" + base64.b64encode(os.urandom(16)).decode('utf-8')
+
+        # 生成符合RFC 822格式的日期字符串
+        date_str = time.strftime('%a, %d %b %Y %H:%M:%S %z', time.localtime())
 
     # 构建MHTML内容
     mhtml = f"""From: <saved by html_converter.py>
@@ -257,150 +1312,291 @@ Content-Location: index.html
 
 --{boundary}--
 """
-    
+    return mhtml
+
+def save_as_mhtml(html_content, output_file, title, reproducible=False, date=None, splice_store=None):
+    """
+    将HTML内容保存为MHTML格式
+
+    MHTML(MIME HTML)是一种将HTML文档及其所有资源(图片、CSS、JS等)
+    打包成单个文件的格式。此函数将处理后的HTML内容保存为MHTML格式。
+
+    Args:
+        html_content (str): 处理后的HTML内容字符串
+        output_file (str): 输出文件路径
+        title (str): MHTML文件的标题
+        reproducible (bool, optional): 是否生成可复现的输出，默认为False。启用后边界标识符
+            由标题和内容的哈希生成，日期使用date参数并以UTC表示，文件统一使用\n换行
+        date (int, optional): 可复现模式下的日期（Unix时间戳），默认为None（使用0）
+        splice_store (SpliceStore, optional): html_content中资源占位符对应的载荷存储，
+            写出时拼接载荷（见output_splicer模块），默认为None
+
+    Returns:
+        bool: 保存成功返回True，失败返回False
+    """
+    mhtml = build_mhtml(html_content, title, reproducible, date, splice_store)
+
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(mhtml)
-        print(f"已保存为MHTML格式: {output_file}")
+        if splice_store is not None:
+            splice_store.write(mhtml, output_file, newline='\n' if reproducible else None)
+        else:
+            with open(output_file, 'w', encoding='utf-8', newline='\n' if reproducible else None) as f:
+                f.write(mhtml)
+        logger.info(f"已保存为MHTML格式: {output_file}")
+        return True
     except Exception as e:
-        print(f"保存MHTML文件失败: {str(e)}")
+        logger.error(f"保存MHTML文件失败: {str(e)}")
+        return False
 
-def convert_single_folder(folder_path, output_format='html', output_dir=None):
+def convert_single_folder(folder_path, output_format='html', output_dir=None, options=None):
     """
     转换单个文件夹为HTML或MHTML文件
 
-    此函数与convert_folder_to_single_html功能相似，但增加了输出目录的选项，
-    并返回输出文件路径。
+    此函数是convert_folder的简化封装，只返回输出文件路径。
+    需要资源明细、警告或耗时信息时请直接使用convert_folder。
 
     Args:
         folder_path (str): 包含HTML文件和相关资源的文件夹路径
         output_format (str, optional): 输出文件格式，可选值为'html'或'mhtml'，默认为'html'
         output_dir (str, optional): 输出目录路径，默认为None（保存在输入文件夹的同级目录）
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
 
     Returns:
         str or None: 成功转换后返回输出文件路径，失败则返回None
     """
-    # 获取文件夹名称作为输出文件名
-    folder_name = os.path.basename(folder_path)
+    return convert_folder(folder_path, output_format, output_dir, options).output_file
 
-    # 确定输出目录
-    if output_dir:
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = output_dir
-    else:
-        output_path = os.path.dirname(folder_path)
-        
-    output_file = os.path.join(output_path, f"{folder_name}.{output_format}")
-    print(f"准备转换文件夹: {folder_path} 到 {output_file}")
+def list_batch_items(folder_path):
+    """
+    列出批量转换需要处理的文件夹
 
-    # 查找主HTML文件（通常是index.html）
-    html_files = [f for f in os.listdir(folder_path) if f.endswith('.html')]
-    if not html_files:
-        print(f"警告：文件夹 {folder_path} 中未找到HTML文件")
-        return None
-        
-    # 优先选择index.html作为主文件，如果不存在则选择第一个找到的HTML文件
-    main_html = "index.html" if "index.html" in html_files else html_files[0]
-    main_html_path = os.path.join(folder_path, main_html)
-    print(f"找到主HTML文件: {main_html_path}")
+    如果文件夹包含子文件夹且自身没有HTML文件，则按名称顺序返回所有子文件夹；
+    否则只返回文件夹本身。
 
-    # 读取HTML内容
-    try:
-        with open(main_html_path, 'r', encoding='utf-8', errors='ignore') as f:
-            html_content = f.read()
-        print(f"已读取HTML内容，长度: {len(html_content)} 字符")
-    except Exception as e:
-        print(f"读取HTML文件失败: {str(e)}")
-        return None
-
-    # 处理图片资源
-    html_content = replace_images(html_content, folder_path)
+    Args:
+        folder_path (str): 要处理的文件夹路径
 
-    # 处理CSS资源
-    html_content = replace_css(html_content, folder_path)
+    Returns:
+        list: 需要转换的文件夹路径列表
+    """
+    # 检查是否存在子文件夹
+    subfolders = sorted(item for item in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, item)))
 
-    # 处理JS资源
-    html_content = replace_js(html_content, folder_path)
+    # 检查当前文件夹是否包含HTML文件
+    current_folder_has_html = any(f.endswith('.html') for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f)))
 
-    # 保存为单个文件
-    try:
-        if output_format == 'mhtml':
-            save_as_mhtml(html_content, output_file, folder_name)
-        else:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-        print(f"已成功转换并保存到: {output_file}")
-        return output_file
-    except Exception as e:
-        print(f"保存文件失败: {str(e)}")
-        return None
+    if subfolders and not current_folder_has_html:
+        return [os.path.join(folder_path, item) for item in subfolders]
+    return [folder_path]
 
-def batch_convert(folder_path, output_format='html', output_dir=None, progress_callback=None):
+def batch_convert(folder_path, output_format='html', output_dir=None, progress_callback=None, options=None,
+                  workers=1, memory_budget=None):
     """
     批量转换文件夹中的所有子文件夹或当前文件夹
 
     此函数可以批量处理多个文件夹，根据情况自动选择转换子文件夹或当前文件夹。
     支持进度回调，可以实时获取转换进度。
+    workers大于1或指定了memory_budget时，使用batch_scheduler按估算成本从大到小并行转换，
+    并在内存预算内控制同时进行的任务。
 
     Args:
         folder_path (str): 要处理的文件夹路径
         output_format (str, optional): 输出文件格式，可选值为'html'或'mhtml'，默认为'html'
         output_dir (str, optional): 输出目录路径，默认为None（保存在输入文件夹的同级目录）
-        progress_callback (callable, optional): 进度回调函数，接受一个0-100的整数参数表示进度
+        progress_callback (callable, optional): 进度回调函数。接受一个参数时以0-100的整数进度调用；
+            接受两个参数时以(进度, ProgressEvent)调用，事件中包含按字节计算的进度、吞吐量、
+            预计剩余时间和当前文件夹。进度按估算的输入字节加权，每读取一个资源更新一次，
+            并行转换时可能在工作线程中调用
+        options (ConversionOptions, optional): 转换选项，默认为None（使用默认选项）
+        workers (int, optional): 最大并行任务数，默认为1（依次转换）
+        memory_budget (int, optional): 并行任务的估算内存总和上限（字节），默认为None（不限制）
+
+    Returns:
+        BatchResult: 批量转换的汇总结果
     """
-    print(f"开始批量转换: {folder_path}")
-    # 检查是否存在子文件夹
-    subfolders = [item for item in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, item))]
+    logger.info(f"开始批量转换: {folder_path}")
+    batch = BatchResult(folder_path=folder_path)
+    started = time.perf_counter()
+    # 所有文件夹共享同一个模块缓存，相同内容的模块只解析和编码一次
+    options = options or ConversionOptions()
+    if options.inline_modules and options.module_cache is None:
+        from module_graph import ModuleCache
+        options = dataclasses.replace(options, module_cache=ModuleCache())
+    # 所有文件夹共享同一个字体子集缓存
+    if options.subset_fonts and options.font_cache is None:
+        from font_subsetter import FontSubsetCache
+        options = dataclasses.replace(options, font_cache=FontSubsetCache(options.font_cache_dir))
+    # 所有文件夹共享同一个样式表解析缓存，同一个框架样式表只解析一次
+    if options.prune_css and options.css_cache is None:
+        from css_pruner import StylesheetCache
+        options = dataclasses.replace(options, css_cache=StylesheetCache())
+    # 所有文件夹共享同一条流水线，各阶段统计汇总整个批次
+    options = _prepare_pipeline(options)
+    # 所有文件夹共享同一个远程资源下载器，相同的远程资源只下载一次
+    options, owned_fetcher = _prepare_remote_fetcher(options)
+    try:
+        if workers > 1 or memory_budget is not None:
+            _schedule_items(folder_path, output_format, output_dir, progress_callback, options, batch,
+                            workers, memory_budget)
+        else:
+            _convert_items(folder_path, output_format, output_dir, progress_callback, options, batch)
+    finally:
+        if owned_fetcher is not None:
+            owned_fetcher.close()
+    batch.elapsed = time.perf_counter() - started
+    summary = f"批量转换完成: 成功 {len(batch.succeeded)} 个，失败 {len(batch.failed)} 个"
+    if batch.deduplicated:
+        summary += f"，其中 {len(batch.deduplicated)} 个共享了相同输入的输出"
+    logger.info(summary)
+    stages = options.pipeline.metrics.describe()
+    if stages:
+        logger.info(f"各阶段耗时: {stages}")
+    return batch
+
+def _convert_items(folder_path, output_format, output_dir, progress_callback, options, batch):
+    """依次转换批量任务中的每个文件夹，结果追加到batch"""
+    items = list_batch_items(folder_path)
+    total = len(items)
+    if items != [folder_path]:
+        logger.info(f"发现 {total} 个子文件夹需要转换")
+    else:
+        logger.info("转换当前文件夹")
+    items, duplicates = _dedupe_items(items, output_format, options)
+    from batch_scheduler import estimate_folder_cost
+    tracker, handles = _progress_tracker([estimate_folder_cost(item) for item in items], progress_callback)
+
+    for item_path in items:
+        result = convert_folder(item_path, output_format, output_dir,
+                                dataclasses.replace(options, progress=handles[item_path]))
+        handles[item_path].finish()
+        batch.results.append(result)
+        batch.results.extend(_link_duplicates(result, duplicates.get(item_path, []),
+                                              output_format, output_dir, options.output_container))
+        if result.cancelled:
+            logger.info("批量转换已取消")
+            break
+        logger.info(f"批量转换进度: {tracker.snapshot().describe()}")
+
+def _progress_tracker(estimates, progress_callback):
+    """
+    按估算的输入字节数创建批量进度跟踪器
 
-    # 检查当前文件夹是否包含HTML文件
-    current_folder_has_html = any(f.endswith('.html') for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f)))
+    Returns:
+        tuple: (ProgressTracker, 文件夹到ItemProgress的字典)
+    """
+    from progress_tracker import ProgressTracker
 
-    if subfolders and not current_folder_has_html:
-        # 如果有子文件夹且当前文件夹没有HTML文件，则转换所有子文件夹
-        items = subfolders
-        total = len(items)
-        print(f"发现 {total} 个子文件夹需要转换")
-
-        for i, item in enumerate(items):
-            item_path = os.path.join(folder_path, item)
-            convert_single_folder(item_path, output_format, output_dir)
-            
-            # 更新进度
-            progress = int((i + 1) / total * 100)
-            if progress_callback:
-                progress_callback(progress)
-            print(f"批量转换进度: {progress}%")
-    else:
-        # 如果没有子文件夹或当前文件夹有HTML文件，则转换当前文件夹
-        print("转换当前文件夹")
-        convert_single_folder(folder_path, output_format, output_dir)
-        if progress_callback:
-            progress_callback(100)
-        print("批量转换完成")
+    tracker = ProgressTracker(progress_callback)
+    handles = {estimate.folder_path: tracker.add_item(estimate.folder_path, estimate.input_bytes)
+               for estimate in estimates}
+    logger.debug(f"批量转换计划处理 {tracker.total_bytes} 字节")
+    return tracker, handles
+
+def _dedupe_items(items, output_format, options):
+    """
+    在启用了dedupe_outputs时把输入相同的文件夹分组
+
+    Returns:
+        tuple: (需要转换的文件夹列表, 代表文件夹到其重复文件夹列表的字典)
+    """
+    if options is None or not options.dedupe_outputs or len(items) < 2:
+        return items, {}
+    from output_dedup import group_duplicates
+
+    def extra_key(folder):
+        # MHTML的标题在非可复现模式下取文件夹名称，可复现模式下只在文档没有title时取文件夹名称
+        if output_format != 'mhtml':
+            return ''
+        folder_name = os.path.basename(os.path.normpath(folder))
+        main_html = find_main_html(folder) if options.reproducible else None
+        if main_html:
+            try:
+                with open(main_html, 'r', encoding='utf-8', errors='ignore') as f:
+                    if document_title(f.read()):
+                        return ''
+            except OSError:
+                pass
+        return folder_name
+
+    groups = group_duplicates(items, extra_key)
+    duplicates = {group[0]: group[1:] for group in groups if len(group) > 1}
+    if duplicates:
+        logger.info(f"发现 {sum(len(d) for d in duplicates.values())} 个输入重复的文件夹，将共享输出")
+    return [group[0] for group in groups], duplicates
+
+def _link_duplicates(result, duplicates, output_format, output_dir, container=None):
+    """
+    让重复文件夹的输出共享代表文件夹的输出；使用输出容器时只在容器中增加索引项
+
+    Returns:
+        list: 每个重复文件夹的ConversionResult
+    """
+    from output_dedup import link_output
+
+    results = []
+    for folder in duplicates:
+        duplicate = ConversionResult(folder_path=folder, output_format=output_format,
+                                     main_html=find_main_html(folder))
+        if not result.success:
+            duplicate.cancelled = result.cancelled
+            duplicate.error = result.error or "转换失败"
+            results.append(duplicate)
+            continue
+        started = time.perf_counter()
+        try:
+            if container is not None:
+                name = os.path.basename(os.path.normpath(folder))
+                container.link(name, os.path.basename(os.path.normpath(result.folder_path)), folder)
+                output_file, method = container.locator(name), 'container'
+            else:
+                output_file = _output_file(folder, output_format, output_dir)
+                method = link_output(result.output_file, output_file)
+        except OSError as e:
+            duplicate.error = f"保存文件失败: {str(e)}"
+            logger.error(duplicate.error)
+        else:
+            duplicate.output_file = output_file
+            duplicate.output_size = result.output_size
+            duplicate.linked_from = result.output_file
+            duplicate.link_method = method
+            logger.info(f"输入与 {result.folder_path} 相同，已共享输出（{method}）: {output_file}")
+        duplicate.timings['write'] = time.perf_counter() - started
+        results.append(duplicate)
+    return results
+
+def _schedule_items(folder_path, output_format, output_dir, progress_callback, options, batch,
+                    workers, memory_budget):
+    """按估算成本调度并行转换批量任务中的每个文件夹，结果和调度报告记录到batch"""
+    from batch_scheduler import BatchScheduler, log_schedule_report
+
+    items = list_batch_items(folder_path)
+    total = len(items)
+    scheduler = BatchScheduler(workers, memory_budget)
+    items, duplicates = _dedupe_items(items, output_format, options)
+    estimates = scheduler.plan(items)
+    tracker, handles = _progress_tracker(estimates, progress_callback)
+    logger.info(f"发现 {total} 个文件夹需要转换，并行 {scheduler.max_workers} 个，按估算大小从大到小调度")
+
+    def on_done(result):
+        handles[result.folder_path].finish()
+        batch.results.append(result)
+        batch.results.extend(_link_duplicates(result, duplicates.get(result.folder_path, []),
+                                              output_format, output_dir, options.output_container))
+        logger.info(f"批量转换进度: {tracker.snapshot().describe()}")
+
+    batch.schedule = scheduler.run(
+        estimates,
+        lambda item: convert_folder(item, output_format, output_dir,
+                                    dataclasses.replace(options, progress=handles[item])),
+        on_done, options.control if options else None)
+    if batch.cancelled:
+        logger.info("批量转换已取消")
+    log_schedule_report(batch.schedule)
 
 if __name__ == "__main__":
-    """当作为脚本直接运行时的入口点"""
-    import argparse
-
-    # 创建命令行参数解析器
-    parser = argparse.ArgumentParser(description='将带资源的HTML文件夹转换为单个HTML或MHTML文件')
-    parser.add_argument('folder', help='包含HTML文件的目录路径')
-    parser.add_argument('-f', '--format', choices=['html', 'mhtml'], default='html',
-                      help='输出文件格式，默认为html')
-    parser.add_argument('-o', '--output-dir', help='输出文件目录，默认为输入文件夹的同级目录')
-
-    # 解析命令行参数
-    args = parser.parse_args()
-
-    # 验证输入目录是否有效
-    if not os.path.isdir(args.folder):
-        print(f"错误：{args.folder} 不是有效的目录")
-        exit(1)
-    else:
-        # 执行批量转换
-        batch_convert(args.folder, args.format, args.output_dir)
-        print("转换完成！")
+    """当作为脚本直接运行时的入口点，命令行参数见cli模块"""
+    from cli import main
+    sys.exit(main())
 
 # 版本信息
 __version__ = '1.0.0'
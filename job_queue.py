@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - GUI转换任务队列
+
+此模块提供基于QThreadPool的多任务转换队列：
+- 每个文件夹作为一个独立任务，在可配置数量的工作线程上并行执行
+- 支持暂停、继续、取消全部任务或取消单个任务
+- 通过Qt信号把任务状态和转换结果投递回UI线程，UI线程只负责刷新界面
+"""
+
+import time
+import dataclasses
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from html_converter import (ConversionOptions, JobControl, ConversionCancelled,
+                            convert_folder)
+from conversion_result import ConversionResult
+
+# 任务状态
+JOB_QUEUED = '等待中'
+JOB_RUNNING = '转换中'
+JOB_DONE = '已完成'
+JOB_FAILED = '失败'
+JOB_CANCELLED = '已取消'
+
+
+class JobSignals(QObject):
+    """转换任务的信号（QRunnable不是QObject，需要单独的信号载体）"""
+    started = pyqtSignal(int)
+    finished = pyqtSignal(int, object)
+
+
+class ConversionJob(QRunnable):
+    """
+    单个文件夹的转换任务
+
+    Args:
+        job_id (int): 任务编号
+        folder_path (str): 要转换的文件夹路径
+        output_format (str): 输出文件格式
+        output_dir (str or None): 输出目录
+        options (ConversionOptions): 转换选项，其control字段为本任务的控制对象
+        signals (JobSignals): 任务信号载体
+    """
+
+    def __init__(self, job_id, folder_path, output_format, output_dir, options, signals):
+        super().__init__()
+        self.job_id = job_id
+        self.folder_path = folder_path
+        self.output_format = output_format
+        self.output_dir = output_dir
+        self.options = options
+        self.signals = signals
+
+    def run(self):
+        try:
+            # 排队期间可能已被暂停或取消
+            self.options.control.checkpoint()
+            self.signals.started.emit(self.job_id)
+            result = convert_folder(self.folder_path, self.output_format, self.output_dir,
+                                    self.options)
+        except ConversionCancelled:
+            result = ConversionResult(folder_path=self.folder_path,
+                                      output_format=self.output_format,
+                                      error="转换已取消", cancelled=True)
+        except Exception as e:
+            result = ConversionResult(folder_path=self.folder_path,
+                                      output_format=self.output_format, error=str(e))
+        self.signals.finished.emit(self.job_id, result)
+
+
+@dataclasses.dataclass
+class JobInfo:
+    """
+    任务在队列中的状态信息
+
+    Attributes:
+        job_id (int): 任务编号
+        folder_path (str): 要转换的文件夹路径
+        control (JobControl): 任务控制对象
+        status (str): 任务状态
+        started_at (float or None): 开始时间（time.monotonic）
+        finished_at (float or None): 结束时间（time.monotonic）
+        result (ConversionResult or None): 转换结果
+    """
+    job_id: int
+    folder_path: str
+    control: JobControl
+    status: str = JOB_QUEUED
+    started_at: float = None
+    finished_at: float = None
+    result: ConversionResult = None
+
+    @property
+    def elapsed(self):
+        """任务已运行的时间（秒），未开始时为0"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class JobQueue(QObject):
+    """
+    多线程转换任务队列
+
+    Args:
+        max_workers (int, optional): 同时运行的最大任务数，默认为2
+        parent (QObject, optional): 父对象
+    """
+    job_added = pyqtSignal(int, str)
+    job_started = pyqtSignal(int)
+    job_finished = pyqtSignal(int, object)
+    queue_finished = pyqtSignal()
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, max_workers))
+        # 队列级控制对象，用于暂停和取消全部任务
+        self.control = JobControl()
+        self.jobs = {}
+        self._signals = {}
+        self._next_id = 0
+        self._pending = 0
+
+    def set_max_workers(self, count):
+        """设置同时运行的最大任务数"""
+        self.pool.setMaxThreadCount(max(1, count))
+
+    def add(self, folder_path, output_format='html', output_dir=None, options=None):
+        """
+        添加一个转换任务
+
+        Args:
+            folder_path (str): 要转换的文件夹路径
+            output_format (str, optional): 输出文件格式，默认为'html'
+            output_dir (str, optional): 输出目录，默认为None
+            options (ConversionOptions, optional): 转换选项，默认为None
+
+        Returns:
+            int: 任务编号
+        """
+        # 新一轮任务开始时重置已取消的队列控制
+        if self._pending == 0 and self.control.cancelled:
+            self.control = JobControl()
+
+        job_id = self._next_id
+        self._next_id += 1
+        control = JobControl(parent=self.control)
+        job_options = dataclasses.replace(options or ConversionOptions(), control=control)
+        self.jobs[job_id] = JobInfo(job_id, folder_path, control)
+
+        signals = JobSignals()
+        signals.started.connect(self._on_started)
+        signals.finished.connect(self._on_finished)
+        self._signals[job_id] = signals
+
+        self._pending += 1
+        self.job_added.emit(job_id, folder_path)
+        self.pool.start(ConversionJob(job_id, folder_path, output_format, output_dir,
+                                      job_options, signals))
+        return job_id
+
+    @property
+    def is_active(self):
+        """队列中是否还有未完成的任务"""
+        return self._pending > 0
+
+    @property
+    def paused(self):
+        """队列是否处于暂停状态"""
+        return self.control.paused
+
+    def pause(self):
+        """暂停全部任务，运行中的任务在下一个资源处停下"""
+        self.control.pause()
+
+    def resume(self):
+        """继续全部任务"""
+        self.control.resume()
+
+    def cancel_all(self):
+        """取消全部未完成的任务"""
+        self.control.cancel()
+
+    def cancel(self, job_id):
+        """取消指定任务"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.control.cancel()
+
+    def clear_finished(self):
+        """移除已结束任务的记录"""
+        self.jobs = {job_id: job for job_id, job in self.jobs.items() if job.result is None}
+
+    def _on_started(self, job_id):
+        job = self.jobs[job_id]
+        job.status = JOB_RUNNING
+        job.started_at = time.monotonic()
+        self.job_started.emit(job_id)
+
+    def _on_finished(self, job_id, result):
+        job = self.jobs[job_id]
+        job.finished_at = time.monotonic()
+        job.result = result
+        if result.cancelled:
+            job.status = JOB_CANCELLED
+        elif result.success:
+            job.status = JOB_DONE
+        else:
+            job.status = JOB_FAILED
+        self._signals.pop(job_id, None)
+        self._pending -= 1
+        self.job_finished.emit(job_id, result)
+        if self._pending == 0:
+            self.queue_finished.emit()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - GUI日志面板
+
+此模块把转换器通过logging模块输出的日志送到GUI日志面板：
+- QueueLogHandler在任意线程中把日志记录放入线程安全队列，不直接触碰界面
+- LogPane在UI线程中按固定间隔批量取出日志，一次性追加到QPlainTextEdit
+- 面板只保留最近的若干行（环形缓冲），支持按级别过滤
+- 可选把完整日志同时写入文件
+- 级别只作用于本项目的日志记录器，第三方库（如fontTools、PIL）只有警告及以上的日志进入面板和文件
+"""
+
+import queue
+import logging
+from collections import deque
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QComboBox,
+                             QLabel, QCheckBox, QFileDialog)
+from PyQt5.QtCore import QTimer
+
+from cli import PROJECT_LOGGERS
+
+# 日志格式
+LOG_FORMAT = '[%(asctime)s] %(message)s'
+LOG_DATE_FORMAT = '%H:%M:%S'
+
+# 按面板级别设置的日志记录器：转换器各模块和GUI自身（直接运行app.py时名称为__main__）
+GUI_LOGGERS = PROJECT_LOGGERS + ('app', '__main__', 'log_pane')
+
+# 级别过滤选项
+LOG_LEVELS = [
+    ("详细", logging.DEBUG),
+    ("信息", logging.INFO),
+    ("警告", logging.WARNING),
+    ("错误", logging.ERROR),
+]
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    把日志记录放入线程安全队列的日志处理器
+
+    日志在产生它的线程中完成格式化，UI线程只负责取出文本。
+
+    Args:
+        log_queue (queue.SimpleQueue): 接收格式化后日志文本的队列
+    """
+
+    def __init__(self, log_queue):
+        super().__init__()
+        self.log_queue = log_queue
+
+    def emit(self, record):
+        try:
+            self.log_queue.put_nowait(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class LogPane(QWidget):
+    """
+    批量刷新的日志面板
+
+    Args:
+        max_lines (int, optional): 面板保留的最大行数，默认为5000
+        flush_interval (int, optional): 批量刷新间隔（毫秒），默认为100
+        parent (QWidget, optional): 父组件
+    """
+
+    def __init__(self, max_lines=5000, flush_interval=100, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.log_queue = queue.SimpleQueue()
+        self.handler = QueueLogHandler(self.log_queue)
+        self.handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+        self.file_handler = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # 工具栏：级别过滤和日志文件
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(QLabel("日志级别:"))
+        self.level_combo = QComboBox()
+        for name, _ in LOG_LEVELS:
+            self.level_combo.addItem(name)
+        self.level_combo.setCurrentIndex(1)
+        self.level_combo.currentIndexChanged.connect(self._apply_level)
+        toolbar.addWidget(self.level_combo)
+        toolbar.addStretch()
+        self.spill_check = QCheckBox("完整日志写入文件")
+        self.spill_check.toggled.connect(self._toggle_spill)
+        toolbar.addWidget(self.spill_check)
+        layout.addLayout(toolbar)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max_lines)
+        self.text.setUndoRedoEnabled(False)
+        layout.addWidget(self.text)
+
+        # 挂到根日志记录器上，接收转换器和GUI的全部日志
+        logging.getLogger().addHandler(self.handler)
+        self._apply_level()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(flush_interval)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def flush(self):
+        """取出队列中的全部日志，只把最后max_lines行一次性追加到面板"""
+        lines = deque(maxlen=self.max_lines)
+        dropped = 0
+        while True:
+            try:
+                line = self.log_queue.get_nowait()
+            except queue.Empty:
+                break
+            if len(lines) == self.max_lines:
+                dropped += 1
+            lines.append(line)
+        if not lines:
+            return
+
+        scrollbar = self.text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        if dropped:
+            lines.appendleft(f"...（省略 {dropped} 行）")
+        self.text.appendPlainText('\n'.join(lines))
+        # 用户向上翻看时不强制滚动到底部
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def _apply_level(self):
+        """根据过滤级别设置处理器和根日志记录器的级别"""
+        level = LOG_LEVELS[self.level_combo.currentIndex()][1]
+        self.handler.setLevel(level)
+        self._update_logger_levels()
+
+    def _update_logger_levels(self):
+        """
+        本项目日志记录器的级别取所有处理器中最详细的一个，避免无人接收的日志被格式化
+
+        根日志记录器保持原级别（默认WARNING），与命令行的cli.configure_logging一致。
+        """
+        levels = [self.handler.level]
+        if self.file_handler is not None:
+            levels.append(self.file_handler.level)
+        for name in GUI_LOGGERS:
+            logging.getLogger(name).setLevel(min(levels))
+
+    def _toggle_spill(self, enabled):
+        """开启或关闭完整日志文件"""
+        if enabled:
+            path, _ = QFileDialog.getSaveFileName(self, "保存日志文件", "html_merge_tool.log",
+                                                  "日志文件 (*.log *.txt)")
+            if not path:
+                self.spill_check.setChecked(False)
+                return
+            self.set_spill_file(path)
+        else:
+            self.set_spill_file(None)
+
+    def set_spill_file(self, path):
+        """
+        设置完整日志文件
+
+        文件记录全部级别的日志，不受面板的过滤级别和行数上限影响。
+
+        Args:
+            path (str or None): 日志文件路径，None表示关闭日志文件
+        """
+        root = logging.getLogger()
+        if self.file_handler is not None:
+            root.removeHandler(self.file_handler)
+            self.file_handler.close()
+            self.file_handler = None
+        if path:
+            self.file_handler = logging.FileHandler(path, encoding='utf-8')
+            self.file_handler.setLevel(logging.DEBUG)
+            self.file_handler.setFormatter(logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s: %(message)s'))
+            root.addHandler(self.file_handler)
+            logging.getLogger(__name__).info(f"完整日志写入: {path}")
+        self._update_logger_levels()
+
+    def close_handlers(self):
+        """从根日志记录器上移除本面板的处理器"""
+        self.timer.stop()
+        logging.getLogger().removeHandler(self.handler)
+        self.set_spill_file(None)
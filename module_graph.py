@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - ES模块图内联模块
+
+此模块把页面中的<script type="module">及其静态依赖内联到单个HTML文件：
+- 解析模块中的静态import、export ... from以及字面量参数的动态import()，
+  跳过注释、字符串和正则表达式字面量；无法可靠扫描的模块不改写，原样内联
+- 以引用它的模块所在位置为基准解析相对路径，遍历整个模块图，每个模块只读取和处理一次
+- 把模块中的相对引用改写为@merged/<路径>形式的裸模块名，
+  并生成一个import map，将每个裸模块名映射到该模块的data URL
+- 模块解析结果和编码结果按内容哈希缓存，批量转换时可以在多个页面之间共享
+
+每个模块对应import map中的唯一地址，因此模块只会实例化一次，循环依赖也能保持原有语义。
+模块中的import.meta.url会变为data URL，依赖它定位其他资源的代码需要自行处理。
+"""
+
+import os
+import re
+import json
+import base64
+import hashlib
+import logging
+import threading
+from urllib.parse import urljoin, urlsplit
+
+from html_converter import (AssetRecord, STATUS_INLINED, _checkpoint, _is_remote, _load_asset,
+                            _record, _remote_fetcher, _warn)
+
+logger = logging.getLogger(__name__)
+
+# 改写后的裸模块名前缀
+MERGED_PREFIX = '@merged/'
+
+# 扫描模块源码：先匹配注释和字符串字面量并跳过，避免把其中的文本当作import语句；
+# 单独的/交给parse_imports判断是除号还是正则表达式字面量的开始，无法配对的引号说明扫描已经错位
+IMPORT_SCAN_PATTERN = re.compile(r'''
+    (?P<skip>
+        //[^\n]*
+      | /\*.*?\*/
+      | `(?:[^`\\]|\\.)*`
+      | '(?:[^'\\\n]|\\.)*'
+      | "(?:[^"\\\n]|\\.)*"
+    )
+  | (?<![\w$.])
+    (?:
+        import\s*(?:[\w$*{}\s,]+?\s*\bfrom\s*)?
+      | export\s*(?:\*\s*(?:as\s+[\w$]+\s*)?|\{[^}]*\}\s*)from\s*
+    )
+    (?P<quote>['"])(?P<spec>[^'"\n]+)(?P=quote)
+  | (?<![\w$.])import\s*\(\s*(?P<dquote>['"])(?P<dspec>[^'"\n]+)(?P=dquote)\s*\)
+  | (?P<slash>/)
+  | (?P<stray>['"`])
+''', re.VERBOSE | re.DOTALL)
+
+# 正则表达式字面量开头的/之后的部分：字符类中的/不结束字面量，不能跨行
+REGEX_BODY_PATTERN = re.compile(r'(?:[^\\/\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])*/[\w$]*')
+
+# 之后的/开始正则表达式字面量而不是除号的关键字
+REGEX_PREFIX_KEYWORDS = frozenset(('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                                   'throw', 'case', 'do', 'else', 'yield', 'await'))
+
+# 匹配script标签及其内容
+SCRIPT_TAG_PATTERN = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+
+# 匹配标签属性
+ATTR_PATTERN = re.compile(r'''([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+
+# 按JavaScript解析的模块MIME类型
+JS_MIME_TYPES = ('text/javascript', 'application/javascript', 'application/x-javascript')
+
+
+def _starts_regex(source, position):
+    """
+    按/之前最后一个有效字符判断source[position]处的/是否开始正则表达式字面量
+
+    标识符、数字、右括号、右方括号、字符串和后缀++/--之后是除号；
+    运算符、左括号、逗号、右花括号（语句块结束）和return等关键字之后是正则表达式。
+    """
+    index = position - 1
+    while index >= 0 and source[index] in ' \t\r\n':
+        index -= 1
+    if index < 0:
+        return True
+    char = source[index]
+    if char in ')]\'"`':
+        return False
+    if char in '+-':
+        return index == 0 or source[index - 1] != char
+    if char.isalnum() or char in '_$':
+        end = index + 1
+        while index >= 0 and (source[index].isalnum() or source[index] in '_$'):
+            index -= 1
+        return source[index + 1:end] in REGEX_PREFIX_KEYWORDS
+    return True
+
+
+def parse_imports(source):
+    """
+    解析模块源码中的静态依赖
+
+    Args:
+        source (str): 模块源码
+
+    Returns:
+        list or None: (起始位置, 结束位置, 模块名)列表，位置为模块名在源码中的范围；
+            无法可靠扫描时（正则表达式字面量未结束或出现无法配对的引号）返回None
+    """
+    imports = []
+    position = 0
+    while True:
+        match = IMPORT_SCAN_PATTERN.search(source, position)
+        if match is None:
+            return imports
+        position = match.end()
+        if match.group('skip'):
+            continue
+        if match.group('stray'):
+            return None
+        if match.group('slash'):
+            if _starts_regex(source, match.start()):
+                body = REGEX_BODY_PATTERN.match(source, position)
+                if body is None:
+                    return None
+                position = body.end()
+            continue
+        group = 'spec' if match.group('spec') is not None else 'dspec'
+        imports.append((match.start(group), match.end(group), match.group(group)))
+
+
+def _parse_attrs(attr_text):
+    """把标签属性文本解析为小写属性名到属性值的字典"""
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(attr_text):
+        value = next((v for v in match.groups()[1:] if v is not None), '')
+        attrs[match.group(1).lower()] = value
+    return attrs
+
+
+class ModuleCache:
+    """
+    按内容哈希缓存模块的解析结果和编码结果
+
+    缓存是线程安全的，可以在批量转换的所有页面之间共享。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._imports = {}
+        self._encoded = {}
+        self.hits = 0
+        self.misses = 0
+
+    def imports(self, raw, source):
+        """返回模块源码的依赖列表（见parse_imports），相同内容只解析一次"""
+        key = hashlib.sha256(raw).digest()
+        with self._lock:
+            if key in self._imports:
+                self.hits += 1
+                return self._imports[key]
+            self.misses += 1
+        imports = parse_imports(source)
+        with self._lock:
+            self._imports[key] = imports
+        return imports
+
+    def encoded(self, raw, mime_type, replacements, render):
+        """
+        返回改写并编码后的data URL，相同内容和相同改写只编码一次
+
+        Args:
+            raw (bytes): 模块原始内容
+            mime_type (str): data URL的MIME类型
+            replacements (tuple): 改写列表，作为缓存键的一部分
+            render (callable): 缓存未命中时调用，返回改写后的字节
+        """
+        key = (hashlib.sha256(raw).digest(), mime_type, replacements)
+        with self._lock:
+            data_url = self._encoded.get(key)
+        if data_url is None:
+            data_url = f"data:{mime_type};base64,{base64.b64encode(render()).decode('ascii')}"
+            with self._lock:
+                self._encoded[key] = data_url
+        return data_url
+
+
+class ModuleGraph:
+    """
+    单个页面的模块图
+
+    Args:
+        base_folder (str): 页面所在文件夹，根路径（/）开头的引用相对于此文件夹解析
+        options (ConversionOptions or None): 转换选项
+        result (ConversionResult or None): 用于收集资源处理记录的转换结果
+        cache (ModuleCache, optional): 共享缓存，默认为None（使用仅本页面有效的缓存）
+    """
+
+    def __init__(self, base_folder, options, result, cache=None):
+        self.base_folder = os.path.abspath(base_folder)
+        self.options = options
+        self.result = result
+        self.cache = cache or ModuleCache()
+        self.imports = {}
+        self._keys = {}
+        self._failed = set()
+        self._queue = []
+
+    def resolve(self, specifier, referrer):
+        """
+        解析模块名
+
+        Args:
+            specifier (str): import语句中的模块名
+            referrer (str or None): 引用方模块的本地路径或URL，None表示页面本身
+
+        Returns:
+            str or None: 目标模块的本地路径或URL；裸模块名和无法处理的地址返回None
+        """
+        if _is_remote(specifier):
+            return specifier if _remote_fetcher(self.options) is not None else None
+        if not specifier.startswith(('./', '../', '/')):
+            return None
+        if referrer is not None and _is_remote(referrer):
+            return urljoin(referrer, specifier) if _remote_fetcher(self.options) is not None else None
+        path = urlsplit(specifier).path
+        if path.startswith('/'):
+            return os.path.normpath(os.path.join(self.base_folder, path.lstrip('/')))
+        base = os.path.dirname(referrer) if referrer is not None else self.base_folder
+        return os.path.normpath(os.path.join(base, path))
+
+    def key_for(self, location):
+        """返回模块在import map中的裸模块名，首次出现时把模块加入待处理队列"""
+        key = self._keys.get(location)
+        if key is None:
+            if _is_remote(location):
+                parts = urlsplit(location)
+                name = parts.netloc + parts.path + (f'?{parts.query}' if parts.query else '')
+            else:
+                name = os.path.relpath(location, self.base_folder).replace(os.sep, '/')
+            key = MERGED_PREFIX + name
+            self._keys[location] = key
+            self._queue.append(location)
+        return key
+
+    def add_entry(self, reference):
+        """
+        加入页面中script标签引用的入口模块
+
+        Returns:
+            str or None: 入口模块的裸模块名，无法解析或读取时返回None
+        """
+        if not _is_remote(reference) and not reference.startswith(('./', '../', '/')):
+            reference = './' + reference
+        location = self.resolve(reference, None)
+        if location is None:
+            return None
+        key = self.key_for(location)
+        self.build()
+        return None if location in self._failed else key
+
+    def rewrite(self, source, referrer):
+        """
+        改写源码中可以解析的相对引用，依赖模块加入模块图
+
+        Args:
+            source (str): 模块或内联脚本的源码
+            referrer (str or None): 源码所在模块的位置，None表示页面中的内联脚本
+
+        Returns:
+            tuple: (改写后的源码, 改写列表)
+        """
+        replacements = self._replacements(source.encode('utf-8', 'surrogatepass'), source, referrer)
+        return _splice(source, replacements), replacements
+
+    def _replacements(self, raw, source, referrer):
+        """返回源码中可以解析的依赖对应的改写列表；源码无法可靠扫描时不改写"""
+        imports = self.cache.imports(raw, source)
+        if imports is None:
+            _warn(self.result, f"无法可靠识别模块中的import语句，已原样内联: {referrer or '页面内联脚本'}")
+            return ()
+        replacements = []
+        for start, end, specifier in imports:
+            location = self.resolve(specifier, referrer)
+            if location is not None:
+                replacements.append((start, end, self.key_for(location)))
+        return tuple(replacements)
+
+    def build(self):
+        """处理队列中尚未处理的全部模块"""
+        while self._queue:
+            location = self._queue.pop()
+            _checkpoint(self.options)
+            base, reference = ('', location) if _is_remote(location) else (self.base_folder, location)
+            asset = _load_asset('module', reference, base, self.options, self.result)
+            if asset is None:
+                self._failed.add(location)
+                continue
+            path, raw, mime_type = asset
+            mime_type = mime_type or 'text/javascript'
+            if mime_type in JS_MIME_TYPES:
+                mime_type = 'text/javascript'
+                source = raw.decode('utf-8', errors='ignore')
+                replacements = self._replacements(raw, source, location)
+
+                def render(source=source, replacements=replacements):
+                    return _splice(source, replacements).encode('utf-8')
+            else:
+                # JSON、CSS等非脚本模块原样编码
+                replacements = ()
+
+                def render(raw=raw):
+                    return raw
+            data_url = self.cache.encoded(raw, mime_type, replacements, render)
+            self.imports[self._keys[location]] = data_url
+            logger.debug(f"已内联JS模块: {path}")
+            _record(self.result, AssetRecord('module', location, path, STATUS_INLINED, len(raw),
+                                             len(data_url), 'base64', mime_type))
+
+    def inline_target(self, address):
+        """
+        内联页面原有import map中的映射目标
+
+        Args:
+            address (str): 映射目标地址
+
+        Returns:
+            str: 目标模块的data URL；无法内联（例如前缀映射或裸地址）时原样返回
+        """
+        if address.endswith('/'):
+            return address
+        if not _is_remote(address) and not address.startswith(('./', '../', '/')):
+            return address
+        location = self.resolve(address, None)
+        if location is None:
+            return address
+        key = self.key_for(location)
+        self.build()
+        return self.imports.get(key, address)
+
+
+def _splice(source, replacements):
+    """按改写列表替换源码中的模块名"""
+    if not replacements:
+        return source
+    parts = []
+    last = 0
+    for start, end, key in replacements:
+        parts.append(source[last:start])
+        parts.append(key)
+        last = end
+    parts.append(source[last:])
+    return ''.join(parts)
+
+
+def inline_module_graph(html_content, base_folder, options=None, result=None):
+    """
+    内联页面中的ES模块图
+
+    引用外部文件的<script type="module" src="...">改为导入对应裸模块名的内联模块脚本，
+    内联模块脚本中的相对引用改写为裸模块名，全部模块通过一个import map映射到data URL。
+    页面中已有的import map会被合并。
+
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+
+    Returns:
+        str: 处理后的HTML内容字符串
+    """
+    cache = options.module_cache if options is not None and options.module_cache is not None else None
+    graph = ModuleGraph(base_folder, options, result, cache)
+    existing_map = None
+    first_module = None
+    entries = 0
+
+    def replace_func(match):
+        nonlocal existing_map, first_module, entries
+        attrs = _parse_attrs(match.group(1))
+        script_type = attrs.get('type', '').strip().lower()
+        if script_type == 'importmap' and existing_map is None and 'src' not in attrs:
+            try:
+                existing_map = json.loads(match.group(2))
+            except ValueError:
+                _warn(result, "页面中的import map不是有效的JSON，已保留原样")
+                return match.group(0)
+            first_module = first_module if first_module is not None else match.start()
+            return ''
+        if script_type != 'module':
+            return match.group(0)
+        if first_module is None:
+            first_module = match.start()
+
+        other_attrs = ''.join(f' {m.group(0)}' for m in ATTR_PATTERN.finditer(match.group(1))
+                              if m.group(1).lower() not in ('src', 'type'))
+        src = attrs.get('src')
+        if src is not None:
+            if src.startswith('data:'):
+                return match.group(0)
+            key = graph.add_entry(src)
+            if key is None:
+                return match.group(0)
+            entries += 1
+            return f'<script type="module"{other_attrs}>import {json.dumps(key)};</script>'
+
+        code, replacements = graph.rewrite(match.group(2), None)
+        if not replacements:
+            return match.group(0)
+        graph.build()
+        entries += 1
+        return f'<script type="module"{other_attrs}>{code}</script>'
+
+    html_content = SCRIPT_TAG_PATTERN.sub(replace_func, html_content)
+    if not graph.imports and not entries:
+        if existing_map is not None:
+            # 只移除了原有的import map而没有新增内容时，放回原处
+            html_content = _insert_import_map(html_content, existing_map, first_module)
+        return html_content
+
+    import_map = existing_map if isinstance(existing_map, dict) else {}
+    imports = {name: graph.inline_target(address) if isinstance(address, str) else address
+               for name, address in (import_map.get('imports') or {}).items()}
+    imports.update(graph.imports)
+    import_map['imports'] = imports
+    html_content = _insert_import_map(html_content, import_map, first_module)
+    logger.info(f"总计内联JS模块数量: {len(graph.imports)}（入口 {entries} 个）")
+    return html_content
+
+
+def _insert_import_map(html_content, import_map, position):
+    """
+    在指定位置插入import map
+
+    position是第一个模块脚本或import map在原文档中的位置；此前的script标签都原样保留，
+    因此该位置在替换后的文档中仍然有效。JSON中转义'<'，防止数据提前结束script块。
+    """
+    data = json.dumps(import_map, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+    tag = f'<script type="importmap">{data}</script>\n'
+    return html_content[:position] + tag + html_content[position:]
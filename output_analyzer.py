@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 输出组成分析模块
+
+此模块根据转换结果中的资源记录，把输出文件的每个字节归属到其来源：
+- HTML文档本身（标记、内联样式和脚本以及MHTML封装）
+- 每个内联资源的原始内容，以及base64编码和标签包装带来的编码开销
+- 按资源类型汇总，并统计被多次引用的资源重复占用的字节
+分析结果可以写成JSON报告和静态HTML矩形树图，也可以按大小预算检查，
+在批量转换中提前发现体积异常的页面。
+"""
+
+import os
+import json
+import html
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from conversion_result import STATUS_INLINED
+
+logger = logging.getLogger(__name__)
+
+# 文档本身在报告中的类型名称
+DOCUMENT_KIND = 'document'
+
+# 矩形树图中各类型的颜色
+KIND_COLORS = {
+    DOCUMENT_KIND: '#8c8c8c',
+    'image': '#4e79a7',
+    'css': '#f28e2b',
+    'css-url': '#edc948',
+    'js': '#59a14f',
+    'module': '#76b7b2',
+    'frame': '#e15759',
+    'font': '#ff9da7',
+}
+DEFAULT_COLOR = '#b07aa1'
+
+# 可以包含下级资源的资源类型（样式表中的字体和url()资源、子文档中的资源）
+CONTAINER_KINDS = ('css', 'frame')
+
+# 矩形树图画布大小（像素）
+TREEMAP_WIDTH = 1200
+TREEMAP_HEIGHT = 720
+
+
+def format_size(size):
+    """把字节数格式化为易读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+@dataclass
+class AssetUsage:
+    """
+    单个资源在输出中占用的字节
+
+    Attributes:
+        kind (str): 资源类型
+        path (str): 资源相对于输入文件夹的路径或URL
+        references (int): 被内联的次数
+        bytes_in (int): 单份原始字节数
+        bytes_out (int): 全部引用在输出中占用的字节数（不含其中嵌套的下级资源）
+        overhead (int): 编码开销，即bytes_out减去全部引用的原始字节数
+        duplicate_bytes (int): 第一次以外的引用占用的字节数
+    """
+    kind: str
+    path: str
+    references: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    overhead: int = 0
+    duplicate_bytes: int = 0
+
+
+@dataclass
+class OutputReport:
+    """
+    输出文件的组成分析结果
+
+    Attributes:
+        folder_path (str): 输入文件夹路径
+        output_file (str or None): 输出文件路径
+        output_size (int): 输出文件大小
+        document_bytes (int): 归属于HTML文档本身的字节数
+        assets (list): 按占用字节从大到小排列的AssetUsage列表
+        by_kind (dict): 按资源类型汇总的count、references、bytes_in、bytes_out、overhead
+        duplicate_bytes (int): 重复引用占用的字节总数
+        violations (list): 超出大小预算的说明
+    """
+    folder_path: str
+    output_file: Optional[str]
+    output_size: int
+    document_bytes: int = 0
+    assets: List[AssetUsage] = field(default_factory=list)
+    by_kind: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    duplicate_bytes: int = 0
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def overhead(self):
+        """全部资源的编码开销"""
+        return sum(a.overhead for a in self.assets)
+
+    def to_dict(self):
+        """转换为可序列化为JSON的字典"""
+        data = asdict(self)
+        data['overhead'] = self.overhead
+        return data
+
+    def write_json(self, path):
+        """把报告写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def normalize_path(path, folder):
+    """
+    把资源路径统一为相对于输入文件夹的路径
+
+    各模块记录的本地路径有的是绝对路径（如ES模块），有的是相对于工作目录的路径，
+    统一后同一个文件只对应一个键；URL保持不变。
+
+    Args:
+        path (str): 资源的本地路径或URL
+        folder (str): 输入文件夹路径
+
+    Returns:
+        str: 使用/分隔的相对路径，或原URL
+    """
+    if not path or '://' in path:
+        return path
+    try:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(folder)).replace(os.sep, '/')
+    except ValueError:
+        # Windows上位于不同盘符时无法计算相对路径
+        return os.path.abspath(path).replace(os.sep, '/')
+
+
+def analyze_result(result):
+    """
+    分析转换结果的输出组成
+
+    资源按（类型，相对于输入文件夹的路径）汇总，下级资源按上级资源的路径归属，
+    页面和子文档中引用地址相同的不同文件不会混淆。
+
+    Args:
+        result (ConversionResult): 转换结果
+
+    Returns:
+        OutputReport: 分析结果
+    """
+    inlined = [a for a in result.assets if a.status == STATUS_INLINED]
+    usages = {}
+    owners = {}
+    for record in inlined:
+        path = normalize_path(record.path, result.folder_path)
+        usage = usages.get((record.kind, path))
+        if usage is None:
+            usage = usages[(record.kind, path)] = AssetUsage(record.kind, path, bytes_in=record.bytes_in)
+        usage.references += 1
+        usage.bytes_out += record.bytes_out
+        usage.overhead += record.bytes_out - record.bytes_in
+        if record.kind in CONTAINER_KINDS:
+            owners.setdefault(path, usage)
+    # 上级资源的bytes_out包含了嵌套的下级资源，扣除后每个字节只归属一次
+    for record in inlined:
+        owner = owners.get(normalize_path(record.parent, result.folder_path)) if record.parent else None
+        if owner is not None:
+            owner.bytes_out -= record.bytes_out
+            owner.overhead -= record.bytes_out
+    for usage in usages.values():
+        if usage.references > 1:
+            usage.duplicate_bytes = usage.bytes_out - usage.bytes_out // usage.references
+
+    report = OutputReport(result.folder_path, result.output_file, result.output_size)
+    report.assets = sorted(usages.values(), key=lambda u: u.bytes_out, reverse=True)
+    report.document_bytes = max(0, result.output_size - sum(u.bytes_out for u in report.assets))
+    report.duplicate_bytes = sum(u.duplicate_bytes for u in report.assets)
+    for usage in report.assets:
+        totals = report.by_kind.setdefault(usage.kind, {
+            'count': 0, 'references': 0, 'bytes_in': 0, 'bytes_out': 0, 'overhead': 0})
+        totals['count'] += 1
+        totals['references'] += usage.references
+        totals['bytes_in'] += usage.bytes_in * usage.references
+        totals['bytes_out'] += usage.bytes_out
+        totals['overhead'] += usage.overhead
+    return report
+
+
+@dataclass
+class SizeBudget:
+    """
+    输出大小预算
+
+    Attributes:
+        max_output (int or None): 输出文件的最大字节数
+        max_asset (int or None): 单个资源在输出中占用的最大字节数（按单次引用计算）
+        max_image_total (int or None): 全部图片在输出中占用的最大字节数
+        action (str): 超出预算时的处理方式，'warn'（记录警告）或'fail'（转换结果记为失败）
+    """
+    max_output: Optional[int] = None
+    max_asset: Optional[int] = None
+    max_image_total: Optional[int] = None
+    action: str = 'warn'
+
+    def check(self, report):
+        """
+        检查分析结果是否超出预算
+
+        Args:
+            report (OutputReport): 分析结果
+
+        Returns:
+            list: 超出预算的说明，未超出时为空列表
+        """
+        violations = []
+        if self.max_output is not None and report.output_size > self.max_output:
+            violations.append(f"输出大小 {format_size(report.output_size)} 超过预算 "
+                              f"{format_size(self.max_output)}")
+        if self.max_asset is not None:
+            for usage in report.assets:
+                size = usage.bytes_out // usage.references
+                if size > self.max_asset:
+                    violations.append(f"资源 {usage.path} 占用 {format_size(size)}，超过单个资源预算 "
+                                      f"{format_size(self.max_asset)}")
+        if self.max_image_total is not None:
+            image_bytes = report.by_kind.get('image', {}).get('bytes_out', 0)
+            if image_bytes > self.max_image_total:
+                violations.append(f"图片总计 {format_size(image_bytes)} 超过预算 "
+                                  f"{format_size(self.max_image_total)}")
+        return violations
+
+
+def _worst_ratio(row, side):
+    """一行矩形中最差的长宽比"""
+    total = sum(area for area, _ in row)
+    largest = max(area for area, _ in row)
+    smallest = min(area for area, _ in row)
+    return max(side * side * largest / (total * total), total * total / (side * side * smallest))
+
+
+def squarify(items, x, y, width, height):
+    """
+    按squarified算法把矩形区域划分给各项
+
+    Args:
+        items (list): (数值, 数据)列表，按数值从大到小排列
+        x, y, width, height (float): 区域位置和大小
+
+    Returns:
+        list: (数据, x, y, 宽, 高)列表
+    """
+    items = [(value, payload) for value, payload in items if value > 0]
+    total = sum(value for value, _ in items)
+    if not items or width <= 0 or height <= 0:
+        return []
+    scale = width * height / total
+    remaining = [(value * scale, payload) for value, payload in items]
+    rects = []
+    while remaining:
+        side = min(width, height)
+        row = [remaining[0]]
+        index = 1
+        while index < len(remaining) and \
+                _worst_ratio(row + [remaining[index]], side) <= _worst_ratio(row, side):
+            row.append(remaining[index])
+            index += 1
+        remaining = remaining[index:]
+        area = sum(a for a, _ in row)
+        if width >= height:
+            # 沿左侧排成一列
+            column = area / height
+            offset = y
+            for a, payload in row:
+                rects.append((payload, x, offset, column, a / column))
+                offset += a / column
+            x += column
+            width -= column
+        else:
+            # 沿顶部排成一行
+            line = area / width
+            offset = x
+            for a, payload in row:
+                rects.append((payload, offset, y, a / line, line))
+                offset += a / line
+            y += line
+            height -= line
+    return rects
+
+
+def render_treemap(report):
+    """
+    生成分析结果的静态HTML矩形树图
+
+    第一层按资源类型划分，第二层按资源划分；鼠标悬停显示路径、大小和引用次数。
+
+    Args:
+        report (OutputReport): 分析结果
+
+    Returns:
+        str: 完整的HTML文档
+    """
+    groups = {DOCUMENT_KIND: [(report.document_bytes, None)]}
+    for usage in report.assets:
+        groups.setdefault(usage.kind, []).append((usage.bytes_out, usage))
+    kinds = sorted(((sum(v for v, _ in entries), kind) for kind, entries in groups.items()),
+                   reverse=True)
+
+    boxes = []
+    for kind, kx, ky, kw, kh in squarify(kinds, 0, 0, TREEMAP_WIDTH, TREEMAP_HEIGHT):
+        color = KIND_COLORS.get(kind, DEFAULT_COLOR)
+        kind_bytes = sum(v for v, _ in groups[kind])
+        boxes.append(f'<div class="kind" style="left:{kx:.1f}px;top:{ky:.1f}px;width:{kw:.1f}px;'
+                     f'height:{kh:.1f}px"><span>{html.escape(kind)} {format_size(kind_bytes)}</span></div>')
+        # 留出类型标题的高度
+        header = 18 if kh > 36 else 0
+        for usage, x, y, w, h in squarify(groups[kind], kx + 1, ky + header + 1, kw - 2, kh - header - 2):
+            if usage is None:
+                title = f"HTML文档 {format_size(report.document_bytes)}"
+                label = 'HTML'
+            else:
+                title = (f"{usage.path}\n{format_size(usage.bytes_out)}"
+                         f"（原始 {format_size(usage.bytes_in)}，引用 {usage.references} 次，"
+                         f"编码开销 {format_size(usage.overhead)}）")
+                label = os.path.basename(usage.path.rstrip('/\\')) or usage.path
+            text = f'<span>{html.escape(label)}</span>' if w > 60 and h > 16 else ''
+            boxes.append(f'<div class="leaf" title="{html.escape(title)}" style="left:{x:.1f}px;'
+                         f'top:{y:.1f}px;width:{w:.1f}px;height:{h:.1f}px;background:{color}">'
+                         f'{text}</div>')
+
+    rows = ''.join(
+        f'<tr><td>{html.escape(kind)}</td><td>{totals["count"]}</td><td>{totals["references"]}</td>'
+        f'<td>{format_size(totals["bytes_in"])}</td><td>{format_size(totals["bytes_out"])}</td>'
+        f'<td>{format_size(totals["overhead"])}</td></tr>'
+        for kind, totals in sorted(report.by_kind.items(), key=lambda i: -i[1]['bytes_out']))
+    violations = ''.join(f'<li>{html.escape(v)}</li>' for v in report.violations)
+    title = html.escape(report.output_file or report.folder_path)
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>输出组成 - {title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 20px; color: #333; }}
+#map {{ position: relative; width: {TREEMAP_WIDTH}px; height: {TREEMAP_HEIGHT}px; background: #eee; }}
+.kind, .leaf {{ position: absolute; box-sizing: border-box; overflow: hidden; }}
+.kind {{ border: 1px solid #fff; }}
+.kind > span {{ font-size: 12px; font-weight: bold; padding: 2px 4px; display: block; white-space: nowrap; }}
+.leaf {{ border: 1px solid rgba(255, 255, 255, 0.6); color: #fff; font-size: 11px; }}
+.leaf > span {{ padding: 1px 3px; display: block; white-space: nowrap; }}
+table {{ border-collapse: collapse; margin-top: 16px; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 10px; text-align: right; }}
+td:first-child {{ text-align: left; }}
+.warn {{ color: #c0392b; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<p>输出大小 {format_size(report.output_size)}，HTML文档 {format_size(report.document_bytes)}，
+编码开销 {format_size(report.overhead)}，重复引用 {format_size(report.duplicate_bytes)}</p>
+<ul class="warn">{violations}</ul>
+<div id="map">
+{chr(10).join(boxes)}
+</div>
+<table>
+<tr><th>类型</th><th>资源数</th><th>引用次数</th><th>原始大小</th><th>输出占用</th><th>编码开销</th></tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+
+
+def write_treemap(report, path):
+    """把矩形树图写入HTML文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_treemap(report))
+
+
+def write_reports(result, report=None):
+    """
+    在输出文件旁写入<输出文件>.report.json和<输出文件>.treemap.html
+
+    Args:
+        result (ConversionResult): 转换结果
+        report (OutputReport, optional): 已有的分析结果，默认为None（重新分析）
+
+    Returns:
+        OutputReport: 分析结果
+    """
+    report = report or analyze_result(result)
+    report.violations = list(result.budget_violations)
+    report.write_json(result.output_file + '.report.json')
+    write_treemap(report, result.output_file + '.treemap.html')
+    logger.info(f"已写入输出分析报告: {result.output_file}.report.json")
+    return report
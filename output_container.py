@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 索引容器输出模块
+
+批量转换大量小文件夹时，每个文件夹写一个输出文件会让文件系统的元数据操作成为瓶颈，
+之后在巨大的目录中查找文件也很慢。此模块把批量输出写入单个SQLite数据库：
+- 每个输出文档按文件夹名索引，可以随机读取单个文档
+- 文档内容用zlib压缩后按SHA-256内容地址保存，内容相同的输出只保存一份
+- 写入先在内存中积累，每batch_size个文档在一个事务中提交，
+  写入开销随字节数增长而不是随文件数增长
+- 提供列出、解包和通过HTTP浏览容器内容的函数（见cli模块的list、extract和serve命令）
+"""
+
+import os
+import html
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 容器格式版本，格式变化时递增
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    format TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest),
+    size INTEGER NOT NULL,
+    folder TEXT NOT NULL DEFAULT ''
+);
+"""
+
+# HTTP服务使用的内容类型
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'mhtml': 'multipart/related; type="text/html"',
+}
+
+# 容器首页最多列出的文档数量
+LIST_LIMIT = 1000
+
+
+class ContainerError(Exception):
+    """容器文件无效或格式版本不受支持"""
+
+
+class OutputContainer:
+    """
+    以SQLite数据库保存的输出容器，可以在多个转换线程之间共享
+
+    Args:
+        path (str): 容器文件路径，不存在时创建
+        batch_size (int, optional): 每个写入事务提交的文档数量，默认为256
+        compress_level (int, optional): zlib压缩级别，默认为6
+        readonly (bool, optional): 是否以只读方式打开已有的容器，默认为False
+
+    Raises:
+        ContainerError: 文件不是有效的容器或格式版本不受支持
+    """
+
+    def __init__(self, path, batch_size=256, compress_level=6, readonly=False):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.compress_level = compress_level
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._pending_blobs = {}
+        self._pending_documents = {}
+        self.documents_written = 0
+        self.bytes_written = 0
+        self.blobs_shared = 0
+        self._db = None
+        try:
+            if readonly:
+                self._db = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro",
+                                           uri=True, check_same_thread=False)
+            else:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute('PRAGMA synchronous=NORMAL')
+                self._db.executescript(SCHEMA)
+                self._db.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)',
+                                 ('schema_version', str(SCHEMA_VERSION)))
+                self._db.commit()
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.DatabaseError as e:
+            if self._db is not None:
+                self._db.close()
+            raise ContainerError(f"不是有效的输出容器: {path} ({e})") from e
+        if row is None or int(row[0]) > SCHEMA_VERSION:
+            self._db.close()
+            raise ContainerError(f"不支持的输出容器版本: {path}")
+
+    def locator(self, name):
+        """返回容器中文档的定位字符串，用作ConversionResult.output_file"""
+        return f"{self.path}#{name}"
+
+    def add(self, name, output_format, chunks, folder=''):
+        """
+        写入一个文档；同名文档已存在时替换
+
+        压缩在调用线程中进行，只有加入待提交队列时需要加锁。
+
+        Args:
+            name (str): 文档名称（文件夹名）
+            output_format (str): 'html'或'mhtml'
+            chunks (iterable): 文档内容的字节块
+            folder (str, optional): 输入文件夹路径，默认为空
+
+        Returns:
+            int: 文档未压缩的字节数
+        """
+        hasher = hashlib.sha256()
+        compressor = zlib.compressobj(self.compress_level)
+        parts = []
+        size = 0
+        for chunk in chunks:
+            hasher.update(chunk)
+            size += len(chunk)
+            parts.append(compressor.compress(chunk))
+        parts.append(compressor.flush())
+        digest = hasher.hexdigest()
+        with self._lock:
+            if digest in self._pending_blobs or self._stored(digest):
+                self.blobs_shared += 1
+            else:
+                self._pending_blobs[digest] = ('zlib', size, b''.join(parts))
+            self._queue_document(name, output_format, digest, size, folder)
+        return size
+
+    def link(self, name, source_name, folder=''):
+        """
+        写入一个与已有文档内容相同的文档，只增加索引项
+
+        Args:
+            name (str): 文档名称
+            source_name (str): 已写入的文档名称
+            folder (str, optional): 输入文件夹路径，默认为空
+
+        Returns:
+            int: 文档未压缩的字节数
+
+        Raises:
+            KeyError: source_name不存在
+        """
+        with self._lock:
+            document = self._pending_documents.get(source_name)
+            if document is None:
+                document = self._db.execute('SELECT format, digest, size FROM documents WHERE name = ?',
+                                            (source_name,)).fetchone()
+                if document is None:
+                    raise KeyError(source_name)
+            output_format, digest, size = document[:3]
+            self.blobs_shared += 1
+            self._queue_document(name, output_format, digest, size, folder)
+        return size
+
+    def _stored(self, digest):
+        return self._db.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone() is not None
+
+    def _queue_document(self, name, output_format, digest, size, folder):
+        """加入待提交队列，达到batch_size时提交；调用方持有锁"""
+        self._pending_documents[name] = (output_format, digest, size, folder)
+        if len(self._pending_documents) >= self.batch_size:
+            self._flush()
+
+    def flush(self):
+        """提交所有待写入的文档"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending_documents and not self._pending_blobs:
+            return
+        with self._db:
+            self._db.executemany('INSERT OR IGNORE INTO blobs (digest, codec, size, data) VALUES (?, ?, ?, ?)',
+                                 [(digest,) + blob for digest, blob in self._pending_blobs.items()])
+            self._db.executemany('INSERT OR REPLACE INTO documents (name, format, digest, size, folder) '
+                                 'VALUES (?, ?, ?, ?, ?)',
+                                 [(name,) + document for name, document in self._pending_documents.items()])
+        self.documents_written += len(self._pending_documents)
+        self.bytes_written += sum(len(blob[2]) for blob in self._pending_blobs.values())
+        logger.debug(f"已提交 {len(self._pending_documents)} 个文档到输出容器: {self.path}")
+        self._pending_blobs.clear()
+        self._pending_documents.clear()
+
+    def names(self, prefix='', limit=None):
+        """
+        按名称顺序返回已提交的文档名称
+
+        Args:
+            prefix (str, optional): 只返回以此开头的名称，默认为空
+            limit (int, optional): 最多返回的数量，默认为None（不限制）
+
+        Returns:
+            list: 文档名称列表
+        """
+        # 按名称范围查询，可以使用主键索引
+        query = 'SELECT name FROM documents'
+        parameters = ()
+        if prefix:
+            upper = _prefix_upper_bound(prefix)
+            if upper is None:
+                query += ' WHERE name >= ?'
+                parameters = (prefix,)
+            else:
+                query += ' WHERE name >= ? AND name < ?'
+                parameters = (prefix, upper)
+        query += ' ORDER BY name'
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters += (limit,)
+        with self._lock:
+            return [row[0] for row in self._db.execute(query, parameters)]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def get_raw(self, name):
+        """
+        读取文档的压缩数据
+
+        Returns:
+            tuple or None: (格式, 编码方式, 未压缩字节数, 压缩数据, 内容摘要)，文档不存在时返回None
+        """
+        with self._lock:
+            return self._db.execute('SELECT d.format, b.codec, b.size, b.data, d.digest '
+                                    'FROM documents d JOIN blobs b ON b.digest = d.digest '
+                                    'WHERE d.name = ?', (name,)).fetchone()
+
+    def get(self, name):
+        """
+        读取文档内容
+
+        Returns:
+            tuple or None: (格式, 文档字节)，文档不存在时返回None
+        """
+        row = self.get_raw(name)
+        if row is None:
+            return None
+        output_format, codec, _, data, _ = row
+        return output_format, zlib.decompress(data) if codec == 'zlib' else data
+
+    def extract(self, output_dir, names=None):
+        """
+        把文档解包为<名称>.<格式>文件
+
+        Args:
+            output_dir (str): 输出目录
+            names (list, optional): 要解包的文档名称，默认为None（全部）
+
+        Returns:
+            int: 解包的文档数量
+
+        Raises:
+            KeyError: 指定的文档不存在
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        count = 0
+        for name in (names if names else self.names()):
+            document = self.get(name)
+            if document is None:
+                raise KeyError(name)
+            output_format, data = document
+            output_file = os.path.join(output_dir, f"{os.path.basename(name)}.{output_format}")
+            with open(output_file, 'wb') as f:
+                f.write(data)
+            logger.debug(f"已解包: {output_file}")
+            count += 1
+        return count
+
+    def close(self):
+        """提交待写入的文档并关闭数据库"""
+        with self._lock:
+            if not self.readonly:
+                self._flush()
+                # 写入结束后恢复回滚日志模式，容器是单个文件，可以直接复制或只读打开
+                self._db.execute('PRAGMA journal_mode=DELETE')
+            self._db.close()
+        if not self.readonly and self.documents_written:
+            logger.info(f"输出容器已写入 {self.documents_written} 个文档，"
+                        f"压缩后 {self.bytes_written} 字节，{self.blobs_shared} 个文档共享了相同内容: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _prefix_upper_bound(prefix):
+    """
+    返回大于所有以prefix开头的名称的最小字符串，用作范围查询的上界
+
+    SQLite按UTF-8字节比较文本，与按码位比较的顺序相同。末尾的U+10FFFF无法递增，去掉后递增前一个字符；
+    递增跳过代理区，代理码位不能编码为UTF-8。
+
+    Returns:
+        str or None: 上界，prefix全部由U+10FFFF组成时返回None（不需要上界）
+    """
+    stripped = prefix.rstrip('\U0010ffff')
+    if not stripped:
+        return None
+    codepoint = ord(stripped[-1]) + 1
+    if 0xD800 <= codepoint <= 0xDFFF:
+        codepoint = 0xE000
+    return stripped[:-1] + chr(codepoint)
+
+
+class _ContainerRequestHandler(BaseHTTPRequestHandler):
+    """容器浏览服务的请求处理：/列出文档，/<名称>返回文档"""
+
+    container = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = unquote(url.path.lstrip('/'))
+        if not name:
+            prefix = parse_qs(url.query).get('prefix', [''])[0]
+            self._send_index(prefix)
+            return
+        row = self.container.get_raw(name)
+        if row is None:
+            self.send_error(404, 'Not Found')
+            return
+        output_format, codec, size, data, digest = row
+        etag = f'"{digest}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(output_format, 'application/octet-stream'))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        # HTTP的deflate编码就是zlib格式，客户端支持时直接发送压缩数据
+        if codec == 'zlib' and 'deflate' in self.headers.get('Accept-Encoding', ''):
+            self.send_header('Content-Encoding', 'deflate')
+        elif codec == 'zlib':
+            data = zlib.decompress(data)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_index(self, prefix):
+        names = self.container.names(prefix, LIST_LIMIT)
+        items = ''.join(f'<li><a href="/{quote(name)}">{html.escape(name)}</a></li>' for name in names)
+        more = f'<p>只列出前 {LIST_LIMIT} 个，可用 ?prefix= 按名称前缀筛选</p>' if len(names) >= LIST_LIMIT else ''
+        body = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(self.container.path)}</title>'
+                f'</head><body><h1>{html.escape(self.container.path)}</h1>{more}<ul>{items}</ul></body></html>'
+                ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def serve_container(path, host='127.0.0.1', port=8000):
+    """
+    通过HTTP浏览容器中的文档，直到被中断
+
+    Args:
+        path (str): 容器文件路径
+        host (str, optional): 监听地址，默认为127.0.0.1
+        port (int, optional): 监听端口，默认为8000
+
+    Raises:
+        ContainerError: 文件不是有效的容器
+    """
+    container = OutputContainer(path, readonly=True)
+    handler = type('ContainerRequestHandler', (_ContainerRequestHandler,), {'container': container})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"正在提供 {path} 中的 {len(container)} 个文档: http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        container.close()
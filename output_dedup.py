@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 批量输出去重模块
+
+此模块在批量转换前找出输入完全相同的文件夹，只转换其中一个，
+其余文件夹的输出通过reflink、硬链接或复制共享同一份内容：
+- 先按文件相对路径和大小做一次只需stat的浅比较，只有浅比较相同的文件夹才计算内容哈希
+- 内容哈希覆盖文件夹中全部文件的相对路径和内容
+- 优先使用reflink（写时复制，修改其中一个输出不会影响另一个），
+  文件系统不支持时使用硬链接，跨设备等情况下退回到复制
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Linux上FICLONE ioctl的请求码（btrfs、XFS等支持写时复制的文件系统）
+FICLONE = 0x40049409
+
+# 计算哈希时每次读取的块大小
+CHUNK_SIZE = 1024 * 1024
+
+
+def _walk_files(folder_path):
+    """按相对路径排序返回文件夹中全部文件的(相对路径, 绝对路径, 大小)列表"""
+    files = []
+    for root, dirs, names in os.walk(folder_path):
+        dirs.sort()
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, folder_path).replace(os.sep, '/')
+            files.append((rel, path, size))
+    files.sort()
+    return files
+
+
+def folder_signature(folder_path):
+    """
+    返回文件夹的浅签名：全部文件的相对路径和大小
+
+    Args:
+        folder_path (str): 文件夹路径
+
+    Returns:
+        tuple: 可哈希的签名
+    """
+    return tuple((rel, size) for rel, _, size in _walk_files(folder_path))
+
+
+def folder_digest(folder_path):
+    """
+    计算文件夹全部文件相对路径和内容的SHA-256
+
+    Args:
+        folder_path (str): 文件夹路径
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for rel, path, size in _walk_files(folder_path):
+        digest.update(rel.encode('utf-8') + b'\0' + str(size).encode('ascii') + b'\0')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def group_duplicates(folders, extra_key=None):
+    """
+    把输入相同的文件夹分组
+
+    Args:
+        folders (list): 文件夹路径列表
+        extra_key (callable, optional): 额外的分组键函数，接受文件夹路径，返回字符串；
+            用于区分输入相同但输出仍会不同的文件夹（例如输出中包含文件夹名称）
+
+    Returns:
+        list: 分组列表，每组是文件夹路径列表，组内第一个为代表；
+            分组顺序和组内顺序都与输入顺序一致
+    """
+    def key_of(folder):
+        return extra_key(folder) if extra_key else ''
+
+    # 浅比较：签名唯一的文件夹不可能与其他文件夹重复，无需读取内容
+    by_signature = {}
+    for folder in folders:
+        by_signature.setdefault((key_of(folder), folder_signature(folder)), []).append(folder)
+
+    group_of = {}
+    for candidates in by_signature.values():
+        if len(candidates) == 1:
+            group_of[candidates[0]] = candidates[0]
+            continue
+        by_digest = {}
+        for folder in candidates:
+            try:
+                digest = folder_digest(folder)
+            except OSError as e:
+                logger.debug(f"计算文件夹哈希失败 {folder}: {e}")
+                group_of[folder] = folder
+                continue
+            group_of[folder] = by_digest.setdefault(digest, folder)
+
+    groups = {}
+    for folder in folders:
+        groups.setdefault(group_of[folder], []).append(folder)
+    return list(groups.values())
+
+
+def _reflink(src, dst):
+    """尝试以写时复制方式克隆文件，不支持时抛出OSError"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("当前平台不支持reflink")
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def link_output(src, dst):
+    """
+    让dst与src共享同一份内容；dst已存在时被替换
+
+    Args:
+        src (str): 已生成的输出文件
+        dst (str): 目标输出文件
+
+    Returns:
+        str: 使用的方式，'reflink'、'hardlink'或'copy'
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return 'hardlink'
+    tmp = f'{dst}.{os.getpid()}.tmp'
+    for method, link in (('reflink', _reflink), ('hardlink', os.link)):
+        try:
+            link(src, tmp)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            continue
+        os.replace(tmp, dst)
+        return method
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return 'copy'
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 输出零拷贝拼接模块
+
+输出文件的大部分内容通常是base64编码后的资源。此模块避免这些数据在Python字符串之间反复复制：
+- 资源编码时直接以字节分块写入临时文件，文档中只放入一个短占位符，
+  后续各个处理阶段的正则替换和字符串拼接只需要复制占位符
+- 写出时把文档编码一次，文档片段通过memoryview切片直接写入输出文件，
+  占位符对应的载荷文件用os.copy_file_range（Linux）或os.sendfile在内核中复制，
+  都不可用时使用复用的缓冲区readinto后写入
+- 同一个资源（相同内容和MIME类型）在文档树中只编码和保存一次
+"""
+
+import os
+import re
+import base64
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 文档中的载荷占位符。占位符本身是一个data URL，各处理阶段跳过data:引用的逻辑对它同样适用；
+# 只包含ASCII字母数字和符号，经过HTML转义和JSON序列化后保持不变
+TOKEN_FORMAT = 'data:application/x-html-merge-splice,{}'
+TOKEN_PATTERN = re.compile(r'data:application/x-html-merge-splice,([0-9a-f]{32})')
+TOKEN_BYTES_PATTERN = re.compile(rb'data:application/x-html-merge-splice,([0-9a-f]{32})')
+
+# 分块编码的块大小，必须是3的倍数，保证分块编码的结果与整体编码相同
+ENCODE_CHUNK = 3 * 256 * 1024
+
+# readinto回退方式使用的缓冲区大小
+COPY_BUFFER = 1024 * 1024
+
+
+def _copy_range(src_fd, dst_fd, count, get_buffer):
+    """
+    把src_fd开头的count个字节追加到dst_fd的当前位置
+
+    Args:
+        src_fd (int): 载荷文件描述符
+        dst_fd (int): 输出文件描述符
+        count (int): 字节数
+        get_buffer (callable): 返回readinto回退方式复用的缓冲区
+
+    Returns:
+        str: 使用的方式，'copy_file_range'、'sendfile'或'readinto'
+    """
+    offset = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < count:
+                copied = os.copy_file_range(src_fd, dst_fd, count - offset, offset_src=offset)
+                if copied == 0:
+                    break
+                offset += copied
+            if offset == count:
+                return 'copy_file_range'
+        except OSError:
+            # 跨文件系统、内核不支持等情况，从已复制的位置继续
+            pass
+    if hasattr(os, 'sendfile'):
+        try:
+            while offset < count:
+                sent = os.sendfile(dst_fd, src_fd, offset, count - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == count:
+                return 'sendfile'
+        except OSError:
+            pass
+
+    view = memoryview(get_buffer())
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    with open(src_fd, 'rb', buffering=0, closefd=False) as src:
+        while offset < count:
+            read = src.readinto(view[:min(len(view), count - offset)])
+            if not read:
+                raise OSError(f"载荷文件不完整，缺少 {count - offset} 字节")
+            written = 0
+            while written < read:
+                written += os.write(dst_fd, view[written:read])
+            offset += read
+    return 'readinto'
+
+
+class SpliceStore:
+    """
+    保存编码后资源载荷的临时文件目录
+
+    Args:
+        directory (str, optional): 存放载荷文件的父目录，默认为None（系统临时目录）
+    """
+
+    def __init__(self, directory=None):
+        # 临时目录在写入第一个载荷时才创建，没有资源的小文档不产生任何文件系统操作
+        self.parent = directory
+        self.directory = None
+        self._lock = threading.Lock()
+        self._payloads = {}
+        self._keys = {}
+        self.methods = {}
+        self._copy_buffer = None
+        self.disabled = False
+
+    def data_uri(self, key, raw, mime_type):
+        """
+        把资源编码为data URI并保存到载荷文件
+
+        Args:
+            key (str): 资源路径或URL；同一资源重复引用时不重新计算哈希
+            raw (bytes): 资源原始内容
+            mime_type (str): MIME类型
+
+        Returns:
+            str: 文档中使用的占位符；载荷文件无法写入时返回完整的data URI
+        """
+        with self._lock:
+            digest = self._keys.get((key, mime_type, len(raw)))
+            disabled = self.disabled
+        if digest is None:
+            if disabled:
+                return f"data:{mime_type};base64,{base64.b64encode(raw).decode('ascii')}"
+            hasher = hashlib.sha256(mime_type.encode('utf-8') + b'\0')
+            hasher.update(raw)
+            digest = hasher.hexdigest()[:32]
+            with self._lock:
+                exists = digest in self._payloads
+            if not exists:
+                try:
+                    self._write_payload(digest, raw, mime_type)
+                except OSError as e:
+                    # 临时目录只读或空间不足：之后的资源都在内存中编码，已写入的载荷照常拼接
+                    with self._lock:
+                        first = not self.disabled
+                        self.disabled = True
+                    if first:
+                        logger.warning(f"无法写入资源载荷临时文件，改为在内存中编码: {e}")
+                    return f"data:{mime_type};base64,{base64.b64encode(raw).decode('ascii')}"
+            with self._lock:
+                self._keys[(key, mime_type, len(raw))] = digest
+        return TOKEN_FORMAT.format(digest)
+
+    def _write_payload(self, digest, raw, mime_type):
+        """分块编码资源并写入载荷文件"""
+        with self._lock:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix='html_merge_splice_', dir=self.parent)
+        path = os.path.join(self.directory, digest)
+        view = memoryview(raw)
+        with open(path, 'wb') as f:
+            f.write(f"data:{mime_type};base64,".encode('ascii'))
+            for start in range(0, len(view), ENCODE_CHUNK):
+                f.write(base64.b64encode(view[start:start + ENCODE_CHUNK]))
+            size = f.tell()
+        with self._lock:
+            self._payloads[digest] = (path, size)
+
+    def size(self, text):
+        """返回占位符对应载荷的长度；text不是占位符时返回其自身长度"""
+        match = TOKEN_PATTERN.fullmatch(text)
+        if match is not None and match.group(1) in self._payloads:
+            return self._payloads[match.group(1)][1]
+        return len(text)
+
+    def encoded_size(self, text):
+        """返回文本拼接载荷后的UTF-8字节数"""
+        size = len(text.encode('utf-8', 'surrogatepass'))
+        for match in TOKEN_PATTERN.finditer(text):
+            payload = self._payloads.get(match.group(1))
+            if payload is not None:
+                size += payload[1] - len(match.group(0))
+        return size
+
+    def materialize(self, text):
+        """
+        把文本中的占位符替换为载荷内容
+
+        用于需要再次编码整个文档的场合，例如object和embed内联子文档时的base64编码。
+
+        Args:
+            text (str): 包含占位符的文本
+
+        Returns:
+            str: 替换后的文本
+        """
+        def replace_func(match):
+            path, _ = self._payloads[match.group(1)]
+            with open(path, 'r', encoding='ascii') as f:
+                return f.read()
+        return TOKEN_PATTERN.sub(replace_func, text)
+
+    def iter_bytes(self, text):
+        """
+        按顺序返回拼接载荷后的文本的UTF-8字节块，不在内存中构造完整的文档
+
+        Args:
+            text (str): 包含占位符的文本
+
+        Yields:
+            bytes or memoryview: 文本片段或载荷文件的字节块
+        """
+        data = text.encode('utf-8', 'surrogatepass')
+        view = memoryview(data)
+        position = 0
+        for match in TOKEN_BYTES_PATTERN.finditer(data):
+            payload = self._payloads.get(match.group(1).decode('ascii'))
+            if payload is None:
+                continue
+            yield view[position:match.start()]
+            with open(payload[0], 'rb') as src:
+                while True:
+                    chunk = src.read(COPY_BUFFER)
+                    if not chunk:
+                        break
+                    yield chunk
+            position = match.end()
+        yield view[position:]
+
+    def update_hash(self, hasher, text):
+        """用拼接载荷后的文本更新哈希对象，结果与对materialize(text)的UTF-8编码求哈希相同"""
+        for chunk in self.iter_bytes(text):
+            hasher.update(chunk)
+
+    def write(self, text, output_file, newline=None):
+        """
+        把包含占位符的文档写入输出文件，占位符处拼接载荷文件
+
+        Args:
+            text (str): 文档内容
+            output_file (str): 输出文件路径
+            newline (str, optional): 换行符；为None时与文本模式写文件一致，使用os.linesep
+        """
+        newline = os.linesep if newline is None else newline
+        if newline != '\n':
+            text = text.replace('\n', newline)
+        data = text.encode('utf-8', 'surrogatepass')
+        view = memoryview(data)
+        position = 0
+        with open(output_file, 'wb', buffering=0) as out:
+            for match in TOKEN_BYTES_PATTERN.finditer(data):
+                payload = self._payloads.get(match.group(1).decode('ascii'))
+                if payload is None:
+                    continue
+                self._write_all(out, view[position:match.start()])
+                path, size = payload
+                with open(path, 'rb', buffering=0) as src:
+                    method = _copy_range(src.fileno(), out.fileno(), size, self._buffer)
+                self.methods[method] = self.methods.get(method, 0) + 1
+                position = match.end()
+            self._write_all(out, view[position:])
+
+    def _buffer(self):
+        """返回readinto回退方式复用的缓冲区"""
+        if self._copy_buffer is None:
+            self._copy_buffer = bytearray(COPY_BUFFER)
+        return self._copy_buffer
+
+    @staticmethod
+    def _write_all(out, view):
+        """把memoryview切片完整写入无缓冲的输出文件"""
+        while len(view):
+            written = out.write(view)
+            view = view[written:]
+
+    def close(self):
+        """删除载荷文件"""
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        if self.methods:
+            logger.debug(f"载荷拼接方式: {self.methods}")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 按字节计算的进度跟踪模块
+
+此模块为批量转换提供按输入字节加权的进度、吞吐量和预计剩余时间：
+- 开始前按batch_scheduler.estimate_folder_cost估算每个文件夹的输入字节数，
+  进度按已处理字节占全部计划字节的比例计算，少数大文件夹不会让进度长时间停在99%
+- 每读取一个资源就推进一次进度；单个文件夹的进度不超过其计划字节数，
+  文件夹完成时补足剩余部分，估算偏差不会让进度倒退或超过100%
+- 吞吐量按开始以来的平均值计算，预计剩余时间使用指数平滑后的处理速度
+- 进度事件通过progress_callback投递：回调接受两个参数时以(百分比, ProgressEvent)调用，
+  只接受一个参数的旧式回调仍以百分比调用
+"""
+
+import time
+import inspect
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ProgressEvent:
+    """
+    一次进度事件
+
+    Attributes:
+        done_bytes (int): 已处理的字节数
+        total_bytes (int): 计划处理的总字节数
+        done_assets (int): 已处理的资源数
+        done_items (int): 已完成的文件夹数
+        total_items (int): 计划转换的文件夹数
+        elapsed (float): 开始以来的时间（秒）
+        bytes_per_second (float): 平均处理速度（字节/秒）
+        assets_per_second (float): 平均处理速度（资源/秒）
+        eta (float or None): 平滑后的预计剩余时间（秒），速度未知时为None
+        current_item (str): 当前文件夹
+        current_asset (str): 当前资源
+    """
+    done_bytes: int
+    total_bytes: int
+    done_assets: int
+    done_items: int
+    total_items: int
+    elapsed: float
+    bytes_per_second: float
+    assets_per_second: float
+    eta: Optional[float] = None
+    current_item: str = ''
+    current_asset: str = ''
+
+    @property
+    def fraction(self):
+        """完成比例，0到1之间"""
+        if self.total_bytes <= 0:
+            return 1.0 if self.done_items >= self.total_items else 0.0
+        return min(1.0, self.done_bytes / self.total_bytes)
+
+    @property
+    def percent(self):
+        """完成百分比，0到100之间的整数"""
+        return int(self.fraction * 100)
+
+    def describe(self):
+        """返回进度、吞吐量和预计剩余时间的简短说明"""
+        parts = [f"{self.percent}%",
+                 f"{self.done_items}/{self.total_items} 个文件夹",
+                 f"{self.bytes_per_second / (1024 * 1024):.1f} MB/s",
+                 f"{self.assets_per_second:.0f} 个资源/s"]
+        if self.eta is not None and self.done_items < self.total_items:
+            parts.append(f"剩余约 {format_duration(self.eta)}")
+        return '，'.join(parts)
+
+
+def format_duration(seconds):
+    """把秒数格式化为'1小时2分'、'3分4秒'或'5秒'"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}小时{seconds % 3600 // 60}分"
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60}秒"
+    return f"{seconds}秒"
+
+
+def accepts_event(callback):
+    """回调可以接受两个位置参数（百分比和ProgressEvent）时返回True"""
+    try:
+        parameters = inspect.signature(callback).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [p for p in parameters
+                  if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+    return len(positional) >= 2 or any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in parameters)
+
+
+class ItemProgress:
+    """
+    单个文件夹的进度句柄，通过ConversionOptions.progress传给转换函数
+
+    Args:
+        tracker (ProgressTracker): 所属的进度跟踪器
+        item (str): 文件夹路径
+        planned_bytes (int): 计划处理的字节数
+    """
+
+    def __init__(self, tracker, item, planned_bytes):
+        self.tracker = tracker
+        self.item = item
+        self.planned_bytes = planned_bytes
+        self.done_bytes = 0
+        self.finished = False
+
+    def advance(self, nbytes, asset=''):
+        """记录处理完一个资源"""
+        self.tracker._advance(self, nbytes, asset)
+
+    def finish(self):
+        """记录文件夹转换结束，补足剩余的计划字节；重复调用无效"""
+        self.tracker._finish(self)
+
+
+class ProgressTracker:
+    """
+    线程安全的批量进度跟踪器
+
+    Args:
+        callback (callable, optional): 进度回调，见模块说明；可能在工作线程中调用
+        min_interval (float, optional): 资源级进度事件的最小间隔（秒），默认为0.1；
+            文件夹完成时的事件不受限制
+        smoothing (float, optional): 预计剩余时间使用的处理速度的指数平滑系数，默认为0.3
+    """
+
+    def __init__(self, callback=None, min_interval=0.1, smoothing=0.3):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.smoothing = smoothing
+        self._with_event = callback is not None and accepts_event(callback)
+        self._lock = threading.RLock()
+        self._started = time.monotonic()
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.done_assets = 0
+        self.total_items = 0
+        self.done_items = 0
+        self._last_emit = 0.0
+        self._last_time = self._started
+        self._last_bytes = 0
+        self._rate = None
+        self._last_percent = None
+
+    def add_item(self, item, planned_bytes):
+        """
+        加入一个计划转换的文件夹
+
+        Args:
+            item (str): 文件夹路径
+            planned_bytes (int): 估算的输入字节数
+
+        Returns:
+            ItemProgress: 该文件夹的进度句柄
+        """
+        handle = ItemProgress(self, item, max(1, planned_bytes))
+        with self._lock:
+            self.total_bytes += handle.planned_bytes
+            self.total_items += 1
+        return handle
+
+    def _advance(self, handle, nbytes, asset):
+        with self._lock:
+            if handle.finished:
+                return
+            step = max(0, min(nbytes, handle.planned_bytes - handle.done_bytes))
+            handle.done_bytes += step
+            self.done_bytes += step
+            self.done_assets += 1
+            self._emit(handle.item, asset, force=False)
+
+    def _finish(self, handle):
+        with self._lock:
+            if handle.finished:
+                return
+            handle.finished = True
+            self.done_bytes += handle.planned_bytes - handle.done_bytes
+            handle.done_bytes = handle.planned_bytes
+            self.done_items += 1
+            self._emit(handle.item, '', force=True)
+
+    def snapshot(self, item='', asset=''):
+        """返回当前进度的ProgressEvent"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._started
+            eta = None
+            if self._rate:
+                eta = (self.total_bytes - self.done_bytes) / self._rate
+            return ProgressEvent(self.done_bytes, self.total_bytes, self.done_assets,
+                                 self.done_items, self.total_items, elapsed,
+                                 self.done_bytes / elapsed if elapsed > 0 else 0.0,
+                                 self.done_assets / elapsed if elapsed > 0 else 0.0,
+                                 eta, item, asset)
+
+    def _update_rate(self, now):
+        """按上次更新以来的处理量更新平滑速度"""
+        interval = now - self._last_time
+        if interval <= 0:
+            return
+        rate = (self.done_bytes - self._last_bytes) / interval
+        self._rate = rate if self._rate is None else \
+            self.smoothing * rate + (1 - self.smoothing) * self._rate
+        self._last_time = now
+        self._last_bytes = self.done_bytes
+
+    def _emit(self, item, asset, force):
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        self._update_rate(now)
+        if self.callback is None:
+            return
+        event = self.snapshot(item, asset)
+        if self._with_event:
+            self.callback(event.percent, event)
+        elif force or event.percent != self._last_percent:
+            # 旧式回调只在百分比变化时调用
+            self.callback(event.percent)
+        self._last_percent = event.percent
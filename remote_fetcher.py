@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 远程资源下载模块
+
+此模块为可选的远程资源内联功能提供HTTP下载支持：
+- 按主机复用keep-alive连接，并限制每个主机的并发连接数
+- 通过线程池并发预取文档中引用的全部远程资源
+- 超时、失败重试和重定向处理
+- 磁盘HTTP缓存，支持Cache-Control max-age以及基于ETag/Last-Modified的条件请求
+- 同一个下载器实例内相同URL只下载一次，批量转换时多个页面引用同一个CDN文件只请求一次
+"""
+
+import os
+import gzip
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit, urljoin
+
+logger = logging.getLogger(__name__)
+
+# 需要跟随的重定向状态码
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+USER_AGENT = 'html-merge-tool/1.0'
+
+
+def default_cache_dir():
+    """返回默认的磁盘HTTP缓存目录（用户缓存目录下的html_merge_tool/http）"""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'html_merge_tool', 'http')
+
+
+class FetchError(Exception):
+    """远程资源下载失败时抛出的异常"""
+
+
+@dataclass
+class FetchResult:
+    """
+    远程资源的下载结果
+
+    Attributes:
+        url (str): 请求的URL
+        final_url (str): 跟随重定向后的最终URL
+        body (bytes): 响应内容（已解压）
+        content_type (str or None): 响应的MIME类型（不含参数）
+        source (str): 内容来源，取值为network（网络下载）、revalidated（条件请求确认缓存有效）
+            或cache（缓存未过期，未发起请求）
+    """
+    url: str
+    final_url: str
+    body: bytes
+    content_type: Optional[str]
+    source: str
+
+
+class HttpCache:
+    """
+    磁盘HTTP缓存
+
+    每个URL对应两个文件：<sha256>.body保存响应内容，<sha256>.json保存URL、
+    ETag、Last-Modified、Content-Type和过期时间等元数据。
+
+    Args:
+        cache_dir (str): 缓存目录，不存在时自动创建
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def get(self, url):
+        """
+        读取URL的缓存元数据
+
+        Returns:
+            dict or None: 缓存元数据，未缓存时返回None
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or not os.path.exists(body_path):
+            return None
+        return meta
+
+    def read_body(self, url):
+        """读取URL的缓存内容"""
+        _, body_path = self._paths(url)
+        with open(body_path, 'rb') as f:
+            return f.read()
+
+    def put(self, url, body, meta):
+        """
+        写入缓存；先写临时文件再替换，避免并发读取到不完整的内容
+
+        Args:
+            url (str): 请求的URL
+            body (bytes): 响应内容
+            meta (dict): 缓存元数据
+        """
+        meta_path, body_path = self._paths(url)
+        meta = dict(meta, url=url)
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(body_path + suffix, 'wb') as f:
+            f.write(body)
+        os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+
+    def touch(self, url, meta):
+        """更新缓存元数据（例如条件请求后刷新过期时间）"""
+        meta_path, _ = self._paths(url)
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(dict(meta, url=url), f)
+        os.replace(meta_path + suffix, meta_path)
+
+
+def _max_age(cache_control):
+    """解析Cache-Control中的max-age（秒），不可缓存或未指定时返回0"""
+    if not cache_control:
+        return 0
+    directives = [d.strip().lower() for d in cache_control.split(',')]
+    if 'no-store' in directives or 'no-cache' in directives:
+        return 0
+    for directive in directives:
+        if directive.startswith('max-age='):
+            try:
+                return max(0, int(directive[len('max-age='):]))
+            except ValueError:
+                return 0
+    return 0
+
+
+def _decode_body(body, content_encoding):
+    """按Content-Encoding解压响应内容"""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class RemoteFetcher:
+    """
+    带连接池和磁盘缓存的远程资源下载器
+
+    下载器是线程安全的，可以在批量转换的所有页面之间共享。
+
+    Args:
+        cache_dir (str, optional): 磁盘缓存目录，默认为None（只在内存中去重）
+        max_per_host (int, optional): 每个主机的最大并发连接数，默认为6
+        timeout (float, optional): 连接和读取超时（秒），默认为15
+        retries (int, optional): 网络错误或5xx响应时的重试次数，默认为2
+        max_workers (int, optional): 预取线程池的线程数，默认为16
+    """
+
+    def __init__(self, cache_dir=None, max_per_host=6, timeout=15, retries=2, max_workers=16):
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='remote-fetch')
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._host_slots = {}
+        self._futures = {}
+        self._ssl_context = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def prefetch(self, urls):
+        """
+        在后台并发下载一组URL，不等待完成
+
+        Args:
+            urls (iterable): 要预取的URL
+        """
+        for url in urls:
+            self._future(url)
+
+    def fetch(self, url):
+        """
+        获取URL的内容；同一个URL在下载器生命周期内只下载一次
+
+        Args:
+            url (str): 以http://或https://开头的URL
+
+        Returns:
+            FetchResult: 下载结果
+
+        Raises:
+            FetchError: 下载失败
+        """
+        return self._future(url).result()
+
+    def close(self):
+        """关闭线程池和所有空闲连接"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            for conn in pool:
+                conn.close()
+
+    def _future(self, url):
+        url = url.split('#', 1)[0]
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._executor.submit(self._fetch_cached, url)
+                self._futures[url] = future
+            return future
+
+    def _fetch_cached(self, url):
+        meta = self.cache.get(url) if self.cache else None
+        headers = {}
+        if meta:
+            # 缓存未过期时直接使用
+            if meta.get('expires', 0) > time.time():
+                logger.debug(f"使用HTTP缓存: {url}")
+                return FetchResult(url, meta.get('final_url', url), self.cache.read_body(url),
+                                   meta.get('content_type'), 'cache')
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        status, final_url, response_headers, body = self._request(url, headers)
+        max_age = _max_age(response_headers.get('cache-control'))
+        if status == 304 and meta:
+            logger.debug(f"HTTP缓存有效: {url}")
+            meta['expires'] = time.time() + max_age
+            self.cache.touch(url, meta)
+            return FetchResult(url, meta.get('final_url', url), self.cache.read_body(url),
+                               meta.get('content_type'), 'revalidated')
+        if status != 200:
+            raise FetchError(f"HTTP {status}: {url}")
+
+        content_type = response_headers.get('content-type')
+        if content_type:
+            content_type = content_type.split(';', 1)[0].strip() or None
+        if self.cache:
+            self.cache.put(url, body, {
+                'final_url': final_url,
+                'content_type': content_type,
+                'etag': response_headers.get('etag'),
+                'last_modified': response_headers.get('last-modified'),
+                'expires': time.time() + max_age,
+            })
+        logger.debug(f"已下载: {url} ({len(body)} 字节)")
+        return FetchResult(url, final_url, body, content_type, 'network')
+
+    def _request(self, url, headers):
+        """发送GET请求，跟随重定向，返回(状态码, 最终URL, 小写响应头, 内容)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._request_with_retry(url, headers)
+            if status in REDIRECT_STATUSES and response_headers.get('location'):
+                url = urljoin(url, response_headers['location'])
+                continue
+            return status, url, response_headers, body
+        raise FetchError(f"重定向次数过多: {url}")
+
+    def _request_with_retry(self, url, headers):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(2.0, 0.25 * (2 ** (attempt - 1))))
+            try:
+                status, response_headers, body = self._request_once(url, headers)
+            except (OSError, http.client.HTTPException) as e:
+                last_error = e
+                logger.debug(f"请求失败（第{attempt + 1}次）{url}: {e}")
+                continue
+            if status >= 500:
+                last_error = FetchError(f"HTTP {status}: {url}")
+                continue
+            return status, response_headers, body
+        raise FetchError(f"下载失败 {url}: {last_error}")
+
+    def _request_once(self, url, headers):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise FetchError(f"不支持的URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = {
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        request_headers.update(headers)
+
+        with self._slot(key):
+            conn = self._acquire(key)
+            try:
+                conn.request('GET', path, headers=request_headers)
+                response = conn.getresponse()
+                body = response.read()
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+        return response.status, response_headers, _decode_body(
+            body, response_headers.get('content-encoding'))
+
+    def _slot(self, key):
+        with self._lock:
+            slot = self._host_slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[key] = slot
+        return slot
+
+    def _acquire(self, key):
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool:
+                return pool.pop()
+        scheme, host, port = key
+        if scheme == 'https':
+            if self._ssl_context is None:
+                import ssl
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout,
+                                               context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _release(self, key, conn):
+        with self._lock:
+            self._pools.setdefault(key, []).append(conn)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTML合并工具 - 响应式图片候选选择模块
+
+此模块处理img的srcset/sizes属性和<picture>中的<source>，按目标视口宽度和设备像素比
+只选出一个（或少数几个）候选图片，未选中的候选不会被读取：
+- <picture>按浏览器的规则选择第一个type受支持且media条件成立的<source>，都不成立时使用其中的img
+- 按sizes计算图片的布局宽度，把w描述符换算为像素密度，选择密度不低于目标设备像素比的最小候选，
+  没有这样的候选时选择密度最高的候选
+- 选中的候选密度为1时改写为src，由replace_images按普通图片内联（支持懒加载）；
+  否则内联为带x描述符的srcset，保证图片的显示尺寸与浏览器选择该候选时一致
+- 保留多个候选时，依次加入密度更高的候选，全部以x描述符写入srcset，每个候选只内联一次
+"""
+
+import re
+import html
+import logging
+
+from html_converter import (AssetRecord, STATUS_INLINED, _data_uri_size, _encode_data_uri, _load_asset,
+                            _record)
+
+logger = logging.getLogger(__name__)
+
+# 匹配<picture>元素或带srcset属性的img标签；两者在一次替换中处理，改写后的标签不会被再次处理
+RESPONSIVE_PATTERN = re.compile(r'(<picture\b[^>]*>)(.*?)(</picture\s*>)|<img\b[^>]*\ssrcset\s*=[^>]*>',
+                                re.IGNORECASE | re.DOTALL)
+
+# 匹配<source>和<img>标签
+SOURCE_PATTERN = re.compile(r'<source\b[^>]*>', re.IGNORECASE)
+IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+
+# 媒体查询中的单个特性
+MEDIA_FEATURE_PATTERN = re.compile(r'\(\s*([\w-]+)\s*(?::\s*([^)]+?))?\s*\)')
+
+# 按浏览器普遍支持的格式判断<source type>
+SUPPORTED_TYPES = ('image/avif', 'image/webp', 'image/jpeg', 'image/png', 'image/gif',
+                   'image/svg+xml', 'image/bmp', 'image/x-icon')
+
+# 长度单位换算时使用的字号
+FONT_SIZE = 16
+
+
+def _attr_pattern(name):
+    """返回匹配指定属性及其取值的正则表达式"""
+    return re.compile(r'(\s)' + name + r'''\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+
+ATTR_PATTERNS = {name: _attr_pattern(name) for name in ('src', 'srcset', 'sizes', 'media', 'type')}
+
+
+def _get_attr(tag, name):
+    """返回标签中属性的取值（已反转义），属性不存在时返回None"""
+    match = ATTR_PATTERNS[name].search(tag)
+    if match is None:
+        return None
+    value = next(v for v in match.group(2, 3, 4) if v is not None)
+    return html.unescape(value)
+
+
+def _remove_attrs(tag, names):
+    """删除标签中的指定属性"""
+    for name in names:
+        tag = ATTR_PATTERNS[name].sub('', tag)
+    return tag
+
+
+def parse_srcset(srcset):
+    """
+    解析srcset属性
+
+    Args:
+        srcset (str): srcset属性值
+
+    Returns:
+        list: (地址, 描述符类型'x'或'w', 数值)列表；没有描述符的候选按1x处理，无法识别的候选被忽略
+    """
+    candidates = []
+    i = 0
+    n = len(srcset)
+    while i < n:
+        while i < n and (srcset[i].isspace() or srcset[i] == ','):
+            i += 1
+        start = i
+        while i < n and not srcset[i].isspace():
+            i += 1
+        url = srcset[start:i]
+        if not url:
+            break
+        descriptor = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            start = i
+            depth = 0
+            while i < n and (srcset[i] != ',' or depth):
+                depth += {'(': 1, ')': -1}.get(srcset[i], 0)
+                i += 1
+            descriptor = srcset[start:i].strip()
+        kind, value = 'x', 1.0
+        for token in descriptor.split():
+            try:
+                if token[-1] in 'xw':
+                    kind, value = token[-1], float(token[:-1])
+            except ValueError:
+                kind = None
+        if kind is not None and value > 0:
+            candidates.append((url, kind, value))
+    return candidates
+
+
+def _length(value, viewport):
+    """把CSS长度换算为像素，无法识别时返回None"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*(px|vw|em|rem)?\s*', value)
+    if match is None:
+        return None
+    number = float(match.group(1))
+    unit = (match.group(2) or 'px').lower()
+    if unit == 'vw':
+        return number * viewport.width / 100
+    if unit in ('em', 'rem'):
+        return number * FONT_SIZE
+    return number
+
+
+class Viewport:
+    """
+    选择候选图片时假定的目标视口
+
+    Args:
+        width (int): 视口宽度（CSS像素）
+        device_pixel_ratio (float): 设备像素比
+    """
+
+    def __init__(self, width=1280, device_pixel_ratio=1.0):
+        self.width = width
+        self.device_pixel_ratio = device_pixel_ratio
+
+    def _feature(self, name, value):
+        """判断单个媒体特性是否成立，无法识别的特性返回None"""
+        name = name.lower()
+        if value is None:
+            return name in ('color', 'hover', 'pointer')
+        value = value.strip().lower()
+        if name in ('min-width', 'max-width', 'width'):
+            length = _length(value, self)
+            if length is None:
+                return None
+            return {'min-width': self.width >= length, 'max-width': self.width <= length,
+                    'width': self.width == length}[name]
+        if name in ('min-resolution', 'max-resolution', '-webkit-min-device-pixel-ratio',
+                    '-webkit-max-device-pixel-ratio', 'min--moz-device-pixel-ratio'):
+            match = re.fullmatch(r'([\d.]+)\s*(dppx|x|dpi|dpcm)?', value)
+            if match is None:
+                return None
+            ratio = float(match.group(1))
+            ratio /= {'dpi': 96, 'dpcm': 96 / 2.54}.get(match.group(2), 1)
+            if name.startswith('max') or '-max-' in name:
+                return self.device_pixel_ratio <= ratio
+            return self.device_pixel_ratio >= ratio
+        if name == 'orientation':
+            return value == 'landscape'
+        if name == 'prefers-color-scheme':
+            return value == 'light'
+        if name == 'prefers-reduced-motion':
+            return value == 'no-preference'
+        return None
+
+    def matches(self, media):
+        """
+        判断媒体查询列表是否成立
+
+        Args:
+            media (str): 媒体查询列表，例如'(min-width: 800px) and (max-width: 1200px), print'
+
+        Returns:
+            bool: 任何一个查询成立时返回True；包含无法识别的特性的查询按不成立处理
+        """
+        for query in media.split(','):
+            query = query.strip().lower()
+            if not query:
+                continue
+            negate = query.startswith('not ')
+            if negate:
+                query = query[4:]
+            if query.startswith('only '):
+                query = query[5:]
+            media_type = re.match(r'([a-z]+)\b', query)
+            matched = media_type is None or media_type.group(1) in ('all', 'screen')
+            for feature in MEDIA_FEATURE_PATTERN.finditer(query):
+                value = self._feature(feature.group(1), feature.group(2))
+                if value is None:
+                    matched = None
+                    break
+                matched = matched and value
+            if matched is None:
+                continue
+            if matched != negate:
+                return True
+        return False
+
+    def slot_width(self, sizes):
+        """
+        按sizes属性计算图片的布局宽度
+
+        Args:
+            sizes (str or None): sizes属性值，None或无法识别时按100vw计算
+
+        Returns:
+            float: 布局宽度（CSS像素）
+        """
+        for entry in (sizes or '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            condition, _, length = entry.rpartition(')')
+            if condition:
+                if not self.matches(condition + ')'):
+                    continue
+            else:
+                length = entry
+            width = _length(length, self)
+            if width is not None and width > 0:
+                return width
+        return float(self.width)
+
+
+def select_candidates(candidates, sizes, viewport, count=1):
+    """
+    按目标视口选择候选图片
+
+    Args:
+        candidates (list): parse_srcset返回的候选列表
+        sizes (str or None): sizes属性值
+        viewport (Viewport): 目标视口
+        count (int, optional): 保留的候选数量，默认为1
+
+    Returns:
+        list: (地址, 像素密度)列表，按密度从低到高排列，第一个为目标设备像素比下选中的候选
+    """
+    slot = viewport.slot_width(sizes) if any(kind == 'w' for _, kind, _ in candidates) else None
+    by_density = {}
+    for url, kind, value in candidates:
+        density = value / slot if kind == 'w' else value
+        by_density.setdefault(round(density, 3), url)
+    densities = sorted(by_density)
+    if not densities:
+        return []
+    chosen = next((i for i, d in enumerate(densities) if d >= viewport.device_pixel_ratio - 1e-3),
+                  len(densities) - 1)
+    return [(by_density[d], d) for d in densities[chosen:chosen + max(1, count)]]
+
+
+def _format_density(density):
+    """把像素密度格式化为x描述符"""
+    return f"{density:.3f}".rstrip('0').rstrip('.') + 'x'
+
+
+def _resolve_srcset(tag, candidates, sizes, viewport, count, base_folder, options, result):
+    """
+    把img标签改写为只引用选中的候选
+
+    Returns:
+        str or None: 改写后的img标签，选中的候选无法读取时返回None
+    """
+    selected = select_candidates(candidates, sizes, viewport, count)
+    if not selected:
+        return None
+    tag = _remove_attrs(tag, ('srcset', 'sizes'))
+    url, density = selected[0]
+    if len(selected) == 1 and abs(density - 1) < 1e-3:
+        # 交给replace_images按普通图片内联
+        new_src = f' src="{html.escape(url, quote=True)}"'
+        if ATTR_PATTERNS['src'].search(tag):
+            return ATTR_PATTERNS['src'].sub(lambda m: new_src, tag, count=1)
+        return tag[:4] + new_src + tag[4:]
+
+    entries = []
+    for url, density in selected:
+        if url.startswith('data:'):
+            data_uri = url
+        else:
+            asset = _load_asset('image', url, base_folder, options, result)
+            if asset is None:
+                if entries:
+                    continue
+                return None
+            path, raw, mime_type = asset
+            mime_type = mime_type or 'image/unknown'
+            data_uri = _encode_data_uri(path, raw, mime_type, options)
+            _record(result, AssetRecord('image', url, path, STATUS_INLINED, len(raw),
+                                        _data_uri_size(data_uri, options), 'base64', mime_type))
+        entries.append(f'{data_uri} {_format_density(density)}')
+    tag = _remove_attrs(tag, ('src',))
+    return tag[:4] + f' srcset="{", ".join(entries)}"' + tag[4:]
+
+
+def _viewport(options):
+    """按转换选项返回目标视口"""
+    if options is None:
+        return Viewport()
+    return Viewport(options.viewport_width, options.device_pixel_ratio)
+
+
+def inline_responsive_images(html_content, base_folder, options=None, result=None):
+    """
+    处理HTML内容中的<picture>和带srcset的img，只保留按目标视口选中的候选
+
+    Args:
+        html_content (str): HTML内容字符串
+        base_folder (str): HTML文件所在的基础文件夹路径
+        options (ConversionOptions, optional): 转换选项，默认为None
+        result (ConversionResult, optional): 用于收集资源处理记录的转换结果，默认为None
+
+    Returns:
+        str: 处理后的HTML内容字符串
+    """
+    viewport = _viewport(options)
+    count = options.responsive_candidates if options is not None else 1
+    processed_count = 0
+
+    def rewrite_img(tag, srcset, sizes, include_src=True):
+        nonlocal processed_count
+        candidates = parse_srcset(srcset)
+        src = _get_attr(tag, 'src')
+        # img自身的srcset只有x描述符时，src相当于1x候选
+        if include_src and src and all(kind == 'x' for _, kind, _ in candidates) \
+                and not any(value == 1 for _, _, value in candidates):
+            candidates.append((src, 'x', 1.0))
+        new_tag = _resolve_srcset(tag, candidates, sizes, viewport, count, base_folder, options, result)
+        if new_tag is None:
+            return None
+        processed_count += 1
+        return new_tag
+
+    def replace_func(match):
+        if match.group(1) is None:
+            tag = match.group(0)
+            new_tag = rewrite_img(tag, _get_attr(tag, 'srcset') or '', _get_attr(tag, 'sizes'))
+            return tag if new_tag is None else new_tag
+
+        body = match.group(2)
+        img_match = IMG_TAG_PATTERN.search(body)
+        if img_match is None:
+            return match.group(0)
+        img_tag = img_match.group(0)
+        new_img = None
+        for source in SOURCE_PATTERN.finditer(body[:img_match.start()]):
+            tag = source.group(0)
+            srcset = _get_attr(tag, 'srcset')
+            media_type = (_get_attr(tag, 'type') or '').split(';')[0].strip().lower()
+            media = _get_attr(tag, 'media')
+            if not srcset or (media_type and media_type not in SUPPORTED_TYPES) \
+                    or (media and not viewport.matches(media)):
+                continue
+            new_img = rewrite_img(img_tag, srcset, _get_attr(tag, 'sizes'), include_src=False)
+            break
+        else:
+            srcset = _get_attr(img_tag, 'srcset')
+            if srcset:
+                new_img = rewrite_img(img_tag, srcset, _get_attr(img_tag, 'sizes'))
+            else:
+                # 没有可用的<source>，保留img原有的src
+                new_img = img_tag
+        if new_img is None:
+            return match.group(0)
+        return match.group(1) + new_img + match.group(3)
+
+    html_content = RESPONSIVE_PATTERN.sub(replace_func, html_content)
+    if processed_count:
+        logger.info(f"总计处理响应式图片数量: {processed_count}")
+    return html_content
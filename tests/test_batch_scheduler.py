@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""batch_scheduler模块的测试：暂停时收集已完成任务和暂缓任务的防饥饿"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_scheduler import BatchScheduler, JobEstimate
+from conversion_result import ConversionResult
+from html_converter import JobControl
+
+
+def _result(folder):
+    return ConversionResult(folder_path=folder, output_file=folder, output_size=1)
+
+
+class PauseTest(unittest.TestCase):
+
+    def test_finished_jobs_collected_while_paused(self):
+        control = JobControl()
+        started = {name: threading.Event() for name in 'abc'}
+        release = {name: threading.Event() for name in 'abc'}
+        done = []
+        collected = threading.Event()
+
+        def convert(folder):
+            started[folder].set()
+            release[folder].wait(5)
+            return _result(folder)
+
+        def on_done(result):
+            done.append(result.folder_path)
+            collected.set()
+
+        estimates = [JobEstimate(name, estimated_memory=1) for name in 'abc']
+        scheduler = BatchScheduler(max_workers=2)
+        thread = threading.Thread(target=scheduler.run, args=(estimates, convert, on_done, control),
+                                  daemon=True)
+        thread.start()
+        self.assertTrue(started['a'].wait(2) and started['b'].wait(2))
+        control.pause()
+        release['a'].set()
+        # 暂停期间已完成的任务照常回调，但不启动新任务
+        self.assertTrue(collected.wait(2))
+        collected.clear()
+        release['b'].set()
+        self.assertTrue(collected.wait(2))
+        self.assertEqual(done, ['a', 'b'])
+        time.sleep(0.3)
+        self.assertFalse(started['c'].is_set())
+
+        control.resume()
+        self.assertTrue(started['c'].wait(2))
+        release['c'].set()
+        thread.join(5)
+        self.assertEqual(sorted(done), ['a', 'b', 'c'])
+
+    def test_cancel_while_paused(self):
+        control = JobControl()
+        release = threading.Event()
+        results = []
+
+        def convert(folder):
+            release.wait(5)
+            return _result(folder)
+
+        estimates = [JobEstimate(name, estimated_memory=1) for name in 'abc']
+        thread = threading.Thread(target=BatchScheduler(max_workers=1).run,
+                                  args=(estimates, convert, results.append, control), daemon=True)
+        control.pause()
+        thread.start()
+        time.sleep(0.1)
+        control.cancel()
+        release.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(all(r.cancelled for r in results if r.folder_path != 'a'))
+        self.assertEqual(len(results), 3)
+
+
+class StarvationTest(unittest.TestCase):
+
+    def run_schedule(self, max_bypass):
+        durations = {'medium': 0.15, 'large': 0.01}
+
+        def convert(folder):
+            time.sleep(durations.get(folder, 0.02))
+            return _result(folder)
+
+        estimates = ([JobEstimate('medium', estimated_memory=60), JobEstimate('large', estimated_memory=90)]
+                     + [JobEstimate(f'small{i}', estimated_memory=10) for i in range(12)])
+        scheduler = BatchScheduler(max_workers=3, memory_budget=100, max_bypass=max_bypass)
+        report = scheduler.run(estimates, convert)
+        starts = [d.folder_path for d in report.decisions if d.action == 'start']
+        self.assertEqual(len(starts), len(estimates))
+        self.assertLessEqual(report.peak_in_flight_memory, 100)
+        return report, starts
+
+    def test_deferred_job_starts_after_bypass_limit(self):
+        report, starts = self.run_schedule(max_bypass=2)
+        self.assertEqual(starts[:4], ['medium', 'small0', 'small1', 'large'])
+        self.assertIn('reserve', [d.action for d in report.decisions])
+
+    def test_unlimited_fill_starves_large_job(self):
+        # 对照：不限制越过次数时大任务排在所有小任务之后
+        _, starts = self.run_schedule(max_bypass=1000)
+        self.assertEqual(starts[-1], 'large')
+
+
+if __name__ == '__main__':
+    unittest.main()
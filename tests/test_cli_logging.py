@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""命令行日志配置的测试：-v只打开本项目的DEBUG日志"""
+
+import os
+import sys
+import logging
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli import PROJECT_LOGGERS, configure_logging
+
+
+class ConfigureLoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (root.level, list(root.handlers),
+                      {name: logging.getLogger(name).level for name in PROJECT_LOGGERS})
+
+    def tearDown(self):
+        root = logging.getLogger()
+        root.setLevel(self.saved[0])
+        root.handlers[:] = self.saved[1]
+        for name, level in self.saved[2].items():
+            logging.getLogger(name).setLevel(level)
+
+    def test_debug_only_for_project_loggers(self):
+        logging.getLogger().handlers.clear()
+        configure_logging(logging.DEBUG)
+        self.assertEqual(logging.getLogger().level, logging.WARNING)
+        self.assertTrue(logging.getLogger('html_converter').isEnabledFor(logging.DEBUG))
+        self.assertTrue(logging.getLogger('remote_fetcher').isEnabledFor(logging.DEBUG))
+        self.assertFalse(logging.getLogger('fontTools.subset').isEnabledFor(logging.DEBUG))
+        self.assertFalse(logging.getLogger('fontTools.subset').isEnabledFor(logging.INFO))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""conversion_pipeline模块的测试：阶段类型、CPU名额和阶段注册"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion_pipeline import (STAGE_CPU, STAGE_IO, Pipeline, Stage, StageContext, default_stages)
+from conversion_result import ConversionResult
+from html_converter import ConversionOptions, convert_folder
+
+
+def _context():
+    return StageContext('index.html', '.', None, ConversionResult(folder_path='.'))
+
+
+class StageKindTest(unittest.TestCase):
+
+    def test_builtin_kinds(self):
+        kinds = {stage.name: stage.kind for stage in default_stages()}
+        self.assertEqual(kinds['fetch'], STAGE_IO)
+        self.assertEqual(kinds['images'], STAGE_CPU)
+        self.assertEqual(kinds['css'], STAGE_CPU)
+        self.assertEqual(kinds['embeds'], STAGE_IO)
+
+    def test_same_default_kind(self):
+        pipeline = Pipeline(stages=[])
+        registered = pipeline.register('custom', lambda html, context: html)
+        self.assertEqual(registered.kind, Stage('custom', len).kind)
+
+
+class CpuSlotTest(unittest.TestCase):
+
+    def test_cpu_stage_takes_slot(self):
+        pipeline = Pipeline(stages=[], cpu_workers=1)
+        observed = {}
+
+        def probe(name):
+            def stage(html, context):
+                observed[name] = pipeline.cpu_active
+                return html
+            return stage
+
+        pipeline.register('cpu', probe('cpu'), kind=STAGE_CPU)
+        pipeline.register('io', probe('io'), kind=STAGE_IO)
+        pipeline.run('', _context())
+        self.assertEqual(observed, {'cpu': 1, 'io': 0})
+        self.assertEqual(pipeline.cpu_active, 0)
+
+    def test_cpu_slots_bound_concurrency(self):
+        pipeline = Pipeline(stages=[], cpu_workers=2)
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def busy(html, context):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return html
+
+        pipeline.register('busy', busy, kind=STAGE_CPU)
+        threads = [threading.Thread(target=pipeline.run, args=('', _context())) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak, 2)
+
+    def test_io_stages_not_bounded(self):
+        pipeline = Pipeline(stages=[], cpu_workers=1)
+        barrier = threading.Barrier(3, timeout=2)
+
+        def wait(html, context):
+            barrier.wait()
+            return html
+
+        pipeline.register('wait', wait, kind=STAGE_IO)
+        threads = [threading.Thread(target=pipeline.run, args=('', _context())) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+
+
+class RegisterTest(unittest.TestCase):
+
+    def test_default_position_before_embeds(self):
+        pipeline = Pipeline()
+        pipeline.register('banner', lambda html, context: html)
+        names = pipeline.stage_names()
+        self.assertEqual(names.index('banner'), names.index('embeds') - 1)
+
+    def test_unknown_anchor_keeps_stage(self):
+        pipeline = Pipeline()
+        with self.assertRaises(ValueError):
+            pipeline.register('css', lambda html, context: html, after='missing')
+        self.assertIn('css', pipeline.stage_names())
+
+    def test_custom_stage_in_conversion(self):
+        with tempfile.TemporaryDirectory() as root:
+            folder = os.path.join(root, 'site')
+            os.makedirs(folder)
+            with open(os.path.join(folder, 'index.html'), 'w', encoding='utf-8') as f:
+                f.write('<html><body><p>x</p></body></html>')
+            pipeline = Pipeline()
+            pipeline.register('banner', lambda html, context: html.replace('<body>', '<body><!-- merged -->'))
+            result = convert_folder(folder, 'html', os.path.join(root, 'out'),
+                                    ConversionOptions(pipeline=pipeline))
+            self.assertTrue(result.success)
+            with open(result.output_file, encoding='utf-8') as f:
+                self.assertIn('<!-- merged -->', f.read())
+            self.assertIn('banner', result.timings)
+            self.assertEqual([s.name for s in pipeline.metrics.stats()][:2], ['read', 'fetch'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""css_pruner模块的测试：选择器裁剪、白名单和仍被引用的@keyframes/@font-face"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from css_pruner import prune_stylesheets, selector_requirements
+from html_converter import ConversionOptions
+
+PAGE = ('<html><head><style>.used { color: red; } .unused-inline { color: blue; }</style></head>'
+        '<body><div id="main" class="card used" data-role="x"><p>text</p></div></body></html>')
+
+
+def prune(css, html=PAGE, safelist=()):
+    html, sheets = prune_stylesheets(html, {'style.css': css}, ConversionOptions(css_safelist=safelist))
+    return html, sheets['style.css']
+
+
+class SelectorPruningTest(unittest.TestCase):
+
+    def test_unmatched_rules_removed(self):
+        _, css = prune('.card { a: 1; }\n.missing { b: 2; }\n#main > p { c: 3; }\n#other { d: 4; }\n'
+                       'span.card { e: 5; }\n[data-role] { f: 6; }\n[data-gone] { g: 7; }')
+        for kept in ('.card', '#main > p', '[data-role]'):
+            self.assertIn(kept, css)
+        for removed in ('.missing', '#other', 'span.card', '[data-gone]'):
+            self.assertNotIn(removed, css)
+
+    def test_selector_list_kept_when_any_matches(self):
+        _, css = prune('.missing, .card { a: 1; }')
+        self.assertIn('.missing, .card', css)
+
+    def test_pseudo_classes_and_unknown_selectors_kept(self):
+        _, css = prune('.card:hover::after { a: 1; }\n:not(.missing) { b: 2; }\n.card:has(.missing) { c: 3; }')
+        self.assertIn('.card:hover::after', css)
+        self.assertIn(':not(.missing)', css)
+        self.assertIn('.card:has(.missing)', css)
+
+    def test_group_rules(self):
+        _, css = prune('@media (min-width: 1px) { .card { a: 1; } .missing { b: 2; } }\n'
+                       '@media print { .missing { c: 3; } }')
+        self.assertIn('@media (min-width: 1px)', css)
+        self.assertNotIn('.missing', css)
+        self.assertNotIn('@media print', css)
+
+    def test_inline_style_blocks_pruned(self):
+        html, _ = prune('')
+        self.assertIn('.used', html)
+        self.assertNotIn('.unused-inline', html)
+
+    def test_requirements(self):
+        self.assertEqual(selector_requirements('div#main.card[data-role] > p'),
+                         {'div', '#main', '.card', '[data-role', 'p'})
+
+
+class SafelistTest(unittest.TestCase):
+
+    def test_wildcard_safelist(self):
+        _, css = prune('.is-active { a: 1; }\n.js-toggle-1 { b: 2; }\n.other { c: 3; }',
+                       safelist=('is-*', 'js-toggle-?'))
+        self.assertIn('.is-active', css)
+        self.assertIn('.js-toggle-1', css)
+        self.assertNotIn('.other', css)
+
+    def test_default_safelist(self):
+        _, css = prune('.card.show { a: 1; }')
+        self.assertIn('.card.show', css)
+
+
+class AtRuleReferenceTest(unittest.TestCase):
+
+    def test_keyframes_kept_only_when_referenced(self):
+        _, css = prune('@keyframes spin { to { transform: rotate(1turn); } }\n'
+                       '@keyframes orphan { to { opacity: 0; } }\n'
+                       '@keyframes dropped { to { opacity: 1; } }\n'
+                       '.card { animation: spin 1s linear infinite; }\n'
+                       '.missing { animation-name: dropped; }')
+        self.assertIn('@keyframes spin', css)
+        self.assertNotIn('@keyframes orphan', css)
+        # 引用它的规则被删除后，@keyframes也不再被引用
+        self.assertNotIn('@keyframes dropped', css)
+
+    def test_font_face_kept_only_when_referenced(self):
+        _, css = prune('@font-face { font-family: "Used Font"; src: url(a.woff2); }\n'
+                       '@font-face { font-family: Orphan; src: url(b.woff2); }\n'
+                       '.card { font: 12px/1.5 "Used Font", sans-serif; }')
+        self.assertIn('Used Font', css.split('.card')[0])
+        self.assertNotIn('Orphan', css)
+
+    def test_reference_across_stylesheets(self):
+        html = PAGE.replace('.used { color: red; }', '.used { animation: pulse 1s; }')
+        _, sheets = prune_stylesheets(html, {'a.css': '@keyframes pulse { to { opacity: 0; } }'})
+        self.assertIn('@keyframes pulse', sheets['a.css'])
+
+    def test_inline_style_attribute_reference(self):
+        html = PAGE.replace('<p>', '<p style="animation-name: fade-in">')
+        _, css = prune('@keyframes fade-in { to { opacity: 1; } }', html=html)
+        self.assertIn('@keyframes fade-in', css)
+
+    def test_safelisted_keyframes(self):
+        _, css = prune('@keyframes spin { to { opacity: 0; } }', safelist=('spin',))
+        self.assertIn('@keyframes spin', css)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""font_subsetter模块的测试：样式表content中的图标字符、CSS转义和不需要的字体的缓存"""
+
+import io
+import os
+import re
+import sys
+import base64
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import font_subsetter
+from font_subsetter import EMPTY_SUBSET, FontSubsetCache, decode_css_escapes, subset_stylesheet_fonts
+from html_converter import ConversionOptions, convert_folder
+
+try:
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    from fontTools.ttLib import TTFont
+except ImportError:
+    FontBuilder = None
+
+
+def make_font(codepoints):
+    """生成包含指定字符（方块字形）的TrueType字体"""
+    names = ['.notdef'] + [f'glyph{codepoint:04X}' for codepoint in codepoints]
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({codepoint: f'glyph{codepoint:04X}' for codepoint in codepoints})
+    pen = TTGlyphPen(None)
+    pen.moveTo((100, 0))
+    pen.lineTo((100, 700))
+    pen.lineTo((600, 700))
+    pen.lineTo((600, 0))
+    pen.closePath()
+    square = pen.glyph()
+    builder.setupGlyf({name: square for name in names})
+    builder.setupHorizontalMetrics({name: (700, 100) for name in names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({'familyName': 'Test', 'styleName': 'Regular'})
+    builder.setupOS2()
+    builder.setupPost()
+    output = io.BytesIO()
+    builder.save(output)
+    return output.getvalue()
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+
+
+class DecodeEscapesTest(unittest.TestCase):
+
+    def test_escapes(self):
+        self.assertEqual(decode_css_escapes(r'\f00d'), '\uf00d')
+        self.assertEqual(decode_css_escapes(r'\41 B'), 'AB')
+        self.assertEqual(decode_css_escapes(r'\"\\'), '"\\')
+        self.assertEqual(decode_css_escapes(r'\0'), '\ufffd')
+        self.assertEqual(decode_css_escapes('plain'), 'plain')
+
+
+@unittest.skipIf(FontBuilder is None, '未安装fontTools')
+class IconFontTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.root.name, 'site')
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def convert_cmap(self, font_codepoints):
+        write(os.path.join(self.folder, 'index.html'),
+              '<html><head><link rel="stylesheet" href="css/icons.css"></head>'
+              '<body><i class="fa-x"></i>A</body></html>')
+        write(os.path.join(self.folder, 'css', 'icons.css'),
+              '@font-face { font-family: "Icons"; src: url("icon.ttf"); }\n'
+              '.fa-x:before { font-family: "Icons"; content: "\\f00d"; }\n')
+        write(os.path.join(self.folder, 'css', 'icon.ttf'), make_font(font_codepoints))
+        result = convert_folder(self.folder, 'html', os.path.join(self.root.name, 'out'),
+                                ConversionOptions(subset_fonts=True))
+        self.assertTrue(result.success)
+        with open(result.output_file, encoding='utf-8') as f:
+            match = re.search(r'data:font/\w+;base64,([A-Za-z0-9+/=]+)', f.read())
+        self.assertIsNotNone(match, '字体规则被删除')
+        return set(TTFont(io.BytesIO(base64.b64decode(match.group(1)))).getBestCmap())
+
+    def test_icon_glyph_in_linked_stylesheet_kept(self):
+        self.assertEqual(self.convert_cmap([0x41, 0xF00D]), {0x41, 0xF00D})
+
+    def test_icon_only_font_kept(self):
+        self.assertEqual(self.convert_cmap([0xF00D]), {0xF00D})
+
+
+@unittest.skipIf(FontBuilder is None, '未安装fontTools')
+class UnusedFontTest(unittest.TestCase):
+
+    def test_unused_unicode_range_not_loaded(self):
+        css = '@font-face { src: url("missing.woff2"); unicode-range: U+4E00-9FFF; }'
+        with mock.patch.object(font_subsetter, '_load_asset') as load:
+            self.assertEqual(subset_stylesheet_fonts(css, '.', 'abc'), '')
+        load.assert_not_called()
+
+    def test_unused_font_cached(self):
+        with tempfile.TemporaryDirectory() as folder:
+            write(os.path.join(folder, 'cjk.ttf'), make_font([0x4E00]))
+            css = '@font-face { font-family: "CJK"; src: url("cjk.ttf"); }'
+            options = ConversionOptions(subset_fonts=True, font_cache=FontSubsetCache())
+            with mock.patch.object(font_subsetter, 'subset_font', wraps=font_subsetter.subset_font) as subset:
+                for _ in range(3):
+                    self.assertEqual(subset_stylesheet_fonts(css, folder, 'abc', options), '')
+            self.assertEqual(subset.call_count, 1)
+            self.assertEqual(options.font_cache.hits, 2)
+
+    def test_unused_font_cached_on_disk(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            raw = make_font([0x4E00])
+            key = FontSubsetCache.key(raw, 'abc')
+            FontSubsetCache(cache_dir).put(key, EMPTY_SUBSET)
+            self.assertEqual(FontSubsetCache(cache_dir).get(key), EMPTY_SUBSET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""图片懒加载的测试：占位图尺寸、重复图片共用数据和图片尺寸识别"""
+
+import os
+import re
+import sys
+import zlib
+import struct
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_converter import (LAZY_ATTR, LAZY_PLACEHOLDER, LAZY_STORE_ID, ConversionOptions, image_size,
+                            replace_images)
+
+
+def make_png(width, height):
+    """生成指定尺寸的单色PNG"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + b'\x00\x00\x00' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+def make_jpeg_header(width, height, orientation=None):
+    """生成只包含EXIF和SOF0段的JPEG文件头"""
+    segments = b''
+    if orientation is not None:
+        tiff = b'MM\x00\x2a' + struct.pack('>I', 8) + struct.pack('>H', 1) \
+            + struct.pack('>HHIHH', 0x0112, 3, 1, orientation, 0) + struct.pack('>I', 0)
+        exif = b'Exif\x00\x00' + tiff
+        segments += b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif
+    sof = struct.pack('>BHHB', 8, height, width, 3) + b'\x01\x11\x00\x02\x11\x00\x03\x11\x00'
+    segments += b'\xff\xc0' + struct.pack('>H', len(sof) + 2) + sof
+    return b'\xff\xd8' + segments + b'\xff\xd9'
+
+
+class ImageSizeTest(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(image_size(make_png(30, 20)), (30, 20))
+        self.assertEqual(image_size(b'GIF89a' + struct.pack('<HH', 7, 9) + b'\x00' * 8), (7, 9))
+        self.assertEqual(image_size(make_jpeg_header(640, 480)), (640, 480))
+        self.assertEqual(image_size(make_jpeg_header(640, 480, orientation=6)), (480, 640))
+        vp8x = b'RIFF' + b'\x00' * 4 + b'WEBPVP8X' + b'\x00' * 8 + (99).to_bytes(3, 'little') \
+            + (49).to_bytes(3, 'little')
+        self.assertEqual(image_size(vp8x), (100, 50))
+        self.assertEqual(image_size(b'<svg xmlns="http://www.w3.org/2000/svg" width="12" height="34px"/>'),
+                         (12, 34))
+        self.assertEqual(image_size(b'<svg viewBox="0 0 160 90"></svg>'), (160, 90))
+        self.assertIsNone(image_size(b'<svg width="100%" height="100%"></svg>'))
+        self.assertIsNone(image_size(b'not an image'))
+
+
+class LazyImagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.folder.name, 'a.png'), 'wb') as f:
+            f.write(make_png(40, 30))
+        with open(os.path.join(self.folder.name, 'b.png'), 'wb') as f:
+            f.write(make_png(8, 16))
+        with open(os.path.join(self.folder.name, 'c.bin'), 'wb') as f:
+            f.write(b'unknown format')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def convert(self, body, store='template'):
+        html = f'<html><body>{body}</body></html>'
+        options = ConversionOptions(lazy_images=True, lazy_eager_count=1, lazy_store=store,
+                                    splice_output=False)
+        return replace_images(html, self.folder.name, options)
+
+    def test_placeholder_keeps_image_size(self):
+        output = self.convert('<img src="b.png"><img src="a.png"><img src="c.bin">')
+        tags = re.findall(r'<img[^>]*>', output)
+        self.assertNotIn(LAZY_ATTR, tags[0])
+        self.assertIn('width=%2240%22 height=%2230%22', tags[1])
+        self.assertIn(LAZY_PLACEHOLDER, tags[2])
+        self.assertNotIn('loading=', output)
+
+    def test_repeated_images_share_payload(self):
+        output = self.convert('<img src="b.png">' + '<img src="a.png">' * 3 + '<img src="b.png">')
+        indexes = re.findall(rf'{LAZY_ATTR}="(\d+)"', output)
+        self.assertEqual(indexes, ['0', '0', '0', '1'])
+        self.assertEqual(len(re.findall(rf'<template id="{LAZY_STORE_ID}-\d+">', output)), 2)
+
+    def test_script_store_shares_payload(self):
+        output = self.convert('<img src="b.png">' + '<img src="a.png">' * 3, store='script')
+        store = re.search(rf'id="{LAZY_STORE_ID}-data">(.*?)</script>', output).group(1)
+        self.assertEqual(store.count('data:image/png;base64,'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
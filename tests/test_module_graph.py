@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""module_graph模块的测试：import扫描跳过正则表达式字面量，无法可靠扫描时原样内联"""
+
+import os
+import sys
+import base64
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion_result import ConversionResult
+from module_graph import inline_module_graph, parse_imports
+
+
+def specifiers(source):
+    imports = parse_imports(source)
+    return None if imports is None else [spec for _, _, spec in imports]
+
+
+class ParseImportsTest(unittest.TestCase):
+
+    def test_static_and_dynamic(self):
+        source = "import a from './a.js';\nexport * from './b.js';\nconst c = import('./c.js');"
+        self.assertEqual(specifiers(source), ['./a.js', './b.js', './c.js'])
+
+    def test_strings_and_comments_skipped(self):
+        source = "// import './x.js'\nconst s = \"import('./y.js')\";\nimport './z.js';"
+        self.assertEqual(specifiers(source), ['./z.js'])
+
+    def test_regex_literal_containing_import(self):
+        source = 'const re = /import("\\.\\/a\\.js")/g;\nimport "./real.js";'
+        self.assertEqual(specifiers(source), ['./real.js'])
+
+    def test_regex_literal_with_quote(self):
+        source = "const quote = /'/; import('./after.js'); const other = /'/;"
+        self.assertEqual(specifiers(source), ['./after.js'])
+
+    def test_regex_with_slash_in_class(self):
+        source = "const re = /[/'\"]/g;\nimport './after.js';"
+        self.assertEqual(specifiers(source), ['./after.js'])
+
+    def test_regex_after_keyword(self):
+        source = "function f(s) { return /'/.test(s); }\nimport './after.js';"
+        self.assertEqual(specifiers(source), ['./after.js'])
+
+    def test_division_is_not_regex(self):
+        source = "const x = a / 2; import('./c.js'); const y = (b + 1) / 3, z = i++ / 4;"
+        self.assertEqual(specifiers(source), ['./c.js'])
+
+    def test_ambiguous_scan(self):
+        self.assertIsNone(parse_imports("const half = total /* 合计 */ / 2;\nimport './a.js';"))
+
+
+class InlineModuleGraphTest(unittest.TestCase):
+
+    def test_ambiguous_module_inlined_unrewritten(self):
+        with tempfile.TemporaryDirectory() as folder:
+            main = "import './dep.js';\nconst half = total /* 合计 */ / 2;\n"
+            with open(os.path.join(folder, 'main.js'), 'w', encoding='utf-8') as f:
+                f.write(main)
+            with open(os.path.join(folder, 'dep.js'), 'w', encoding='utf-8') as f:
+                f.write('export const dep = 1;\n')
+            result = ConversionResult(folder_path=folder)
+            output = inline_module_graph('<script type="module" src="main.js"></script>', folder, None, result)
+            encoded = base64.b64encode(main.encode('utf-8')).decode('ascii')
+            self.assertIn(f'data:text/javascript;base64,{encoded}', output)
+            self.assertTrue(any('main.js' in warning for warning in result.warnings))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""output_analyzer模块的测试：资源路径统一和下级资源的归属"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion_result import STATUS_INLINED, AssetRecord, ConversionResult
+from html_converter import ConversionOptions, convert_folder
+from output_analyzer import analyze_result
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class AnalyzeResultTest(unittest.TestCase):
+
+    def test_same_reference_in_page_and_frame(self):
+        with tempfile.TemporaryDirectory() as root:
+            folder = os.path.join(root, 'site')
+            write(os.path.join(folder, 'index.html'),
+                  '<html><head><link rel="stylesheet" href="style.css"></head>'
+                  '<body><iframe src="sub/page.html"></iframe></body></html>')
+            write(os.path.join(folder, 'style.css'), 'body { color: red; }' * 10)
+            write(os.path.join(folder, 'sub', 'page.html'),
+                  '<html><head><link rel="stylesheet" href="style.css"></head><body>x</body></html>')
+            write(os.path.join(folder, 'sub', 'style.css'), 'p { margin: 0; }' * 50)
+            result = convert_folder(folder, 'html', os.path.join(root, 'out'),
+                                    ConversionOptions(inline_embeds=True))
+            self.assertTrue(result.success)
+
+            report = analyze_result(result)
+            usages = {(u.kind, u.path): u for u in report.assets}
+            self.assertEqual(set(usages), {('css', 'style.css'), ('css', 'sub/style.css'),
+                                           ('frame', 'sub/page.html')})
+            page_css = usages[('css', 'style.css')]
+            frame = usages[('frame', 'sub/page.html')]
+            # 页面的样式表不扣除子文档样式表的字节，子文档扣除自己的样式表
+            self.assertGreaterEqual(page_css.bytes_out, page_css.bytes_in)
+            frame_record = next(a for a in result.assets if a.kind == 'frame')
+            child_css = next(a for a in result.assets if a.path.endswith(os.path.join('sub', 'style.css')))
+            self.assertEqual(frame.bytes_out, frame_record.bytes_out - child_css.bytes_out)
+
+    def test_absolute_and_relative_paths_merge(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'lib.js')
+            result = ConversionResult(folder_path=folder, output_size=1000)
+            result.assets = [
+                AssetRecord('js', 'lib.js', os.path.relpath(path), STATUS_INLINED, 10, 20),
+                AssetRecord('js', './lib.js', os.path.abspath(path), STATUS_INLINED, 10, 20),
+            ]
+            report = analyze_result(result)
+            self.assertEqual(len(report.assets), 1)
+            self.assertEqual(report.assets[0].path, 'lib.js')
+            self.assertEqual(report.assets[0].references, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
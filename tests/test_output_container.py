@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""output_container模块的测试：写入文档、共享重复文档、解包和带ETag的HTTP浏览"""
+
+import os
+import sys
+import zlib
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_converter import ConversionOptions, batch_convert
+from output_container import ContainerError, OutputContainer, _ContainerRequestHandler
+
+PAGE = '<html><head><title>t</title></head><body><p>{}</p></body></html>'
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class OutputContainerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.root.name, 'out.sqlite')
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def test_add_and_get(self):
+        with OutputContainer(self.path, batch_size=1) as container:
+            size = container.add('a', 'html', [b'<p>', b'a</p>'], '/in/a')
+            self.assertEqual(size, 8)
+            self.assertEqual(container.locator('a'), f'{self.path}#a')
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(len(container), 1)
+            self.assertEqual(container.get('a'), ('html', b'<p>a</p>'))
+            self.assertIsNone(container.get('missing'))
+
+    def test_replace_same_name(self):
+        with OutputContainer(self.path) as container:
+            container.add('a', 'html', [b'old'])
+            container.flush()
+            container.add('a', 'mhtml', [b'new'])
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.get('a'), ('mhtml', b'new'))
+
+    def test_identical_content_stored_once(self):
+        with OutputContainer(self.path) as container:
+            container.add('a', 'html', [b'same'])
+            container.add('b', 'html', [b'same'])
+            self.assertEqual(container.blobs_shared, 1)
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container._db.execute('SELECT COUNT(*) FROM blobs').fetchone()[0], 1)
+
+    def test_link(self):
+        with OutputContainer(self.path) as container:
+            container.add('a', 'html', [b'<p>a</p>'])
+            # 源文档尚未提交时也可以共享
+            self.assertEqual(container.link('b', 'a'), 8)
+            container.flush()
+            self.assertEqual(container.link('c', 'b'), 8)
+            with self.assertRaises(KeyError):
+                container.link('d', 'missing')
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.names(), ['a', 'b', 'c'])
+            self.assertEqual(container.get('c'), ('html', b'<p>a</p>'))
+
+    def test_batch_links_duplicate_folders(self):
+        source = os.path.join(self.root.name, 'in')
+        write(os.path.join(source, 'a', 'index.html'), PAGE.format('same'))
+        write(os.path.join(source, 'b', 'index.html'), PAGE.format('same'))
+        write(os.path.join(source, 'c', 'index.html'), PAGE.format('other'))
+        with OutputContainer(self.path) as container:
+            batch = batch_convert(source, 'html', options=ConversionOptions(
+                output_container=container, dedupe_outputs=True))
+        self.assertEqual(len(batch.succeeded), 3)
+        self.assertEqual([result.link_method for result in batch.deduplicated], ['container'])
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.names(), ['a', 'b', 'c'])
+            self.assertEqual(container.get('a'), container.get('b'))
+            self.assertIn(b'other', container.get('c')[1])
+
+    def test_extract(self):
+        with OutputContainer(self.path) as container:
+            container.add('a', 'html', [b'<p>a</p>'])
+            container.add('b', 'mhtml', [b'MIME'])
+        output_dir = os.path.join(self.root.name, 'extracted')
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.extract(output_dir), 2)
+            with self.assertRaises(KeyError):
+                container.extract(output_dir, ['missing'])
+        self.assertEqual(sorted(os.listdir(output_dir)), ['a.html', 'b.mhtml'])
+        with open(os.path.join(output_dir, 'a.html'), 'rb') as f:
+            self.assertEqual(f.read(), b'<p>a</p>')
+
+    def test_names_prefix(self):
+        with OutputContainer(self.path) as container:
+            for name in ('ab', 'abc', 'abd', 'ac', 'b'):
+                container.add(name, 'html', [name.encode()])
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.names('ab'), ['ab', 'abc', 'abd'])
+            self.assertEqual(container.names('ab', limit=2), ['ab', 'abc'])
+            self.assertEqual(container.names('z'), [])
+
+    def test_names_prefix_without_successor(self):
+        # 末尾为U+10FFFF的前缀没有下一个码位，U+D7FF的下一个码位是代理
+        names = ['a\U0010ffff', 'a\U0010ffffb', 'b', '\U0010ffff', '\U0010ffff\U0010ffff', 'x\ud7ff', 'x\ud7ffz', 'x']
+        with OutputContainer(self.path) as container:
+            for name in names:
+                container.add(name, 'html', [b'x'])
+        with OutputContainer(self.path, readonly=True) as container:
+            self.assertEqual(container.names('a\U0010ffff'), ['a\U0010ffff', 'a\U0010ffffb'])
+            self.assertEqual(container.names('\U0010ffff'), ['\U0010ffff', '\U0010ffff\U0010ffff'])
+            self.assertEqual(container.names('x\ud7ff'), ['x\ud7ff', 'x\ud7ffz'])
+
+    def test_invalid_file(self):
+        write(self.path, 'not a database' * 100)
+        with self.assertRaises(ContainerError):
+            OutputContainer(self.path, readonly=True)
+
+
+class ContainerServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.root.name, 'out.sqlite')
+        with OutputContainer(path) as container:
+            container.add('page one', 'html', [PAGE.format('one').encode()])
+        cls.container = OutputContainer(path, readonly=True)
+        handler = type('Handler', (_ContainerRequestHandler,), {'container': cls.container,
+                                                                'log_message': lambda *args: None})
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.container.close()
+        cls.root.cleanup()
+
+    def request(self, path, headers=None):
+        connection = HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+        try:
+            connection.request('GET', path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_serve_page(self):
+        response, body = self.request('/page%20one')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader('Content-Type'), 'text/html; charset=utf-8')
+        self.assertEqual(body, PAGE.format('one').encode())
+        self.assertTrue(response.getheader('ETag'))
+
+    def test_deflate_sent_compressed(self):
+        response, body = self.request('/page%20one', {'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'deflate')
+        self.assertEqual(zlib.decompress(body), PAGE.format('one').encode())
+
+    def test_etag_not_modified(self):
+        response, _ = self.request('/page%20one')
+        etag = response.getheader('ETag')
+        response, body = self.request('/page%20one', {'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.getheader('ETag'), etag)
+        self.assertEqual(body, b'')
+        response, _ = self.request('/page%20one', {'If-None-Match': '"stale"'})
+        self.assertEqual(response.status, 200)
+
+    def test_index_and_missing(self):
+        response, body = self.request('/?prefix=page')
+        self.assertEqual(response.status, 200)
+        self.assertIn(b'href="/page%20one"', body)
+        self.assertEqual(self.request('/missing')[0].status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""output_splicer模块的测试：默认关闭、占位符拼接和临时目录不可写时的回退"""
+
+import os
+import sys
+import base64
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_converter import ConversionOptions, convert_folder
+from output_splicer import TOKEN_PATTERN, SpliceStore
+
+RAW = bytes(range(256)) * 40
+
+
+class SpliceStoreTest(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        self.assertFalse(ConversionOptions().splice_output)
+
+    def test_placeholder_written_to_output(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = SpliceStore(directory=root)
+            try:
+                token = store.data_uri('a.bin', RAW, 'application/octet-stream')
+                self.assertIsNotNone(TOKEN_PATTERN.fullmatch(token))
+                output = os.path.join(root, 'out.html')
+                store.write(f'<img src="{token}">', output)
+                with open(output, encoding='utf-8') as f:
+                    expected = base64.b64encode(RAW).decode('ascii')
+                    self.assertEqual(f.read(), f'<img src="data:application/octet-stream;base64,{expected}">')
+            finally:
+                store.close()
+
+    def test_unwritable_directory_falls_back_to_memory(self):
+        with tempfile.TemporaryDirectory() as root:
+            # 父目录实际上是一个文件，创建临时目录必然失败
+            not_a_directory = os.path.join(root, 'file')
+            open(not_a_directory, 'w').close()
+            store = SpliceStore(directory=not_a_directory)
+            with self.assertLogs('output_splicer', 'WARNING'):
+                first = store.data_uri('a.bin', RAW, 'image/png')
+            second = store.data_uri('a.bin', RAW, 'image/png')
+            self.assertTrue(store.disabled)
+            expected = 'data:image/png;base64,' + base64.b64encode(RAW).decode('ascii')
+            self.assertEqual(first, expected)
+            self.assertEqual(second, expected)
+            self.assertEqual(store.size(first), len(first))
+            store.close()
+
+    def test_conversion_with_unwritable_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            folder = os.path.join(root, 'site')
+            os.makedirs(folder)
+            with open(os.path.join(folder, 'index.html'), 'w', encoding='utf-8') as f:
+                f.write('<html><body><img src="a.png"></body></html>')
+            with open(os.path.join(folder, 'a.png'), 'wb') as f:
+                f.write(RAW)
+            not_a_directory = os.path.join(root, 'file')
+            open(not_a_directory, 'w').close()
+            store = SpliceStore(directory=not_a_directory)
+            options = ConversionOptions(splice_output=True, splice_store=store)
+            with self.assertLogs('output_splicer', 'WARNING'):
+                result = convert_folder(folder, 'html', os.path.join(root, 'out'), options)
+            store.close()
+            self.assertTrue(result.success)
+            with open(result.output_file, encoding='utf-8') as f:
+                self.assertIn(base64.b64encode(RAW).decode('ascii'), f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
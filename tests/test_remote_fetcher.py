@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""remote_fetcher模块的测试：使用本地http.server验证缓存、重新验证、重定向、解压和重试"""
+
+import os
+import sys
+import gzip
+import zlib
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from remote_fetcher import FetchError, RemoteFetcher
+
+BODY = b'body { color: red; }\n' * 20
+ETAG = '"v1"'
+LAST_MODIFIED = 'Mon, 05 Oct 2026 08:00:00 GMT'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = Counter()
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            count = self.hits[self.path]
+        route = getattr(self, 'route_' + self.path.strip('/').replace('-', '_'), None)
+        if route is None:
+            self.reply(404, b'not found')
+        else:
+            route(count)
+
+    def reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route_etag(self, count):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.reply(304, headers={'ETag': ETAG, 'Cache-Control': 'max-age=0'})
+        else:
+            self.reply(200, BODY, {'ETag': ETAG, 'Cache-Control': 'max-age=0',
+                                   'Content-Type': 'text/css; charset=utf-8'})
+
+    def route_last_modified(self, count):
+        if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            self.reply(304)
+        else:
+            self.reply(200, BODY, {'Last-Modified': LAST_MODIFIED, 'Content-Type': 'text/css'})
+
+    def route_fresh(self, count):
+        self.reply(200, BODY, {'Cache-Control': 'public, max-age=600', 'Content-Type': 'text/css'})
+
+    def route_no_store(self, count):
+        self.reply(200, BODY, {'Cache-Control': 'no-store', 'ETag': ETAG})
+
+    def route_redirect(self, count):
+        self.reply(302, headers={'Location': '/relay'})
+
+    def route_relay(self, count):
+        self.reply(301, headers={'Location': '/fresh'})
+
+    def route_loop(self, count):
+        self.reply(302, headers={'Location': '/loop'})
+
+    def route_gzip(self, count):
+        self.reply(200, gzip.compress(BODY), {'Content-Encoding': 'gzip'})
+
+    def route_deflate(self, count):
+        self.reply(200, zlib.compress(BODY), {'Content-Encoding': 'deflate'})
+
+    def route_raw_deflate(self, count):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        self.reply(200, compressor.compress(BODY) + compressor.flush(), {'Content-Encoding': 'deflate'})
+
+    def route_flaky(self, count):
+        if count == 1:
+            self.reply(503, b'busy')
+        else:
+            self.reply(200, BODY)
+
+    def route_drop(self, count):
+        if count == 1:
+            # 不发送响应直接断开连接
+            self.close_connection = True
+        else:
+            self.reply(200, BODY)
+
+    def route_down(self, count):
+        self.reply(500, b'error')
+
+
+class RemoteFetcherTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.hits.clear()
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def fetch(self, path, cache=True, **kwargs):
+        with RemoteFetcher(self.cache_dir.name if cache else None, timeout=5, **kwargs) as fetcher:
+            return fetcher.fetch(self.base + path)
+
+    def test_etag_revalidation(self):
+        first = self.fetch('/etag')
+        self.assertEqual((first.source, first.body, first.content_type), ('network', BODY, 'text/css'))
+        second = self.fetch('/etag')
+        self.assertEqual((second.source, second.body, second.content_type), ('revalidated', BODY, 'text/css'))
+        self.assertEqual(Handler.hits['/etag'], 2)
+
+    def test_last_modified_revalidation(self):
+        self.fetch('/last-modified')
+        second = self.fetch('/last-modified')
+        self.assertEqual((second.source, second.body), ('revalidated', BODY))
+
+    def test_max_age_reuse(self):
+        self.assertEqual(self.fetch('/fresh').source, 'network')
+        cached = self.fetch('/fresh')
+        self.assertEqual((cached.source, cached.body), ('cache', BODY))
+        self.assertEqual(Handler.hits['/fresh'], 1)
+
+    def test_no_store_not_reused(self):
+        self.fetch('/no-store')
+        # no-store的响应立即过期，再次获取时带条件请求，服务器返回完整内容
+        self.assertEqual(self.fetch('/no-store').source, 'network')
+        self.assertEqual(Handler.hits['/no-store'], 2)
+
+    def test_same_url_fetched_once_per_fetcher(self):
+        with RemoteFetcher(timeout=5) as fetcher:
+            fetcher.prefetch([self.base + '/fresh', self.base + '/fresh#top'])
+            self.assertEqual(fetcher.fetch(self.base + '/fresh').body, BODY)
+        self.assertEqual(Handler.hits['/fresh'], 1)
+
+    def test_redirects(self):
+        result = self.fetch('/redirect')
+        self.assertEqual(result.final_url, self.base + '/fresh')
+        self.assertEqual(result.body, BODY)
+        with self.assertRaises(FetchError):
+            self.fetch('/loop', cache=False)
+
+    def test_content_encoding(self):
+        for path in ('/gzip', '/deflate', '/raw-deflate'):
+            with self.subTest(path=path):
+                self.assertEqual(self.fetch(path, cache=False).body, BODY)
+
+    def test_retry_on_server_error(self):
+        result = self.fetch('/flaky', cache=False, retries=2)
+        self.assertEqual(result.body, BODY)
+        self.assertEqual(Handler.hits['/flaky'], 2)
+
+    def test_retry_on_dropped_connection(self):
+        self.assertEqual(self.fetch('/drop', cache=False, retries=1).body, BODY)
+        self.assertEqual(Handler.hits['/drop'], 2)
+
+    def test_gives_up_after_retries(self):
+        with self.assertRaises(FetchError):
+            self.fetch('/down', cache=False, retries=1)
+        self.assertEqual(Handler.hits['/down'], 2)
+
+    def test_client_error_not_retried(self):
+        with self.assertRaises(FetchError):
+            self.fetch('/missing', cache=False, retries=2)
+        self.assertEqual(Handler.hits['/missing'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
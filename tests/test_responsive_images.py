@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""responsive_images模块的测试：w/x描述符的候选选择、<picture>的source选择和未选中候选不被读取"""
+
+import os
+import sys
+import base64
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_converter import ConversionOptions, ConversionResult, replace_responsive_images
+from responsive_images import Viewport, inline_responsive_images, parse_srcset, select_candidates
+
+# 每个候选的内容不同，可以从data URI判断选中了哪个文件
+IMAGES = ('small.png', 'medium.png', 'large.png', 'photo.webp', 'photo.avif', 'photo.jxl', 'wide.png',
+          'fallback.png')
+
+
+def data_uri(name):
+    mime_type = 'image/webp' if name.endswith('.webp') else 'image/avif' if name.endswith('.avif') else 'image/png'
+    return f"data:{mime_type};base64,{base64.b64encode(name.encode()).decode('ascii')}"
+
+
+class SelectCandidatesTest(unittest.TestCase):
+
+    def test_parse_srcset(self):
+        self.assertEqual(parse_srcset('a.png 1x, b.png 2x,c.png'),
+                         [('a.png', 'x', 1.0), ('b.png', 'x', 2.0), ('c.png', 'x', 1.0)])
+        self.assertEqual(parse_srcset('a.png 480w, b.png 960w, bad.png 0w, worse.png abcw'),
+                         [('a.png', 'w', 480.0), ('b.png', 'w', 960.0)])
+
+    def test_x_descriptors(self):
+        candidates = parse_srcset('a.png 1x, b.png 2x, c.png 3x')
+        self.assertEqual(select_candidates(candidates, None, Viewport()), [('a.png', 1.0)])
+        self.assertEqual(select_candidates(candidates, None, Viewport(device_pixel_ratio=1.5)), [('b.png', 2.0)])
+        # 没有密度足够的候选时选择密度最高的
+        self.assertEqual(select_candidates(candidates, None, Viewport(device_pixel_ratio=4)), [('c.png', 3.0)])
+        self.assertEqual(select_candidates(candidates, None, Viewport(), count=2), [('a.png', 1.0), ('b.png', 2.0)])
+
+    def test_w_descriptors_full_width(self):
+        candidates = parse_srcset('s.png 640w, m.png 1280w, l.png 2560w')
+        self.assertEqual(select_candidates(candidates, None, Viewport(1280)), [('m.png', 1.0)])
+        self.assertEqual(select_candidates(candidates, None, Viewport(1280, 2)), [('l.png', 2.0)])
+        self.assertEqual(select_candidates(candidates, None, Viewport(600)), [('s.png', 1.067)])
+
+    def test_w_descriptors_with_sizes(self):
+        candidates = parse_srcset('s.png 400w, m.png 800w, l.png 1600w')
+        sizes = '(max-width: 600px) 100vw, (min-width: 1000px) 25em, 50vw'
+        # 25em = 400px
+        self.assertEqual(select_candidates(candidates, sizes, Viewport(1280)), [('s.png', 1.0)])
+        # 50vw = 400px，2倍像素比需要800w
+        self.assertEqual(select_candidates(candidates, sizes, Viewport(800, 2)), [('m.png', 2.0)])
+        # 100vw = 500px
+        self.assertEqual(select_candidates(candidates, sizes, Viewport(500)), [('m.png', 1.6)])
+
+    def test_media_queries(self):
+        viewport = Viewport(1280, 2)
+        self.assertTrue(viewport.matches('(min-width: 1000px) and (max-width: 1400px)'))
+        self.assertFalse(viewport.matches('(max-width: 800px)'))
+        self.assertTrue(viewport.matches('print, (min-resolution: 192dpi)'))
+        self.assertFalse(viewport.matches('(unknown-feature: 1)'))
+        self.assertTrue(viewport.matches('not print and (max-width: 800px)'))
+
+
+class InlineResponsiveImagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        for name in IMAGES:
+            with open(os.path.join(self.folder.name, name), 'wb') as f:
+                f.write(name.encode())
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def inline(self, html_content, **options):
+        result = ConversionResult(folder_path=self.folder.name)
+        html_content = inline_responsive_images(html_content, self.folder.name,
+                                                ConversionOptions(responsive_images=True, **options), result)
+        return html_content, sorted(os.path.basename(record.path) for record in result.assets)
+
+    def test_disabled_by_default(self):
+        html_content = '<img src="small.png" srcset="large.png 2x">'
+        self.assertFalse(ConversionOptions().responsive_images)
+        self.assertEqual(replace_responsive_images(html_content, self.folder.name, ConversionOptions()),
+                         html_content)
+
+    def test_density_one_rewritten_to_src(self):
+        html_content, loaded = self.inline('<img src="fallback.png" srcset="small.png 640w, large.png 1280w" '
+                                           'sizes="50vw" alt="a">')
+        self.assertEqual(html_content, '<img src="small.png" alt="a">')
+        # 改写为src后由replace_images读取，这里不读取任何候选
+        self.assertEqual(loaded, [])
+
+    def test_x_descriptor_inlined(self):
+        html_content, loaded = self.inline('<img src="small.png" srcset="medium.png 1.5x, large.png 2x">',
+                                           device_pixel_ratio=2)
+        self.assertEqual(html_content, f'<img srcset="{data_uri("large.png")} 2x">')
+        self.assertEqual(loaded, ['large.png'])
+
+    def test_w_descriptor_inlined_as_density(self):
+        html_content, loaded = self.inline('<img srcset="small.png 400w, medium.png 800w, large.png 1600w" '
+                                           'sizes="400px">', device_pixel_ratio=1.5)
+        self.assertEqual(html_content, f'<img srcset="{data_uri("medium.png")} 2x">')
+        self.assertEqual(loaded, ['medium.png'])
+
+    def test_multiple_candidates(self):
+        html_content, loaded = self.inline('<img srcset="small.png 1x, medium.png 1.5x, large.png 2x">',
+                                           responsive_candidates=2)
+        self.assertEqual(html_content,
+                         f'<img srcset="{data_uri("small.png")} 1x, {data_uri("medium.png")} 1.5x">')
+        self.assertEqual(loaded, ['medium.png', 'small.png'])
+
+    def test_picture_skips_unsupported_type(self):
+        html_content, loaded = self.inline(
+            '<picture><source type="image/jxl" srcset="photo.jxl">'
+            '<source type="image/avif" srcset="photo.avif 1x, large.png 2x">'
+            '<source type="image/webp" srcset="photo.webp">'
+            '<img src="fallback.png" alt="p"></picture>')
+        self.assertEqual(html_content, '<picture><img src="photo.avif" alt="p"></picture>')
+        self.assertEqual(loaded, [])
+
+    def test_picture_media_condition(self):
+        picture = ('<picture><source media="(max-width: 700px)" srcset="small.png 2x">'
+                   '<source media="(min-width: 1400px)" srcset="wide.png 2x">'
+                   '<source srcset="medium.png 2x"><img src="fallback.png"></picture>')
+        self.assertEqual(self.inline(picture, viewport_width=600, device_pixel_ratio=2)[1], ['small.png'])
+        self.assertEqual(self.inline(picture, viewport_width=1600, device_pixel_ratio=2)[1], ['wide.png'])
+        self.assertEqual(self.inline(picture, viewport_width=1000, device_pixel_ratio=2)[1], ['medium.png'])
+
+    def test_picture_without_matching_source_keeps_img(self):
+        html_content, loaded = self.inline('<picture><source media="(max-width: 100px)" srcset="small.png">'
+                                           '<img src="fallback.png"></picture>')
+        self.assertEqual(html_content, '<picture><img src="fallback.png"></picture>')
+        self.assertEqual(loaded, [])
+
+    def test_missing_candidate_left_unchanged(self):
+        tag = '<img src="small.png" srcset="missing.png 2x">'
+        self.assertEqual(self.inline(tag, device_pixel_ratio=2)[0], tag)
+
+
+if __name__ == '__main__':
+    unittest.main()